@@ -0,0 +1,80 @@
+"""
+Compares agent runs with and without the dataset profile in the prompt, using a scripted LLM.
+
+The scripted model explores the data with tools only when its context lacks the information, so the
+comparison shows how many tool round-trips, and how much time, the profile saves per question.
+
+Usage:
+    python -m benchmarks.ab_profile --size-mb 50 --latency 0.5
+"""
+import os
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+import typer
+
+from benchmarks.bench_parallel_stats import generate_csv
+from benchmarks.fake_llm import ScriptedChatModel
+from csv_explorer.csv_explorer import LLM_MODELS, CSVExplorer
+from csv_explorer.ingestion import convert_to_columnar
+from csv_explorer.profile import build_profile
+
+app = typer.Typer()
+
+QUESTIONS = [
+    "Quais são as colunas do arquivo?",
+    "Quais colunas têm valores nulos?",
+    "Qual é o segmento mais comum?",
+    "Qual é a média de amount por segment?",
+    "Quantas cidades diferentes existem?",
+]
+
+
+def _script(filepath: str) -> list:
+    return [
+        ("get_column_names", {"csv_filepath": filepath}, r"# Perfil dos dados"),
+        ("infer_column_types_of_csv_file", {"csv_filepath": filepath}, r"\| coluna \| dtype \| tipo"),
+        ("python_repl_ast", {"query": "df.head()"}, r"Primeiras linhas"),
+    ]
+
+
+def _run(filepath: str, use_profile: bool, questions: List[str]) -> Dict[str, float]:
+    explorer = CSVExplorer(filepath, model="scripted", use_profile=use_profile)
+    explorer.response_cache = None
+    tool_calls, latencies = [], []
+    try:
+        for question in questions:
+            start = time.perf_counter()
+            response = explorer.invoke(question)
+            latencies.append(time.perf_counter() - start)
+            tool_calls.append(len(response.intermediate_actions))
+    finally:
+        explorer.close()
+    return {"tool_calls": statistics.mean(tool_calls), "latency": statistics.mean(latencies)}
+
+
+@app.command()
+def main(size_mb: float = 50.0, latency: float = 0.5, filepath: str = ""):
+    """Reports the average number of tool calls and latency per question, with and without the profile."""
+    if not filepath:
+        filepath = os.path.join(tempfile.gettempdir(), f"ab_profile_{size_mb}mb.csv")
+    if not os.path.exists(filepath):
+        typer.echo(f"Generating {filepath}...")
+        generate_csv(filepath, int(size_mb * 1024**2))
+
+    convert_to_columnar(filepath)
+    build_profile(filepath)
+
+    ScriptedChatModel.configure(_script(filepath), latency=latency)
+    LLM_MODELS["scripted"] = ScriptedChatModel
+
+    typer.echo(f"{'profile':>8} {'tool calls':>11} {'latency (s)':>12}")
+    for use_profile in (False, True):
+        result = _run(filepath, use_profile, QUESTIONS)
+        typer.echo(f"{str(use_profile):>8} {result['tool_calls']:>11.2f} {result['latency']:>12.2f}")
+
+
+if __name__ == "__main__":
+    app()
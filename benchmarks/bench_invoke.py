@@ -0,0 +1,178 @@
+"""
+Measures where the time of `CSVExplorer.invoke` goes, end to end, with a scripted LLM instead of OpenAI.
+
+Each question replays a recorded sequence of tool calls against generated CSV files of each size, and the
+time of each stage (prompt build, LLM steps, each tool, answer parsing and response formatting) is reported
+along with the peak memory. Timings are compared with the baseline saved by `--save-baseline` on the same
+machine, so regressions show up. The baseline is not committed, since timings depend on the machine: without
+one, or without one for some of the sizes, the comparison fails.
+
+Usage:
+    python -m benchmarks.bench_invoke --sizes-mb 10 --sizes-mb 100 --sizes-mb 1024
+    python -m benchmarks.bench_invoke --save-baseline
+"""
+import json
+import os
+import resource
+import statistics
+import tempfile
+from typing import Dict, List
+
+import typer
+
+from benchmarks.bench_parallel_stats import generate_csv
+from benchmarks.fake_llm import ScriptedChatModel
+from csv_explorer.callbacks import TimingCallbackHandler
+from csv_explorer.csv_explorer import LLM_MODELS, CSVExplorer
+from csv_explorer.ingestion import convert_to_columnar
+from csv_explorer.profile import build_profile
+
+app = typer.Typer()
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "bench_invoke.json")
+
+STAGES = ["invoke.prompt", "invoke.agent", "invoke.parse_answer", "invoke.format"]
+
+
+def _recordings(filepath: str) -> Dict[str, list]:
+    return {
+        "colunas": [("get_column_names", {"csv_filepath": filepath}, None)],
+        "tipos": [("infer_column_types_of_csv_file", {"csv_filepath": filepath}, None)],
+        "estatísticas": [
+            ("generate_descriptive_statistics", {"csv_filepath": filepath, "columns": ["amount", "score"]}, None),
+        ],
+        "média": [
+            (
+                "python_evaluator",
+                {"python_code": "print(df.groupby('segment')['amount'].mean())", "csv_filepath": filepath},
+                None,
+            ),
+        ],
+        "histograma": [
+            (
+                "plot_generator",
+                {
+                    "matplotlib_code": "plt.hist(df['score'], bins=50)",
+                    "csv_filepath": filepath,
+                    "plot_description": "Histograma de score",
+                },
+                None,
+            ),
+        ],
+        "resumo": [
+            ("generate_descriptive_statistics", {"csv_filepath": filepath}, None),
+            (
+                "python_evaluator",
+                {"python_code": "print(df['city'].value_counts().head())", "csv_filepath": filepath},
+                None,
+            ),
+        ],
+    }
+
+
+QUESTIONS = [
+    "Quais são as colunas?",
+    "Quais são os tipos das colunas?",
+    "Mostre as estatísticas de amount e score",
+    "Qual é a média de amount por segment?",
+    "Faça um histograma de score",
+    "Faça um resumo dos dados e das cidades",
+]
+
+
+def _peak_rss_mb() -> Dict[str, float]:
+    return {
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "peak_rss_children_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }
+
+
+def _run(filepath: str) -> Dict[str, float]:
+    stages: Dict[str, List[float]] = {}
+
+    explorer = CSVExplorer(filepath, model="scripted", agent_type="openai-functions")
+    explorer.response_cache = None
+    try:
+        stages.setdefault("reset", []).append(explorer.timings["reset"])
+        for question in QUESTIONS:
+            handler = TimingCallbackHandler()
+            explorer.invoke(question, callbacks=[handler])
+            for stage in STAGES:
+                stages.setdefault(stage, []).append(explorer.timings[stage])
+            for label, elapsed in handler.totals().items():
+                stages.setdefault(label, []).append(elapsed)
+    finally:
+        explorer.close()
+
+    result = {stage: statistics.mean(values) for stage, values in stages.items()}
+    result.update(_peak_rss_mb())
+    return result
+
+
+def _compare(
+    results: Dict[str, Dict[str, float]], baselines: Dict[str, Dict[str, float]], tolerance: float
+) -> List[str]:
+    regressions = []
+    for size, result in results.items():
+        for stage, value in result.items():
+            baseline = baselines[size].get(stage)
+            if baseline and value > baseline * (1 + tolerance) and value - baseline > 0.01:
+                regressions.append(f"{size} {stage}: {baseline:.3f} -> {value:.3f}")
+    return regressions
+
+
+@app.command()
+def main(
+    sizes_mb: List[float] = typer.Option([10.0, 100.0, 1024.0]),
+    latency: float = 0.0,
+    tolerance: float = 0.2,
+    save_baseline: bool = False,
+):
+    """Reports the mean time of each stage of `CSVExplorer.invoke` and the peak memory, for each file size."""
+    LLM_MODELS["scripted"] = ScriptedChatModel
+    results: Dict[str, Dict[str, float]] = {}
+
+    for size_mb in sizes_mb:
+        filepath = os.path.join(tempfile.gettempdir(), f"bench_invoke_{size_mb:g}mb.csv")
+        if not os.path.exists(filepath):
+            typer.echo(f"Generating {filepath}...")
+            generate_csv(filepath, int(size_mb * 1024**2))
+        convert_to_columnar(filepath)
+        build_profile(filepath)
+
+        ScriptedChatModel.configure([], latency=latency, recordings=_recordings(filepath))
+        results[f"{size_mb:g}mb"] = _run(filepath)
+
+    for size, result in results.items():
+        typer.echo(f"\n{size}")
+        for stage, value in result.items():
+            unit = "MB" if stage.endswith("_mb") else "s"
+            typer.echo(f"  {stage:<45} {value:>10.3f} {unit}")
+
+    if save_baseline:
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, "w") as file:
+            json.dump(results, file, indent=4)
+        typer.echo(f"\nBaseline saved to {BASELINE_PATH}")
+        return
+
+    if not os.path.exists(BASELINE_PATH):
+        typer.echo(f"\nNo baseline at {BASELINE_PATH}. Run with --save-baseline to create one.", err=True)
+        raise typer.Exit(code=2)
+
+    with open(BASELINE_PATH) as file:
+        baselines = json.load(file)
+    missing = [size for size in results if size not in baselines]
+    if missing:
+        typer.echo(f"\nNo baseline for {', '.join(missing)}. Run with --save-baseline to create one.", err=True)
+        raise typer.Exit(code=2)
+
+    regressions = _compare(results, baselines, tolerance)
+    if regressions:
+        typer.echo("\nRegressions:\n  " + "\n  ".join(regressions))
+        raise typer.Exit(code=1)
+    typer.echo("\nNo regressions.")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,93 @@
+"""
+Measures how descriptive statistics and type inference scale with the number of worker processes.
+
+Usage:
+    python -m benchmarks.bench_parallel_stats --size-gb 2 --max-workers 8
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import typer
+
+from csv_explorer import inference
+from csv_explorer.inference import infer_column_types
+from csv_explorer.statistics import describe_csv
+
+app = typer.Typer()
+
+
+def generate_csv(filepath: str, size_bytes: int, chunk_rows: int = 500_000, seed: int = 0) -> None:
+    """
+    Writes a synthetic CSV file of about `size_bytes` bytes with numeric, categorical and text columns.
+
+    Args:
+        filepath (str): The path of the file to be written.
+        size_bytes (int): The approximate size of the file.
+        chunk_rows (int, optional): The number of rows written at a time. Defaults to 500_000.
+        seed (int, optional): The random seed. Defaults to 0.
+    """
+    rng = np.random.default_rng(seed)
+    header = True
+    with open(filepath, "w") as file:
+        while file.tell() < size_bytes:
+            chunk = pd.DataFrame(
+                {
+                    "id": rng.integers(0, 10**9, chunk_rows),
+                    "amount": rng.lognormal(3, 1, chunk_rows).round(2),
+                    "score": rng.normal(0, 1, chunk_rows),
+                    "segment": rng.choice(["A", "B", "C", "D"], chunk_rows),
+                    "city": rng.choice([f"city_{i}" for i in range(500)], chunk_rows),
+                    "active": rng.random(chunk_rows) < 0.5,
+                }
+            )
+            chunk.to_csv(file, index=False, header=header)
+            header = False
+
+
+def _measure(func, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+@app.command()
+def main(
+    size_gb: float = 2.0,
+    max_workers: int = os.cpu_count() or 1,
+    filepath: str = "",
+):
+    """Times `describe_csv` and `infer_column_types` with 1, 2, 4, ... up to `max_workers` processes."""
+    if not filepath:
+        filepath = os.path.join(tempfile.gettempdir(), f"bench_parallel_stats_{size_gb}gb.csv")
+    if not os.path.exists(filepath):
+        typer.echo(f"Generating {filepath}...")
+        generate_csv(filepath, int(size_gb * 1024**3))
+
+    size = os.path.getsize(filepath) / 1024**3
+    typer.echo(f"File: {filepath} ({size:.2f} GB)")
+
+    warmup_filepath = os.path.join(tempfile.gettempdir(), "bench_parallel_stats_warmup.csv")
+    generate_csv(warmup_filepath, 1024**2, chunk_rows=10_000)
+
+    workers_list = sorted({1, *[2**i for i in range(1, max_workers.bit_length()) if 2**i <= max_workers], max_workers})
+    baseline = {}
+
+    typer.echo(f"{'workers':>8} {'describe (s)':>14} {'speedup':>8} {'infer (s)':>10} {'speedup':>8}")
+    for workers in workers_list:
+        describe_csv(warmup_filepath, workers=workers)
+        describe_time = _measure(describe_csv, filepath, workers=workers)
+        inference._INFERENCE_CACHE.clear()
+        infer_time = _measure(infer_column_types, filepath, workers=workers)
+        baseline.setdefault("describe", describe_time)
+        baseline.setdefault("infer", infer_time)
+        typer.echo(
+            f"{workers:>8} {describe_time:>14.2f} {baseline['describe'] / describe_time:>8.2f}"
+            f" {infer_time:>10.2f} {baseline['infer'] / infer_time:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,109 @@
+"""
+A scripted chat model that stands in for the OpenAI models in benchmarks, so agent runs are deterministic,
+free and measure only what happens around the LLM.
+"""
+import json
+import re
+import time
+import uuid
+from typing import Any, ClassVar, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, FunctionMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+ScriptedStep = Tuple[str, Dict[str, Any], Optional[str]]
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    A chat model that follows a fixed exploration script before answering.
+
+    Each step of the script is a `(tool, tool_input, skip_if)` tuple. For every question, the model calls, in
+    order, the tools of the steps whose `skip_if` regex does not match the conversation, or is None, one per
+    round-trip, like a model that only explores the data when its context lacks the information, and then
+    answers. Questions matching a regex of `recordings` replay the steps recorded for them instead of the
+    script. Each call sleeps for `latency` seconds, to account for the time of a real LLM round-trip.
+
+    Use `ScriptedChatModel.configure` to set the script, then register the class in `LLM_MODELS`.
+    """
+
+    model: str = "scripted"
+    temperature: float = 0.0
+    verbose: bool = False
+
+    script: ClassVar[List[ScriptedStep]] = []
+    recordings: ClassVar[Dict[str, List[ScriptedStep]]] = {}
+    latency: ClassVar[float] = 0.0
+
+    @classmethod
+    def configure(
+        cls,
+        script: List[ScriptedStep],
+        latency: float = 0.0,
+        recordings: Optional[Dict[str, List[ScriptedStep]]] = None,
+    ) -> None:
+        """
+        Sets the script followed by every instance.
+
+        Args:
+            script (List[ScriptedStep]): The `(tool, tool_input, skip_if)` steps.
+            latency (float, optional): The simulated latency of each call, in seconds. Defaults to 0.
+            recordings (Dict[str, List[ScriptedStep]], optional): The steps replayed for the questions
+                matching each regex. Defaults to None.
+        """
+        cls.script = script
+        cls.latency = latency
+        cls.recordings = recordings or {}
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency)
+
+        turn = _current_turn(messages)
+        prompt = str(messages[-len(turn) - 1].content).strip() if len(turn) < len(messages) else ""
+        question = prompt.splitlines()[-1] if prompt else ""
+        script = next(
+            (steps for pattern, steps in self.recordings.items() if re.search(pattern, question)),
+            self.script,
+        )
+
+        context = "\n".join(str(message.content) for message in messages)
+        pending = [step for step in script if step[2] is None or not re.search(step[2], context)]
+        done = sum(isinstance(message, (FunctionMessage, ToolMessage)) for message in turn)
+
+        if done < len(pending):
+            tool, tool_input, _ = pending[done]
+            message = _call(tool, tool_input, use_tools="tools" in kwargs)
+        else:
+            message = AIMessage(content=f"Resposta com base em {done} chamadas de tools.")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def _current_turn(messages: List[BaseMessage]) -> List[BaseMessage]:
+    for index in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[index], HumanMessage):
+            return messages[index + 1:]
+    return messages
+
+
+def _call(tool: str, tool_input: Dict[str, Any], use_tools: bool) -> AIMessage:
+    arguments = json.dumps(tool_input)
+    if use_tools:
+        tool_call = {
+            "id": f"call_{uuid.uuid4().hex}",
+            "type": "function",
+            "function": {"name": tool, "arguments": arguments},
+        }
+        return AIMessage(content="", additional_kwargs={"tool_calls": [tool_call]})
+    return AIMessage(content="", additional_kwargs={"function_call": {"name": tool, "arguments": arguments}})
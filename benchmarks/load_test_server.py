@@ -0,0 +1,122 @@
+"""
+Load-tests the headless server with concurrent users, each opening a session and asking questions.
+
+Without `--url`, a server is started in this process with the scripted LLM, so the test measures the
+server and the tools, not OpenAI.
+
+Usage:
+    python -m benchmarks.load_test_server --users 16 --questions 5
+    python -m benchmarks.load_test_server --url http://localhost:8000 --model gpt-3.5-turbo
+"""
+import asyncio
+import os
+import statistics
+import tempfile
+import threading
+import time
+from typing import List, Optional
+
+import httpx
+import typer
+import uvicorn
+
+from benchmarks.bench_invoke import QUESTIONS, _recordings
+from benchmarks.bench_parallel_stats import generate_csv
+from benchmarks.fake_llm import ScriptedChatModel
+from csv_explorer.csv_explorer import LLM_MODELS
+from csv_explorer_server import create_app
+
+app = typer.Typer()
+
+
+def _start_local_server(port: int, filepath: str) -> uvicorn.Server:
+    ScriptedChatModel.configure([], recordings=_recordings(filepath))
+    LLM_MODELS["scripted"] = ScriptedChatModel
+
+    server = uvicorn.Server(
+        uvicorn.Config(create_app(defaults={"model": "scripted"}), port=port, log_level="warning")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def _user(client: httpx.AsyncClient, dataset_id: str, model: str, n_questions: int, stream: bool) -> List[float]:
+    response = await client.post("/sessions", json={"dataset_id": dataset_id, "model": model})
+    response.raise_for_status()
+    session_id = response.json()["session_id"]
+
+    latencies = []
+    try:
+        for index in range(n_questions):
+            question = QUESTIONS[index % len(QUESTIONS)]
+            start = time.perf_counter()
+            url = f"/sessions/{session_id}/questions"
+            if stream:
+                async with client.stream("POST", url, params={"stream": "true"}, json={"question": question}) as answer:
+                    answer.raise_for_status()
+                    async for _ in answer.aiter_lines():
+                        pass
+            else:
+                (await client.post(url, json={"question": question})).raise_for_status()
+            latencies.append(time.perf_counter() - start)
+    finally:
+        await client.delete(f"/sessions/{session_id}")
+    return latencies
+
+
+async def _load_test(url: str, filepath: str, users: int, questions: int, model: str, stream: bool) -> None:
+    async with httpx.AsyncClient(base_url=url, timeout=None) as client:
+        with open(filepath, "rb") as file:
+            response = await client.post("/datasets", content=file.read())
+        response.raise_for_status()
+        dataset_id = response.json()["dataset_id"]
+
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *[_user(client, dataset_id, model, questions, stream) for _ in range(users)], return_exceptions=True
+        )
+        elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for result in results if isinstance(result, list) for latency in result)
+    errors = [result for result in results if isinstance(result, Exception)]
+    typer.echo(f"{users} users x {questions} questions in {elapsed:.1f}s ({len(latencies) / elapsed:.2f} req/s)")
+    if latencies:
+        typer.echo(
+            f"Latency: mean {statistics.mean(latencies):.2f}s, p50 {latencies[len(latencies) // 2]:.2f}s, "
+            f"p95 {latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]:.2f}s, max {latencies[-1]:.2f}s"
+        )
+    for error in errors:
+        typer.echo(f"Error: {error!r}")
+
+
+@app.command()
+def main(
+    url: Optional[str] = None,
+    users: int = 8,
+    questions: int = 3,
+    size_mb: float = 10.0,
+    model: str = "scripted",
+    stream: bool = False,
+    port: int = 8765,
+):
+    """Runs `users` concurrent sessions against the server, each asking `questions` questions."""
+    filepath = os.path.join(tempfile.gettempdir(), f"load_test_{size_mb:g}mb.csv")
+    if not os.path.exists(filepath):
+        generate_csv(filepath, int(size_mb * 1024**2))
+
+    server = None
+    if url is None:
+        server = _start_local_server(port, filepath)
+        url = f"http://127.0.0.1:{port}"
+
+    try:
+        asyncio.run(_load_test(url, filepath, users, questions, model, stream))
+    finally:
+        if server is not None:
+            server.should_exit = True
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,242 @@
+import asyncio
+import json
+import os
+import re
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from pydantic import BaseModel
+
+from csv_explorer.csv_explorer import CSVExplorer
+from csv_explorer.ingestion import convert_to_columnar
+from csv_explorer.loader import load_dataframe
+from csv_explorer.profile import build_profile
+
+
+class BatchResult(BaseModel):
+    """
+    The result of one question of a batch.
+
+    Attributes:
+        index (int): The position of the question in the batch.
+        question (str): The question.
+        output (str, optional): The final answer of the agent.
+        files (List[str]): The files written for the answer, relative to the output directory.
+        latency (float): The time spent answering, in seconds, from when an explorer was free and the rate limit
+            allowed the question to start.
+        wait (float): The time spent waiting for a free explorer and for the rate limit, in seconds.
+        error (str, optional): The error raised while answering, if any.
+    """
+
+    index: int
+    question: str
+    output: Optional[str] = None
+    files: List[str] = []
+    latency: float = 0.0
+    wait: float = 0.0
+    error: Optional[str] = None
+
+
+class BatchReport(BaseModel):
+    """
+    The results of a batch and its throughput and latency statistics.
+    """
+
+    results: List[BatchResult]
+    elapsed: float
+    throughput: float
+    latency_mean: float
+    latency_p50: float
+    latency_p95: float
+    latency_max: float
+    wait_mean: float
+    errors: int
+
+
+def read_questions(filepath: str) -> List[str]:
+    """
+    Reads the questions of a batch from a JSON file with a list of strings or from a text file with one
+    question per line, ignoring blank lines and lines starting with `#`.
+
+    Args:
+        filepath (str): The path to the questions file.
+
+    Returns:
+        List[str]: The questions.
+    """
+    with open(filepath) as file:
+        content = file.read()
+    if filepath.endswith(".json"):
+        return [str(question) for question in json.loads(content)]
+    return [line.strip() for line in content.splitlines() if line.strip() and not line.strip().startswith("#")]
+
+
+def run_batch(
+    filepath: str,
+    questions: List[str],
+    output_dir: str,
+    concurrency: int = 4,
+    rate_limit: float = 0.0,
+    **explorer_kwargs: Any,
+) -> BatchReport:
+    """
+    Answers a list of independent questions about one CSV file and writes the answers to a directory.
+
+    The file is converted, profiled and loaded once, in this process, and answered by a pool of `concurrency`
+    explorers, each answering one question at a time with a fresh memory. Each explorer runs code in its own
+    kernel subprocess, which loads its own copy of the DataFrame, so `concurrency + 1` copies are held in
+    memory; with `CSV_EXPLORER_KERNEL_ENABLED=0`, code runs in this process instead, on copy-on-write views
+    of the one loaded DataFrame, one execution at a time. Every answer is written to its own
+    subdirectory, as `answer.md`, with its tables as CSV files and its figures as PNG or SVG files, and the
+    report is written to `report.json`.
+
+    Args:
+        filepath (str): The path to the CSV file.
+        questions (List[str]): The questions.
+        output_dir (str): The directory where the answers are written.
+        concurrency (int, optional): The number of questions answered at the same time. Defaults to 4.
+        rate_limit (float, optional): The maximum number of questions started per minute. Defaults to 0, no limit.
+        **explorer_kwargs: Additional keyword arguments passed to `CSVExplorer`, such as `model`.
+
+    Returns:
+        BatchReport: The results and the throughput and latency statistics.
+    """
+    return asyncio.run(_run_batch(filepath, questions, output_dir, concurrency, rate_limit, explorer_kwargs))
+
+
+async def _run_batch(
+    filepath: str,
+    questions: List[str],
+    output_dir: str,
+    concurrency: int,
+    rate_limit: float,
+    explorer_kwargs: Dict[str, Any],
+) -> BatchReport:
+    os.makedirs(output_dir, exist_ok=True)
+    convert_to_columnar(filepath)
+    build_profile(filepath)
+    load_dataframe(filepath)
+
+    n_explorers = max(min(concurrency, len(questions)), 1)
+    explorers = await asyncio.gather(
+        *[asyncio.to_thread(CSVExplorer, filepath, **explorer_kwargs) for _ in range(n_explorers)]
+    )
+    pool: asyncio.Queue = asyncio.Queue()
+    for explorer in explorers:
+        pool.put_nowait(explorer)
+
+    limiter = _RateLimiter(rate_limit)
+    start = time.perf_counter()
+    try:
+        results = await asyncio.gather(
+            *[_answer(pool, limiter, index, question, output_dir) for index, question in enumerate(questions)]
+        )
+    finally:
+        for explorer in explorers:
+            explorer.close()
+
+    report = _report(list(results), time.perf_counter() - start)
+    with open(os.path.join(output_dir, "report.json"), "w") as file:
+        file.write(report.model_dump_json(indent=4))
+    return report
+
+
+async def _answer(
+    pool: asyncio.Queue,
+    limiter: "_RateLimiter",
+    index: int,
+    question: str,
+    output_dir: str,
+) -> BatchResult:
+    queued = time.perf_counter()
+    explorer = await pool.get()
+    start = queued
+    try:
+        await limiter.wait()
+        start = time.perf_counter()
+        explorer.clear_memory()
+        logger.info(f"Respondendo a pergunta {index + 1}: {question}")
+        response = await explorer.ainvoke(question)
+        files = _write_answer(os.path.join(output_dir, _answer_dirname(index, question)), question, response)
+        relative = [os.path.relpath(path, output_dir) for path in files]
+        return BatchResult(
+            index=index,
+            question=question,
+            output=response.output,
+            files=relative,
+            latency=time.perf_counter() - start,
+            wait=start - queued,
+        )
+    except Exception as err:
+        logger.error(f"Erro na pergunta {index + 1}: {err}")
+        return BatchResult(
+            index=index, question=question, error=str(err), latency=time.perf_counter() - start, wait=start - queued
+        )
+    finally:
+        pool.put_nowait(explorer)
+
+
+def _write_answer(directory: str, question: str, response: Any) -> List[str]:
+    os.makedirs(directory, exist_ok=True)
+    files, sections = [], [f"# {question}\n"]
+
+    for element in response.elements:
+        if element.type == "dataframe":
+            path = os.path.join(directory, f"table_{len(files) + 1}.csv")
+            element.content.to_csv(path)
+            files.append(path)
+            sections.append(element.content.to_markdown())
+        elif element.type == "image":
+            extension = "svg" if isinstance(element.content, str) else "png"
+            path = os.path.join(directory, f"figure_{len(files) + 1}.{extension}")
+            with open(path, "w" if extension == "svg" else "wb") as file:
+                file.write(element.content)
+            files.append(path)
+            sections.append(f"![{os.path.basename(path)}]({os.path.basename(path)})")
+        else:
+            sections.append(str(element.content))
+
+    path = os.path.join(directory, "answer.md")
+    with open(path, "w") as file:
+        file.write("\n\n".join(sections) + "\n")
+    return [path, *files]
+
+
+def _answer_dirname(index: int, question: str) -> str:
+    slug = re.sub(r"[^\w]+", "_", question.casefold()).strip("_")[:40]
+    return f"{index + 1:03d}_{slug}"
+
+
+def _report(results: List[BatchResult], elapsed: float) -> BatchReport:
+    latencies = sorted(result.latency for result in results) or [0.0]
+    return BatchReport(
+        results=results,
+        elapsed=elapsed,
+        throughput=len(results) / elapsed * 60 if elapsed > 0 else 0.0,
+        latency_mean=statistics.mean(latencies),
+        latency_p50=latencies[len(latencies) // 2],
+        latency_p95=latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)],
+        latency_max=latencies[-1],
+        wait_mean=statistics.mean([result.wait for result in results] or [0.0]),
+        errors=sum(result.error is not None for result in results),
+    )
+
+
+class _RateLimiter:
+    """Spaces the start of the questions so no more than `per_minute` start in any minute."""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60 / per_minute if per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = max(self._next - now, 0.0)
+            self._next = max(self._next, now) + self.interval
+        await asyncio.sleep(delay)
@@ -0,0 +1,187 @@
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+import pandas as pd
+from loguru import logger
+
+from csv_explorer import config
+
+
+class LRUCache:
+    """
+    A thread-safe least-recently-used cache bounded by the total size of its values.
+
+    Entries are evicted, oldest access first, whenever the summed size of the stored
+    values exceeds `max_bytes`. Values bigger than the whole budget are returned to the
+    caller but never stored.
+
+    Args:
+        max_bytes (int): The byte budget shared by all entries.
+        sizeof (Callable[[Any], int], optional): Function used to measure the size of a value.
+            Defaults to `sys.getsizeof`.
+    """
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int] = sys.getsizeof):
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._entries: OrderedDict[Hashable, Tuple[Any, int]] = OrderedDict()
+        self._pending: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.RLock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Retrieves a value and marks it as the most recently used one.
+
+        Args:
+            key (Hashable): The cache key.
+            default (Any, optional): Value returned when the key is not cached. Defaults to None.
+
+        Returns:
+            Any: The cached value, or `default`.
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key: Hashable, value: Any) -> Any:
+        """
+        Stores a value, evicting the least recently used entries until it fits the budget.
+
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The value to be stored.
+
+        Returns:
+            Any: The stored value.
+        """
+        nbytes = self._sizeof(value)
+
+        with self._lock:
+            self.pop(key)
+
+            if nbytes > self.max_bytes:
+                logger.warning(
+                    f"Value of {nbytes} bytes for key {key} exceeds the cache budget of {self.max_bytes} bytes"
+                )
+                return value
+
+            while self._entries and self.nbytes + nbytes > self.max_bytes:
+                evicted_key, (_, evicted_nbytes) = self._entries.popitem(last=False)
+                self.nbytes -= evicted_nbytes
+                self.evictions += 1
+                logger.info(f"Evicting {evicted_key} ({evicted_nbytes} bytes) from cache")
+
+            self._entries[key] = (value, nbytes)
+            self.nbytes += nbytes
+        return value
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        Retrieves a value, building and storing it with `factory` when it is not cached.
+
+        Concurrent calls for the same missing key wait for a single `factory` call instead of
+        building the value several times.
+
+        Args:
+            key (Hashable): The cache key.
+            factory (Callable[[], Any]): Function that builds the value on a cache miss.
+
+        Returns:
+            Any: The cached or newly built value.
+        """
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+            key_lock = self._pending.setdefault(key, threading.Lock())
+
+        try:
+            with key_lock:
+                with self._lock:
+                    if key in self._entries:
+                        self.hits += 1
+                        self._entries.move_to_end(key)
+                        return self._entries[key][0]
+                    self.misses += 1
+                return self.put(key, factory())
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def pop(self, key: Hashable) -> Any:
+        """
+        Removes a key from the cache.
+
+        Args:
+            key (Hashable): The cache key.
+
+        Returns:
+            Any: The removed value, or None if the key was not cached.
+        """
+        with self._lock:
+            if key not in self._entries:
+                return None
+            value, nbytes = self._entries.pop(key)
+            self.nbytes -= nbytes
+            return value
+
+    def clear(self) -> None:
+        """Removes every entry from the cache."""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Reports the usage counters of the cache.
+
+        Returns:
+            Dict[str, int]: Number of entries, used and maximum bytes, hits, misses and evictions.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "nbytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class DataFrameCache(LRUCache):
+    """
+    A `LRUCache` for pandas DataFrames, sized by their deep memory usage.
+
+    Args:
+        max_bytes (int): The byte budget shared by all cached DataFrames.
+    """
+
+    def __init__(self, max_bytes: int):
+        super().__init__(max_bytes, sizeof=_dataframe_nbytes)
+
+
+def _dataframe_nbytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+DATAFRAME_CACHE = DataFrameCache(config.DATAFRAME_CACHE_MAX_BYTES)
@@ -0,0 +1,159 @@
+import queue
+import time
+from typing import Any, Dict, List, Literal, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from pydantic import BaseModel
+
+from csv_explorer.tracing import Span, start_span
+
+
+class TimingCallbackHandler(BaseCallbackHandler):
+    """
+    A callback handler that records how long each LLM call and each tool run of an agent takes.
+
+    The durations are stored in `events`, in the order the runs finish, labeled `llm` for LLM calls
+    and `tool.<name>` for tool runs. The tokens reported by the LLM calls are summed in `prompt_tokens`
+    and `completion_tokens`.
+    """
+
+    def __init__(self):
+        self.events: List[Tuple[str, float]] = []
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._starts: Dict[UUID, Tuple[str, float]] = {}
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, **kwargs: Any) -> None:
+        self._starts[run_id] = ("llm", time.perf_counter())
+
+    def on_chat_model_start(
+        self, serialized: Dict[str, Any], messages: List[Any], *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._starts[run_id] = ("llm", time.perf_counter())
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._count_tokens(response)
+        self._finish(run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any) -> None:
+        self._starts[run_id] = (f"tool.{serialized.get('name', 'unknown')}", time.perf_counter())
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+
+    def totals(self) -> Dict[str, float]:
+        """
+        Sums the recorded durations by label.
+
+        Returns:
+            Dict[str, float]: The total seconds spent on each label.
+        """
+        totals: Dict[str, float] = {}
+        for label, elapsed in self.events:
+            totals[label] = totals.get(label, 0.0) + elapsed
+        return totals
+
+    def _count_tokens(self, response: Any) -> None:
+        prompt_tokens, completion_tokens = _token_usage(response)
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+
+    def _finish(self, run_id: UUID) -> None:
+        if run_id in self._starts:
+            label, start = self._starts.pop(run_id)
+            self.events.append((label, time.perf_counter() - start))
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    A callback handler that traces each LLM call of an agent as an `llm` span, child of the current span
+    when the call starts, with the model, the size of the prompt and the tokens reported by the model.
+    """
+
+    def __init__(self):
+        self._spans: Dict[UUID, Span] = {}
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, sum(len(prompt) for prompt in prompts), kwargs)
+
+    def on_chat_model_start(
+        self, serialized: Dict[str, Any], messages: List[Any], *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        chars = sum(len(str(message.content)) for batch in messages for message in batch)
+        self._start(run_id, chars, kwargs)
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        llm_span = self._spans.pop(run_id, None)
+        if llm_span is not None:
+            prompt_tokens, completion_tokens = _token_usage(response)
+            llm_span.set(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens).end()
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        llm_span = self._spans.pop(run_id, None)
+        if llm_span is not None:
+            llm_span.end(error=error)
+
+    def _start(self, run_id: UUID, chars: int, kwargs: Dict[str, Any]) -> None:
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name") or "unknown"
+        self._spans[run_id] = start_span("llm", model=model, prompt_chars=chars)
+
+
+class StreamEvent(BaseModel):
+    """
+    An event produced while the agent answers a question.
+
+    Attributes:
+        type (str): `token` for a piece of LLM output, `tool_start` and `tool_end` for tool runs and
+            `response` for the final `ChatResponse`.
+        content (Any): The token, the tool input or output, or the response.
+        name (str, optional): The name of the tool, for tool events.
+    """
+
+    type: Literal["token", "tool_start", "tool_end", "response"]
+    content: Any = None
+    name: Optional[str] = None
+
+
+class StreamingCallbackHandler(BaseCallbackHandler):
+    """
+    A callback handler that forwards LLM tokens and tool runs to a queue as `StreamEvent`s.
+
+    Args:
+        events (queue.Queue): The queue the events are put into.
+    """
+
+    def __init__(self, events: queue.Queue):
+        self.events = events
+        self._tools: Dict[UUID, str] = {}
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if token:
+            self.events.put(StreamEvent(type="token", content=token))
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any) -> None:
+        self._tools[run_id] = serialized.get("name", "unknown")
+        self.events.put(StreamEvent(type="tool_start", content=input_str, name=self._tools[run_id]))
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self.events.put(StreamEvent(type="tool_end", content=output, name=self._tools.pop(run_id, None)))
+
+
+def _token_usage(response: Any) -> Tuple[int, int]:
+    usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+    if usage:
+        return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+    prompt_tokens = completion_tokens = 0
+    for generations in getattr(response, "generations", []):
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            prompt_tokens += metadata.get("input_tokens", 0)
+            completion_tokens += metadata.get("output_tokens", 0)
+    return prompt_tokens, completion_tokens
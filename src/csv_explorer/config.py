@@ -0,0 +1,78 @@
+import os
+
+DATAFRAME_CACHE_MAX_BYTES = int(
+    os.environ.get("CSV_EXPLORER_DATAFRAME_CACHE_MAX_BYTES", 4 * 1024**3)
+)
+
+KERNEL_ENABLED = os.environ.get("CSV_EXPLORER_KERNEL_ENABLED", "1") == "1"
+
+KERNEL_TIMEOUT = float(os.environ.get("CSV_EXPLORER_KERNEL_TIMEOUT", 60))
+
+KERNEL_STARTUP_TIMEOUT = float(os.environ.get("CSV_EXPLORER_KERNEL_STARTUP_TIMEOUT", 300))
+
+KERNEL_MEMORY_LIMIT = int(
+    os.environ.get("CSV_EXPLORER_KERNEL_MEMORY_LIMIT", 16 * 1024**3)
+)
+
+COLUMNAR_BLOCK_SIZE = int(os.environ.get("CSV_EXPLORER_COLUMNAR_BLOCK_SIZE", 64 * 1024**2))
+
+STATS_CHUNKSIZE = int(os.environ.get("CSV_EXPLORER_STATS_CHUNKSIZE", 100_000))
+
+STATS_STREAMING_THRESHOLD = int(
+    os.environ.get("CSV_EXPLORER_STATS_STREAMING_THRESHOLD", 256 * 1024**2)
+)
+
+STATS_WORKERS = int(os.environ.get("CSV_EXPLORER_STATS_WORKERS", os.cpu_count() or 1))
+
+INFERENCE_SAMPLE_SIZE = int(os.environ.get("CSV_EXPLORER_INFERENCE_SAMPLE_SIZE", 10_000))
+
+INFERENCE_CACHE_MAX_BYTES = int(os.environ.get("CSV_EXPLORER_INFERENCE_CACHE_MAX_BYTES", 64 * 1024**2))
+
+PROFILE_MAX_TOKENS = int(os.environ.get("CSV_EXPLORER_PROFILE_MAX_TOKENS", 1500))
+
+PROFILE_SAMPLE_ROWS = int(os.environ.get("CSV_EXPLORER_PROFILE_SAMPLE_ROWS", 5))
+
+RESPONSE_CACHE_ENABLED = os.environ.get("CSV_EXPLORER_RESPONSE_CACHE_ENABLED", "1") == "1"
+
+RESPONSE_CACHE_PATH = os.environ.get(
+    "CSV_EXPLORER_RESPONSE_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "csv_explorer", "responses.sqlite"),
+)
+
+RESPONSE_CACHE_TTL = float(os.environ.get("CSV_EXPLORER_RESPONSE_CACHE_TTL", 24 * 60 * 60))
+
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get("CSV_EXPLORER_RESPONSE_CACHE_MAX_BYTES", 512 * 1024**2))
+
+FIGURE_FORMAT = os.environ.get("CSV_EXPLORER_FIGURE_FORMAT", "png")
+
+FIGURE_DPI = float(os.environ.get("CSV_EXPLORER_FIGURE_DPI", 150))
+
+FIGURE_CACHE_MAX_BYTES = int(os.environ.get("CSV_EXPLORER_FIGURE_CACHE_MAX_BYTES", 256 * 1024**2))
+
+PLOT_MAX_POINTS = int(os.environ.get("CSV_EXPLORER_PLOT_MAX_POINTS", 10_000))
+
+PLOT_MAX_BARS = int(os.environ.get("CSV_EXPLORER_PLOT_MAX_BARS", 1_000))
+
+PLOT_PIE_MIN_FRACTION = float(os.environ.get("CSV_EXPLORER_PLOT_PIE_MIN_FRACTION", 1 / 720))
+
+DTYPE_OPTIMIZATION_ENABLED = os.environ.get("CSV_EXPLORER_DTYPE_OPTIMIZATION_ENABLED", "1") == "1"
+
+DTYPE_MIN_INT_BITS = int(os.environ.get("CSV_EXPLORER_DTYPE_MIN_INT_BITS", 64))
+
+DTYPE_FLOAT32_ENABLED = os.environ.get("CSV_EXPLORER_DTYPE_FLOAT32_ENABLED", "0") == "1"
+
+DTYPE_CATEGORY_ENABLED = os.environ.get("CSV_EXPLORER_DTYPE_CATEGORY_ENABLED", "0") == "1"
+
+DTYPE_CATEGORY_MAX_RATIO = float(os.environ.get("CSV_EXPLORER_DTYPE_CATEGORY_MAX_RATIO", 0.5))
+
+DTYPE_CATEGORY_MAX_LEVELS = int(os.environ.get("CSV_EXPLORER_DTYPE_CATEGORY_MAX_LEVELS", 100_000))
+
+UPLOAD_CHUNK_SIZE = int(os.environ.get("CSV_EXPLORER_UPLOAD_CHUNK_SIZE", 8 * 1024**2))
+
+STORE_DIR = os.environ.get("CSV_EXPLORER_STORE_DIR", "/tmp/csv_explorer/store")
+
+STORE_QUOTA_BYTES = int(os.environ.get("CSV_EXPLORER_STORE_QUOTA_BYTES", 20 * 1024**3))
+
+TRACE_EXPORT_PATH = os.environ.get("CSV_EXPLORER_TRACE_EXPORT_PATH", "")
+
+TRACE_HISTORY = int(os.environ.get("CSV_EXPLORER_TRACE_HISTORY", 100))
@@ -1,16 +1,29 @@
 import os
 import ast
+import asyncio
+import contextvars
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from importlib import import_module
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
-import matplotlib.pyplot as plt
 from loguru import logger
 from langchain.memory.buffer_window import ConversationBufferWindowMemory
 from langchain_openai import ChatOpenAI
 from langchain_core.tools import StructuredTool
-from langchain_experimental.agents.agent_toolkits import create_csv_agent
+from langchain_experimental.agents.agent_toolkits import create_pandas_dataframe_agent
 from pydantic import BaseModel
 import csv_explorer
+from csv_explorer import config
+from csv_explorer.cache import DATAFRAME_CACHE
+from csv_explorer.callbacks import StreamEvent, StreamingCallbackHandler, TracingCallbackHandler
+from csv_explorer.kernel import InlineKernel, PythonKernel, new_kernel, use_kernel
+from csv_explorer.loader import copy_on_write, file_fingerprint, load_dataframe
+from csv_explorer.profile import DatasetProfile, load_profile
+from csv_explorer.response_cache import get_response_cache, normalize_question, response_key
+from csv_explorer.timing import timed
 from csv_explorer.parsers.markdown_table import parse_markdown_text
 import traceback
 
@@ -41,6 +54,10 @@ LLM_MODELS = {
     "gpt-4": ChatOpenAI,
 }
 
+LLM_PARAMETERS = {"model", "temperature"}
+
+AGENT_PARAMETERS = {"filepath", "tools", "agent_type"}
+
 
 class ChatResponse(BaseModel):
     output: str
@@ -60,6 +77,8 @@ class CSVExplorer:
         model (str, optional): The AI model to use. Defaults to "gpt-3.5-turbo".
         temperature (float, optional): The temperature parameter for generating AI responses. Defaults to 0.
         memory_k (int, optional): The number of previous conversation turns to consider for context. Defaults to 3.
+        use_profile (bool, optional): Whether to describe the dataset in the prompt, so the agent does not need
+            to call tools to discover its columns. Defaults to True.
     """
 
     tools_filepath: str = TOOLS_FILEPATH
@@ -74,14 +93,21 @@ class CSVExplorer:
         model: str = "gpt-3.5-turbo",
         temperature: float = 0,
         memory_k: int = 3,
+        use_profile: bool = True,
     ):
         self._set_temp_folder()
+        self.timings: Dict[str, float] = {}
         self.filepath = filepath
         self.tools = self._set_tools(extra_tools)
         self.agent_type = self._set_agent_type(agent_type)
         self.model = self._set_model(model)
-        self.temperature = temperature
-        self.memory_k = memory_k
+        self.temperature = float(temperature)
+        self.memory_k = int(memory_k)
+        self.use_profile = bool(use_profile)
+        self.response_cache = get_response_cache()
+        self._active_calls = 0
+        self._deferred_kernels: List[PythonKernel | InlineKernel] = []
+        self._calls_lock = threading.Lock()
         self.reset()
 
     def reset(self) -> "CSVExplorer":
@@ -91,34 +117,259 @@ class CSVExplorer:
         Returns:
             CSVExplorer: The updated CSVExplorer instance.
         """
-        self.llm = self._set_llm()
+        with timed("reset", self.timings):
+            self.llm = self._set_llm()
+            self.memory = self._set_memory()
+            self.profile = self._set_profile()
+            self.agent = self._set_agent()
+            self.close()
+            self.kernel = self._set_kernel()
+        return self
+
+    def clear_memory(self) -> "CSVExplorer":
+        """
+        Forget the conversation, keeping the agent, the kernel and the dataset profile.
+
+        Returns:
+            CSVExplorer: The updated CSVExplorer instance.
+        """
         self.memory = self._set_memory()
-        self.agent = create_csv_agent(
-            self.llm,
-            self.filepath,
-            verbose=True,
-            agent_type=self.agent_type,
-            extra_tools=self.tools,
-            return_intermediate_steps=True,
-            handle_parsing_errors=True,
-        )
         return self
 
+    def close(self) -> None:
+        """
+        Release the resources held by the CSVExplorer instance, terminating its Python kernel.
+
+        When `invoke` or `ainvoke` is running in another thread, as when a session is evicted while it is
+        answering, the kernel is terminated only once the call returns, so the answer is not cut short.
+        """
+        kernel = getattr(self, "kernel", None)
+        if kernel is None:
+            return
+        with self._calls_lock:
+            if self._active_calls:
+                logger.info("Explorador em uso, o kernel será encerrado ao fim da chamada atual")
+                self._deferred_kernels.append(kernel)
+                return
+        kernel.close()
+
+    def memory_usage(self) -> int:
+        """
+        Report the resident memory of the Python kernel, where the DataFrame of the session lives.
+
+        Returns:
+            int: The resident set size of the kernel in bytes, or 0 if it is not running.
+        """
+        if getattr(self, "kernel", None) is None:
+            return 0
+        return self.kernel.memory_usage()
+
     def invoke(self, query: str, callbacks=None) -> ChatResponse:
         """
         Invokes the AI agent with a query and returns the response.
 
+        The time spent building the prompt, running the agent, parsing the answer and formatting the
+        response is recorded in `self.timings`, under `invoke.*` labels. With temperature 0, responses are
+        cached by dataset, model, agent, question and conversation state, so asking the same question again
+        replays the cached response, and its turn in the memory, without running the agent.
+
         Args:
             query (str): The query to send to the AI agent.
 
         Returns:
             str: The response from the AI agent.
         """
+        with self._call():
+            key = self._response_key(query)
+            cached = self._get_cached_response(key, query)
+            if cached is not None:
+                return cached
+
+            with timed("invoke.prompt", self.timings) as prompt_span:
+                prompt = self._set_prompt(query)
+                prompt_span.set(chars=len(prompt))
+            with timed("invoke.agent", self.timings), use_kernel(self.kernel), copy_on_write():
+                callbacks = [TracingCallbackHandler(), *(callbacks or [])]
+                answer = self.agent.invoke({"input": prompt}, {"callbacks": callbacks})
+            return self._build_response(key, query, answer)
+
+    async def ainvoke(self, query: str, callbacks=None) -> ChatResponse:
+        """
+        Asynchronously invokes the AI agent with a query and returns the response.
+
+        LLM calls go through the async client, and the tool calls the agent issues in the same step, as
+        with the `openai-tools` agent, run concurrently, each in a worker thread, so a step takes as long
+        as its slowest tool. Tools that run code in the session kernel still run one at a time there.
+
+        Args:
+            query (str): The query to send to the AI agent.
+
+        Returns:
+            ChatResponse: The response from the AI agent.
+        """
+        with self._call():
+            key = self._response_key(query)
+            cached = self._get_cached_response(key, query)
+            if cached is not None:
+                return cached
+
+            with timed("invoke.prompt", self.timings) as prompt_span:
+                prompt = self._set_prompt(query)
+                prompt_span.set(chars=len(prompt))
+            with timed("invoke.agent", self.timings), use_kernel(self.kernel), copy_on_write():
+                callbacks = [TracingCallbackHandler(), *(callbacks or [])]
+                answer = await self.agent.ainvoke({"input": prompt}, {"callbacks": callbacks})
+            return self._build_response(key, query, answer)
 
-        prompt = self._set_prompt(query)
-        answer = self.agent.invoke({"input": prompt}, {"callbacks": callbacks})
-        response = self._parse_answer(query, answer)
-        return self._format_chat_response(answer, response)
+    @contextmanager
+    def _call(self) -> Iterator[None]:
+        """
+        Counts a running call to the agent, terminating the kernels closed meanwhile once no call is running.
+        """
+        with self._calls_lock:
+            self._active_calls += 1
+        try:
+            yield
+        finally:
+            with self._calls_lock:
+                self._active_calls -= 1
+                deferred = self._deferred_kernels if self._active_calls == 0 else []
+                if deferred:
+                    self._deferred_kernels = []
+            for kernel in deferred:
+                kernel.close()
+
+    def _get_cached_response(self, key: Optional[str], query: str) -> Optional[ChatResponse]:
+        """
+        Replays a cached response, adding its turn to the memory.
+
+        Args:
+            key (str | None): The response cache key, or None if the response must not be cached.
+            query (str): The query sent to the AI agent.
+
+        Returns:
+            ChatResponse | None: The cached response, or None if there is none.
+        """
+        if key is None:
+            return None
+        with timed("invoke.cache", self.timings):
+            cached = self.response_cache.get(key)
+        if cached is None:
+            return None
+
+        logger.info(f"Resposta em cache para: {query}")
+        for message in cached["memory"]:
+            self.memory.chat_memory.add_message(message)
+        return self._format_chat_response(cached["answer"], cached["response"])
+
+    def _build_response(self, key: Optional[str], query: str, answer: Dict[str, Any]) -> ChatResponse:
+        """
+        Parses the answer of the agent into a response, saving the turn to the memory and the response cache.
+
+        Args:
+            key (str | None): The response cache key, or None if the response must not be cached.
+            query (str): The query sent to the AI agent.
+            answer (Dict[str, Any]): The output and intermediate steps of the agent.
+
+        Returns:
+            ChatResponse: The response from the AI agent.
+        """
+        n_messages = len(self.memory.chat_memory.messages)
+        with timed("invoke.parse_answer", self.timings) as parse_span:
+            response = self._parse_answer(query, answer)
+            parse_span.set(steps=len(answer.get("intermediate_steps", [])), elements=len(response))
+
+        if key is not None:
+            self._cache_response(key, answer, response, self.memory.chat_memory.messages[n_messages:])
+        with timed("invoke.format", self.timings):
+            return self._format_chat_response(answer, response)
+
+    def stream(self, query: str, callbacks=None) -> Iterator[StreamEvent]:
+        """
+        Invokes the AI agent with a query, yielding its output tokens and tool runs as they happen.
+
+        The agent runs in a background thread, like `invoke`, and the last event is a `response` event
+        holding the final `ChatResponse`, with the post-processed elements. The time until the first token,
+        or until the response when there are no tokens, is recorded in `self.timings["invoke.ttft"]`.
+
+        Args:
+            query (str): The query to send to the AI agent.
+            callbacks (list, optional): Additional callback handlers. They are called from the background thread.
+
+        Yields:
+            StreamEvent: The `token`, `tool_start`, `tool_end` and `response` events, in order.
+        """
+        events: queue.Queue = queue.Queue()
+        handlers = [StreamingCallbackHandler(events), *(callbacks or [])]
+
+        def _run() -> None:
+            try:
+                events.put(StreamEvent(type="response", content=self.invoke(query, callbacks=handlers)))
+            except Exception as err:
+                events.put(err)
+            finally:
+                events.put(None)
+
+        start = time.perf_counter()
+        thread = threading.Thread(target=contextvars.copy_context().run, args=(_run,), daemon=True)
+        thread.start()
+
+        waiting_first_token = True
+        while (event := events.get()) is not None:
+            if isinstance(event, Exception):
+                raise event
+            if waiting_first_token and event.type in ("token", "response"):
+                waiting_first_token = False
+                self.timings["invoke.ttft"] = time.perf_counter() - start
+                logger.info(f"Primeiro token em {self.timings['invoke.ttft']:.3f}s")
+            yield event
+        thread.join()
+
+    def _response_key(self, query: str) -> Optional[str]:
+        """
+        Builds the response cache key of a query in the current state of the instance.
+
+        Args:
+            query (str): The query to send to the AI agent.
+
+        Returns:
+            str | None: The key, or None if the response must not be cached.
+        """
+        if self.response_cache is None or self.temperature > 0:
+            return None
+        return response_key(
+            dataset=file_fingerprint(self.filepath),
+            model=self.model,
+            temperature=self.temperature,
+            agent_type=self.agent_type,
+            tools=sorted(tool.name for tool in self.tools),
+            use_profile=self.use_profile,
+            figure_format=config.FIGURE_FORMAT,
+            question=normalize_question(query),
+            memory=self.memory.buffer_as_str,
+        )
+
+    def _cache_response(self, key: str, answer: Dict[str, Any], response: list, memory: list) -> None:
+        """
+        Stores a response in the response cache, along with the messages it added to the memory.
+
+        Args:
+            key (str): The response cache key.
+            answer (Dict[str, Any]): The output and intermediate steps of the agent.
+            response (list): The parsed response elements.
+            memory (list): The messages saved to the memory for this turn.
+        """
+        try:
+            self.response_cache.put(
+                key,
+                {
+                    "answer": {"output": answer["output"], "intermediate_steps": answer["intermediate_steps"]},
+                    "response": response,
+                    "memory": list(memory),
+                },
+            )
+        except Exception as err:
+            logger.warning(f"Não foi possível guardar a resposta em cache: {err}")
 
     def _format_chat_response(
         self, answer: Dict[str, Any], response
@@ -157,6 +408,9 @@ class CSVExplorer:
         a CSV file, output formatting preferences, language specifications, and additional guidelines about plot
         generation and markdown syntax.
 
+        When `use_profile` is set, a token-budgeted profile of the dataset, with its schema, null ratios,
+        cardinalities and a few rows, is included, so the agent can answer without exploratory tool calls.
+
         Args:
         query (str): The user's input query that will be appended to the conversation history in the prompt.
 
@@ -171,10 +425,29 @@ class CSVExplorer:
             f"- NÃO exiba figuras em código markdown com a sintaxe `![<alt>](<path>)`.\n"
             "- NÃO use `python_repl_ast` para gerar plots. Se precisar gerar plots, use a tool `plot_generator`. "
             "Quando for pasar o código do matplotlib para a tool, não esqueça de passar a instrucao `plt.show()`\n\n"
+            f"{self._format_profile()}"
             "# Histórico de conversa\n"
             f"{self.memory.buffer_as_str}\n{self.memory.human_prefix}: {query}\n\n"
         )
 
+    def _format_profile(self) -> str:
+        """
+        Formats the dataset profile as a section of the prompt.
+
+        Returns:
+            str: The profile section, or an empty string if the profile is disabled or unavailable.
+        """
+        if not self.use_profile or self.profile is None:
+            return ""
+        profile = self.profile.to_prompt()
+        if not profile:
+            return ""
+        return (
+            "# Perfil dos dados\n"
+            "Use este perfil para responder sobre colunas, tipos e valores sem chamar tools.\n\n"
+            f"{profile}\n\n"
+        )
+
     def _parse_answer(self, query: str, answer: dict) -> list:
         """
         Parse the answer to a query.
@@ -220,7 +493,6 @@ class CSVExplorer:
     def _parse_figures(self, query: str, answer: Dict[str, Any]) -> List[ChatResponse]:
         """
         Parses plotting information from a given answer and updates the context memory.
-        Sets the background color of the current figure to transparent.
 
         Parameters:
         - query (str): The query string that resulted in the answer.
@@ -231,9 +503,6 @@ class CSVExplorer:
         - List[Any]: A list containing the final output string and the figure object.
         """
 
-        fig = plt.gcf()
-        fig.set_facecolor("none")
-
         action, response = answer["intermediate_steps"][-1]
 
         self.memory.save_context(
@@ -323,7 +592,13 @@ class CSVExplorer:
 
     def set(self, **kwargs: dict) -> "CSVExplorer":
         """
-        Set one or more attributes of the CSVExplorer instance.
+        Set one or more attributes of the CSVExplorer instance, rebuilding only what depends on them.
+
+        Changing `filepath`, `tools` or `agent_type` rebuilds the agent executor over the cached DataFrame. Like
+        `extra_tools`, `tools` are added to the tools of `get_tools`.
+        Changing `model` or `temperature` only reconfigures the LLM, changing `memory_k` resizes the existing
+        memory window, and changing `use_profile` only affects the prompt. The conversation history is kept in
+        every case, and the time spent on each path is recorded in `self.timings`.
 
         Args:
             **kwargs: A dictionary of keyword arguments, where the keys are the names of the attributes to be set,
@@ -332,10 +607,59 @@ class CSVExplorer:
         Returns:
             The CSVExplorer instance, after the attributes have been set.
         """
+        changed = set()
         for k, v in kwargs.items():
             if hasattr(self, k):
-                setattr(self, k, v)
-        return self.reset()
+                v = self._parse_parameter(k, v)
+                if getattr(self, k) != v:
+                    setattr(self, k, v)
+                    changed.add(k)
+
+        if changed & AGENT_PARAMETERS:
+            with timed("set.agent", self.timings):
+                self.llm = self._set_llm()
+                self.agent = self._set_agent()
+                if "filepath" in changed:
+                    self.profile = self._set_profile()
+                    self.close()
+                    self.kernel = self._set_kernel()
+        elif changed & LLM_PARAMETERS:
+            with timed("set.llm", self.timings):
+                self._update_llm()
+
+        if "memory_k" in changed:
+            with timed("set.memory", self.timings):
+                self.memory.k = self.memory_k
+
+        if "use_profile" in changed and "filepath" not in changed:
+            self.profile = self._set_profile()
+
+        return self
+
+    def _parse_parameter(self, name: str, value: Any) -> Any:
+        """
+        Validates and converts a parameter received by `set` to the type stored in the instance.
+
+        Args:
+            name (str): The name of the parameter.
+            value (Any): The new value of the parameter.
+
+        Returns:
+            Any: The validated value.
+        """
+        if name == "model":
+            return self._set_model(value)
+        if name == "agent_type":
+            return self._set_agent_type(value)
+        if name == "temperature":
+            return float(value)
+        if name == "memory_k":
+            return int(value)
+        if name == "use_profile":
+            return bool(value)
+        if name == "tools":
+            return self._set_tools(value)
+        return value
 
     def _set_model(self, model: str) -> str:
         """
@@ -363,21 +687,66 @@ class CSVExplorer:
         Set the Large Language Model (LLM) to be used by the CSVExplorer instance.
 
         This method retrieves the LLM model specified by the `self.model` attribute from the `LLM_MODELS` dictionary.
-        It then initializes the LLM model with the `self.model`, `self.temperature`, and `verbose=True` parameters.
+        It then initializes the LLM model with the `self.model`, `self.temperature`, and `verbose=True` parameters,
+        turning token streaming on when the model supports it, so `stream` receives tokens as they are generated.
 
         Returns:
             Any: The initialized LLM model instance.
         """
-        return LLM_MODELS[self.model](
-            model=self.model, temperature=self.temperature, verbose=True
+        llm_class = LLM_MODELS[self.model]
+        kwargs = {"streaming": True} if "streaming" in getattr(llm_class, "__fields__", {}) else {}
+        return llm_class(
+            model=self.model, temperature=self.temperature, verbose=True, **kwargs
         )
 
+    def _update_llm(self) -> None:
+        """
+        Apply the current `model` and `temperature` to the LLM used by the agent.
+
+        When the new model is served by the same LLM class, the existing client is updated in place, so the
+        agent executor, which holds a reference to it, keeps working without being rebuilt. Otherwise a new
+        LLM is created and the agent executor is rebuilt around it.
+        """
+        if isinstance(self.llm, LLM_MODELS[self.model]) and hasattr(self.llm, "model_name"):
+            self.llm.model_name = self.model
+            self.llm.temperature = self.temperature
+            return
+
+        self.llm = self._set_llm()
+        self.agent = self._set_agent()
+
+    def _set_agent(self) -> Any:
+        """
+        Set the agent executor for the CSVExplorer instance.
+
+        This method builds a pandas DataFrame agent around the LLM, using the DataFrame read from `self.filepath`
+        through the process-wide DataFrame cache, so the file is parsed only once. The agent gets a shallow copy
+        of the cached frame, and runs with copy-on-write enabled by `copy_on_write`, so code run outside a kernel
+        that modifies `df` copies the changed columns instead of changing the frame shared with the other explorers.
+
+        Returns:
+            AgentExecutor: The initialized agent executor.
+        """
+        with timed("agent", self.timings):
+            agent = create_pandas_dataframe_agent(
+                self.llm,
+                load_dataframe(self.filepath).copy(deep=False),
+                verbose=True,
+                agent_type=self.agent_type,
+                extra_tools=self.tools,
+                return_intermediate_steps=True,
+                handle_parsing_errors=True,
+            )
+        logger.info(f"DataFrame cache: {DATAFRAME_CACHE.stats()}")
+        return agent
+
     def _set_tools(self, extra_tools: str) -> str:
         """
         Set the additional tools to be used by the CSVExplorer instance.
 
         This method takes an `extra_tools` string and appends it to the result of the `CSVExplorer.get_tools()` method.
-        The resulting string is then returned.
+        Extra tools named like one of those tools are skipped, so the current `tools` can be passed back to `set`.
+        Each tool is given a coroutine by `_with_coroutine`, on a copy, so the given tools are left untouched.
 
         Args:
             extra_tools (str): The additional tools to be added to the CSVExplorer instance.
@@ -385,7 +754,10 @@ class CSVExplorer:
         Returns:
             str: The combined set of tools, including the additional `extra_tools`.
         """
-        return CSVExplorer.get_tools() + extra_tools
+        tools = CSVExplorer.get_tools()
+        names = {tool.name for tool in tools}
+        tools += [tool for tool in extra_tools if tool.name not in names]
+        return [_with_coroutine(tool) for tool in tools]
 
     def _set_agent_type(self, agent_type: str) -> str:
         """
@@ -423,6 +795,31 @@ class CSVExplorer:
         memory.save_context({"input": "Olá!"}, {"output": "Olá!. Como posso ajudar?"})
         return memory
 
+    def _set_profile(self) -> Optional[DatasetProfile]:
+        """
+        Set the profile of the dataset, reading the one computed when the file was uploaded, if any.
+
+        Returns:
+            DatasetProfile | None: The profile, or None if it is disabled or could not be computed.
+        """
+        if not self.use_profile:
+            return None
+        with timed("profile", self.timings):
+            return load_profile(self.filepath)
+
+    def _set_kernel(self) -> PythonKernel | InlineKernel:
+        """
+        Set the Python kernel used by the `plot_generator` and `python_evaluator` tools.
+
+        The kernel subprocess starts loading the DataFrame right away, so it is usually warm by the
+        time the first question arrives, and keeps its namespace for the whole session. With
+        `config.KERNEL_ENABLED` set to False, the code runs in this process instead, on the cached DataFrame.
+
+        Returns:
+            PythonKernel | InlineKernel: The started kernel.
+        """
+        return new_kernel(self.filepath)
+
     @classmethod
     def _set_temp_folder(cls):
         _create_directory_if_not_exists(cls.temp_filepath)
@@ -465,6 +862,27 @@ def _import_function(module_name: str, function_name: str) -> Optional[Any]:
         print(f"Função {function_name} não encontrada no módulo {module_name}.")
 
 
+def _with_coroutine(tool: StructuredTool) -> StructuredTool:
+    """
+    Gives a copy of a synchronous tool a coroutine that runs it in a worker thread, so the async agent can
+    run several tool calls concurrently. The thread inherits the context, including the session kernel.
+
+    Args:
+        tool (StructuredTool): The tool.
+
+    Returns:
+        StructuredTool: A copy of the tool, with a coroutine, or the tool itself if it already has one.
+    """
+    func = getattr(tool, "func", None)
+    if func is None or getattr(tool, "coroutine", None) is not None:
+        return tool
+
+    async def _coroutine(*args, **kwargs):
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    return tool.copy(update={"coroutine": _coroutine})
+
+
 def _has_figure_in_answer(answer: dict) -> bool:
     """
     Checks if the given answer contains any plots generated by a "plot_generator" tool.
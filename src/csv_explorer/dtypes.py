@@ -0,0 +1,307 @@
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from pydantic import BaseModel
+
+from csv_explorer import config
+
+STRING_DTYPE = "string[pyarrow]"
+
+INTEGER_DTYPES = ["int8", "int16", "int32", "int64"]
+
+
+class ColumnMemory(BaseModel):
+    """
+    The memory used by a column before and after its dtype was optimized.
+
+    Attributes:
+        column (str): The name of the column.
+        dtype_before (str): The dtype the column was read with.
+        dtype_after (str): The optimized dtype.
+        bytes_before (int): The memory used with the original dtype.
+        bytes_after (int): The memory used with the optimized dtype.
+    """
+
+    column: str
+    dtype_before: str
+    dtype_after: str
+    bytes_before: int
+    bytes_after: int
+
+
+class MemoryReport(BaseModel):
+    """
+    The memory used by a DataFrame before and after its dtypes were optimized, per column.
+    """
+
+    columns: List[ColumnMemory]
+
+    @property
+    def bytes_before(self) -> int:
+        return sum(column.bytes_before for column in self.columns)
+
+    @property
+    def bytes_after(self) -> int:
+        return sum(column.bytes_after for column in self.columns)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Returns the report as a DataFrame, with one row per column.
+
+        Returns:
+            pd.DataFrame: The columns `column`, `dtype_before`, `dtype_after`, `bytes_before` and `bytes_after`.
+        """
+        return pd.DataFrame([column.model_dump() for column in self.columns])
+
+    def __str__(self) -> str:
+        ratio = self.bytes_after / self.bytes_before if self.bytes_before else 1.0
+        return f"{self.bytes_before / 1024**2:.1f} MiB -> {self.bytes_after / 1024**2:.1f} MiB ({ratio:.0%})"
+
+
+class DtypePlanner:
+    """
+    Chooses compact dtypes for the columns of a table from its chunks.
+
+    Only lossless conversions are made. String columns use Arrow-backed strings. Columns mixing strings
+    with other values keep their dtype.
+
+    Narrower types change the results of the code run on the DataFrame, so they are opt-in. Integer columns
+    are downcast to signed types of at least `config.DTYPE_MIN_INT_BITS` bits, 64 by default, as products
+    and sums of narrower integers overflow silently. With `config.DTYPE_FLOAT32_ENABLED`, float columns whose
+    values all survive the round trip become float32, which computes means, standard deviations and sums at
+    float32 precision. With `config.DTYPE_CATEGORY_ENABLED`, string columns with at most
+    `config.DTYPE_CATEGORY_MAX_RATIO` distinct values per row become `category`, which keeps unused
+    categories in `value_counts` and rejects assigning new values.
+
+    Example:
+        >>> planner = DtypePlanner()
+        >>> for chunk in iter_chunks(filepath):
+        >>>     planner.update(chunk)
+        >>> dtypes = planner.plan()
+    """
+
+    def __init__(
+        self,
+        float32: bool = config.DTYPE_FLOAT32_ENABLED,
+        category: bool = config.DTYPE_CATEGORY_ENABLED,
+    ):
+        self.float32 = float32
+        self.category = category
+        self.n_rows = 0
+        self._dtypes: Dict[str, str] = {}
+        self._minimum: Dict[str, float] = {}
+        self._maximum: Dict[str, float] = {}
+        self._float32: Dict[str, bool] = {}
+        self._strings: Dict[str, bool] = {}
+        self._levels: Dict[str, Optional[set]] = {}
+
+    def update(self, chunk: pd.DataFrame) -> "DtypePlanner":
+        """
+        Adds a chunk of the table.
+
+        Args:
+            chunk (pd.DataFrame): The chunk.
+
+        Returns:
+            DtypePlanner: The planner.
+        """
+        self.n_rows += len(chunk)
+        for name, series in chunk.items():
+            name = str(name)
+            dtype = self._dtypes.setdefault(name, str(series.dtype))
+            if dtype != str(series.dtype):
+                self._dtypes[name] = "mixed"
+            elif pd.api.types.is_integer_dtype(series) and not series.empty:
+                self._minimum[name] = min(self._minimum.get(name, np.inf), series.min())
+                self._maximum[name] = max(self._maximum.get(name, -np.inf), series.max())
+            elif pd.api.types.is_float_dtype(series) and self.float32:
+                values = series.to_numpy(dtype="float64", na_value=np.nan)
+                with np.errstate(over="ignore"):
+                    lossless = np.array_equal(values.astype("float32").astype("float64"), values, equal_nan=True)
+                self._float32[name] = self._float32.get(name, True) and lossless
+            elif series.dtype == object:
+                self._update_strings(name, series)
+        return self
+
+    def plan(self) -> Dict[str, str]:
+        """
+        Returns the dtype chosen for each column whose dtype should change.
+
+        Returns:
+            Dict[str, str]: The optimized dtypes, by column name.
+        """
+        plan = {}
+        for name, dtype in self._dtypes.items():
+            if name in self._minimum:
+                optimized = _integer_dtype(self._minimum[name], self._maximum[name])
+                optimized = optimized.capitalize() if dtype[0].isupper() else optimized
+            elif self._float32.get(name):
+                optimized = "float32"
+            elif self._strings.get(name):
+                levels = self._levels[name]
+                is_categorical = levels is not None and len(levels) <= self.n_rows * config.DTYPE_CATEGORY_MAX_RATIO
+                optimized = "category" if is_categorical else STRING_DTYPE
+            else:
+                continue
+            if optimized != dtype:
+                plan[name] = optimized
+        return plan
+
+    def _update_strings(self, name: str, series: pd.Series) -> None:
+        values = series.dropna()
+        is_string = pd.api.types.infer_dtype(values, skipna=True) in ("string", "empty")
+        self._strings[name] = self._strings.get(name, True) and is_string
+        if not self._strings[name]:
+            self._levels[name] = None
+            return
+
+        levels = self._levels.setdefault(name, set() if self.category else None)
+        if levels is not None:
+            levels.update(values.unique())
+            if len(levels) > config.DTYPE_CATEGORY_MAX_LEVELS:
+                self._levels[name] = None
+
+
+def plan_dtypes(chunks: Iterable[pd.DataFrame]) -> Dict[str, str]:
+    """
+    Chooses compact dtypes for the columns of a table, reading it chunk by chunk.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): The chunks of the table.
+
+    Returns:
+        Dict[str, str]: The optimized dtypes, by column name, for the columns whose dtype should change.
+    """
+    planner = DtypePlanner()
+    for chunk in chunks:
+        planner.update(chunk)
+    return planner.plan()
+
+
+def apply_dtypes(df: pd.DataFrame, dtypes: Dict[str, str]) -> pd.DataFrame:
+    """
+    Converts the columns of a DataFrame to the given dtypes, keeping the dtype of any column that fails.
+
+    Args:
+        df (pd.DataFrame): The DataFrame.
+        dtypes (Dict[str, str]): The dtypes, by column name. Columns not in the DataFrame are ignored.
+
+    Returns:
+        pd.DataFrame: A new DataFrame with the converted columns.
+    """
+    converted = df.copy(deep=False)
+    for name, dtype in dtypes.items():
+        if name not in df.columns or str(df[name].dtype) == dtype:
+            continue
+        try:
+            converted[name] = df[name].astype(dtype)
+        except (TypeError, ValueError) as err:
+            logger.warning(f"Não foi possível converter a coluna {name} para {dtype}: {err}")
+    return converted
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> MemoryReport:
+    """
+    Compares the memory used by each column of a DataFrame before and after its dtypes were optimized.
+
+    Args:
+        before (pd.DataFrame): The DataFrame as read.
+        after (pd.DataFrame): The DataFrame with optimized dtypes.
+
+    Returns:
+        MemoryReport: The memory used by each column.
+    """
+    bytes_before = before.memory_usage(index=False, deep=True)
+    bytes_after = after.memory_usage(index=False, deep=True)
+    return MemoryReport(
+        columns=[
+            ColumnMemory(
+                column=str(name),
+                dtype_before=str(before[name].dtype),
+                dtype_after=str(after[name].dtype),
+                bytes_before=int(bytes_before[name]),
+                bytes_after=int(bytes_after[name]),
+            )
+            for name in before.columns
+        ]
+    )
+
+
+def dtypes_path(csv_filepath: str) -> str:
+    """
+    Returns the path of the dtypes sidecar of a CSV file.
+
+    Args:
+        csv_filepath (str): The path to the CSV file.
+
+    Returns:
+        str: The path of the JSON file with the optimized dtypes, next to the CSV file.
+    """
+    return os.path.splitext(csv_filepath)[0] + ".dtypes.json"
+
+
+def read_dtypes(csv_filepath: str) -> Optional[Dict[str, str]]:
+    """
+    Reads the optimized dtypes of a CSV file from its sidecar, if it is up to date with the file and
+    was planned with the current dtype settings.
+
+    Args:
+        csv_filepath (str): The path to the CSV file.
+
+    Returns:
+        Dict[str, str] | None: The optimized dtypes, by column name, or None if there is no valid sidecar.
+    """
+    try:
+        with open(dtypes_path(csv_filepath)) as file:
+            content = json.load(file)
+        stat = os.stat(csv_filepath)
+    except (OSError, ValueError):
+        return None
+
+    if (content.get("source_size"), content.get("source_mtime_ns")) != (stat.st_size, stat.st_mtime_ns):
+        return None
+    if content.get("settings") != _plan_settings():
+        return None
+    return content["dtypes"]
+
+
+def write_dtypes(csv_filepath: str, dtypes: Dict[str, str]) -> None:
+    """
+    Writes the optimized dtypes of a CSV file to its sidecar, so every reader of the file reuses them.
+
+    Args:
+        csv_filepath (str): The path to the CSV file.
+        dtypes (Dict[str, str]): The optimized dtypes, by column name.
+    """
+    stat = os.stat(csv_filepath)
+    content = {
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "settings": _plan_settings(),
+        "dtypes": dtypes,
+    }
+    try:
+        with open(dtypes_path(csv_filepath), "w") as file:
+            json.dump(content, file, indent=4, ensure_ascii=False)
+    except OSError as err:
+        logger.warning(f"Não foi possível salvar os dtypes de {csv_filepath}: {err}")
+
+
+def _integer_dtype(minimum: float, maximum: float) -> str:
+    for dtype in INTEGER_DTYPES:
+        info = np.iinfo(dtype)
+        if info.bits >= config.DTYPE_MIN_INT_BITS and info.min <= minimum and maximum <= info.max:
+            return dtype
+    return "int64"
+
+
+def _plan_settings() -> Dict[str, Any]:
+    return {
+        "min_int_bits": config.DTYPE_MIN_INT_BITS,
+        "float32": config.DTYPE_FLOAT32_ENABLED,
+        "category": config.DTYPE_CATEGORY_ENABLED,
+    }
@@ -0,0 +1,65 @@
+import hashlib
+import io
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from csv_explorer import config
+from csv_explorer.cache import LRUCache
+
+FIGURE_FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+
+_FIGURE_CACHE = LRUCache(config.FIGURE_CACHE_MAX_BYTES, sizeof=len)
+
+
+def render_figure(figure: Figure, format: str = config.FIGURE_FORMAT, dpi: float = config.FIGURE_DPI) -> bytes:
+    """
+    Renders a Matplotlib figure to image bytes, with a transparent background.
+
+    The figure is drawn with its own Agg canvas, through the object-oriented API, so rendering does not
+    touch the global pyplot state and figures can be rendered from several threads at once.
+
+    Args:
+        figure (Figure): The figure to be rendered.
+        format (str, optional): The image format, 'png' or 'svg'. Defaults to `config.FIGURE_FORMAT`.
+        dpi (float, optional): The resolution of PNG images. Defaults to `config.FIGURE_DPI`.
+
+    Returns:
+        bytes: The image.
+    """
+    if format not in FIGURE_FORMATS:
+        raise ValueError(f"Formato de figura não suportado: {format}. Use um de {list(FIGURE_FORMATS)}.")
+    if not isinstance(figure.canvas, FigureCanvasAgg):
+        FigureCanvasAgg(figure)
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format=format, dpi=dpi, bbox_inches="tight", transparent=True)
+    return buffer.getvalue()
+
+
+def figure_digest(image: bytes) -> str:
+    """
+    Computes the content hash of a rendered figure.
+
+    Args:
+        image (bytes): The image.
+
+    Returns:
+        str: The SHA-256 hex digest of the image.
+    """
+    return hashlib.sha256(image).hexdigest()
+
+
+def intern_figure(image: bytes) -> bytes:
+    """
+    Stores a rendered figure in the figure cache, keyed by its content hash.
+
+    Identical figures, such as an answer served from the response cache to several sessions, share
+    the copy of their bytes kept in the cache, which is bounded by `config.FIGURE_CACHE_MAX_BYTES`.
+
+    Args:
+        image (bytes): The image.
+
+    Returns:
+        bytes: The cached copy of the image.
+    """
+    return _FIGURE_CACHE.get_or_set(figure_digest(image), lambda: image)
@@ -0,0 +1,288 @@
+import re
+import warnings
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from csv_explorer import config
+from csv_explorer.cache import LRUCache
+from csv_explorer.loader import file_fingerprint, is_loaded, load_dataframe
+from csv_explorer.parallel import map_partitions
+from csv_explorer.timing import timed
+
+MAX_CATEGORICAL_LEVELS = 20
+
+TYPE_MATCH_THRESHOLD = 0.95
+
+BOOLEAN_VALUES = {
+    "true": True, "false": False, "t": True, "f": False,
+    "yes": True, "no": False, "y": True, "n": False,
+    "sim": True, "não": False, "nao": False, "s": True,
+    "verdadeiro": True, "falso": False,
+}
+
+NUMERIC_DECORATIONS = re.compile(r"^\s*(?:R\$|US\$|\$|€|£)\s*|\s*%\s*$")
+
+DATETIME_CANDIDATE = re.compile(r"\d{1,4}[-/.:]\d{1,2}")
+
+_INFERENCE_CACHE = LRUCache(max_bytes=config.INFERENCE_CACHE_MAX_BYTES)
+
+
+class RowReservoir:
+    """
+    Mergeable uniform sample of rows drawn from a stream of DataFrame chunks.
+
+    Each row gets a random key and the `size` rows with the smallest keys are kept, which is a uniform sample
+    without replacement of everything seen so far, whatever the order and the partitioning of the stream.
+    Only the rows of a chunk whose keys can enter the sample are copied out of it.
+
+    Args:
+        size (int): The number of rows to be kept.
+        seed (int, optional): The random seed. Defaults to None.
+    """
+
+    def __init__(self, size: int, seed: Optional[int] = None):
+        self.size = size
+        self.rows: Optional[pd.DataFrame] = None
+        self.keys = np.empty(0)
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, chunk: pd.DataFrame) -> "RowReservoir":
+        """
+        Offers the rows of a chunk to the sample.
+
+        Args:
+            chunk (pd.DataFrame): The chunk of rows.
+
+        Returns:
+            RowReservoir: The updated instance.
+        """
+        keys = self._rng.random(len(chunk))
+        candidates = np.argpartition(keys, self.size)[: self.size] if len(keys) > self.size else np.arange(len(keys))
+        if self.rows is not None and len(self.rows) >= self.size:
+            candidates = candidates[keys[candidates] < self.keys.max()]
+        candidates = np.sort(candidates)
+        return self._combine(chunk.iloc[candidates].reset_index(drop=True), keys[candidates])
+
+    def merge(self, other: "RowReservoir") -> "RowReservoir":
+        """
+        Merges the sample of another part of the stream.
+
+        Args:
+            other (RowReservoir): The sample to be merged.
+
+        Returns:
+            RowReservoir: The updated instance.
+        """
+        if other.rows is None:
+            return self
+        return self._combine(other.rows, other.keys)
+
+    def _combine(self, rows: pd.DataFrame, keys: np.ndarray) -> "RowReservoir":
+        if self.rows is not None:
+            rows = pd.concat([self.rows, rows], ignore_index=True)
+            keys = np.concatenate([self.keys, keys])
+        if len(rows) > self.size:
+            selected = np.argpartition(keys, self.size)[: self.size]
+            rows, keys = rows.iloc[selected].reset_index(drop=True), keys[selected]
+        self.rows, self.keys = rows, keys
+        return self
+
+
+class FileSample:
+    """
+    Mergeable single-pass summary of a file used to infer the types of its columns.
+
+    It keeps the number of rows and of nulls of each column, a uniform sample of rows from the whole file
+    and, up to `MAX_CATEGORICAL_LEVELS`, the distinct values of each column, so rare categories appearing
+    anywhere in the file are taken into account.
+
+    Args:
+        sample_size (int, optional): The number of rows in the sample.
+    """
+
+    def __init__(self, sample_size: int = config.INFERENCE_SAMPLE_SIZE):
+        self.n_rows = 0
+        self.null_counts: Dict[str, int] = {}
+        self.levels: Dict[str, Optional[set]] = {}
+        self.reservoir = RowReservoir(sample_size)
+
+    def update(self, chunk: pd.DataFrame) -> "FileSample":
+        """
+        Adds a chunk of rows.
+
+        Args:
+            chunk (pd.DataFrame): The chunk of rows.
+
+        Returns:
+            FileSample: The updated instance.
+        """
+        self.n_rows += len(chunk)
+        for name in chunk.columns:
+            values = chunk[name].dropna()
+            self.null_counts[name] = self.null_counts.get(name, 0) + len(chunk) - len(values)
+            levels = self.levels.setdefault(name, set())
+            if levels is not None:
+                levels.update(values.unique())
+                self.levels[name] = levels if len(levels) <= MAX_CATEGORICAL_LEVELS else None
+        self.reservoir.update(chunk)
+        return self
+
+    def merge(self, other: "FileSample") -> "FileSample":
+        """
+        Merges the summary of another part of the same file.
+
+        Args:
+            other (FileSample): The summary to be merged.
+
+        Returns:
+            FileSample: The updated instance.
+        """
+        self.n_rows += other.n_rows
+        for name, null_count in other.null_counts.items():
+            self.null_counts[name] = self.null_counts.get(name, 0) + null_count
+        for name, other_levels in other.levels.items():
+            levels = self.levels.get(name, set())
+            if levels is None or other_levels is None:
+                self.levels[name] = None
+            else:
+                levels = levels | other_levels
+                self.levels[name] = levels if len(levels) <= MAX_CATEGORICAL_LEVELS else None
+        self.reservoir.merge(other.reservoir)
+        return self
+
+    def infer(self) -> pd.DataFrame:
+        """
+        Infers the type of each column.
+
+        Returns:
+            pd.DataFrame: A table with, for each `column`, its inferred `type`, the `confidence` of the inference,
+                which is the share of sampled values matching the type, its `null_ratio` and `details`, such as
+                the number separators or the date format.
+        """
+        sample = self.reservoir.rows if self.reservoir.rows is not None else pd.DataFrame()
+        records = []
+        for name in self.null_counts:
+            values = sample[name].dropna().astype(str).str.strip() if name in sample else pd.Series(dtype=str)
+            values = values[values != ""]
+            column_type, confidence, details = _infer_type(values, self.levels.get(name))
+            null_ratio = round(self.null_counts[name] / max(self.n_rows, 1), 3)
+            records.append((name, column_type, round(confidence, 3), null_ratio, details))
+        return pd.DataFrame(records, columns=["column", "type", "confidence", "null_ratio", "details"])
+
+
+def sample_chunks(chunks: Iterable[pd.DataFrame], sample_size: int = config.INFERENCE_SAMPLE_SIZE) -> FileSample:
+    """
+    Builds the `FileSample` of a stream of DataFrame chunks.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): The chunks, all with the same columns.
+        sample_size (int, optional): The number of rows in the sample.
+
+    Returns:
+        FileSample: The summary of the chunks.
+    """
+    file_sample = FileSample(sample_size)
+    for chunk in chunks:
+        file_sample.update(chunk)
+    return file_sample
+
+
+def infer_column_types(
+    filepath: str,
+    columns: Optional[List[str]] = None,
+    workers: int = config.STATS_WORKERS,
+) -> pd.DataFrame:
+    """
+    Infers the type of each column of a CSV file from a uniform sample of its rows.
+
+    The file is read once, in parallel partitions, and the result is cached per file fingerprint, so later
+    calls, for any subset of the columns, are free. When the DataFrame of the file is already loaded, it is
+    sampled instead of the file. Detected types are 'Numeric' (including numbers with thousands separators,
+    decimal commas, currency symbols or percent signs), 'Boolean', 'Datetime', 'Categorical', 'Text' and 'Other'.
+
+    Args:
+        filepath (str): The path to the CSV file.
+        columns (List[str], optional): The columns to be reported. Defaults to all columns.
+        workers (int, optional): The number of worker processes.
+
+    Returns:
+        pd.DataFrame: A table with, for each `column`, its inferred `type`, `confidence`, `null_ratio` and `details`.
+    """
+
+    def _infer() -> pd.DataFrame:
+        with timed("infer_column_types"):
+            if is_loaded(filepath):
+                return sample_chunks([load_dataframe(filepath)]).infer()
+            parts = map_partitions(filepath, sample_chunks, workers=workers, read_kwargs={"dtype": str})
+            merged = parts[0]
+            for part in parts[1:]:
+                merged.merge(part)
+            return merged.infer()
+
+    types = _INFERENCE_CACHE.get_or_set(file_fingerprint(filepath), _infer)
+    if columns is not None:
+        types = types.set_index("column").loc[list(columns)].reset_index()
+    return types
+
+
+def _infer_type(values: pd.Series, levels: Optional[set]) -> Tuple[str, float, str]:
+    if len(values) == 0:
+        return "Other", 0.0, "sem valores"
+
+    ratio = _boolean_ratio(values)
+    if ratio >= TYPE_MATCH_THRESHOLD and values.str.lower().nunique() <= 2 and not values.str.isdigit().all():
+        return "Boolean", ratio, ""
+
+    ratio, separators = _numeric_ratio(values)
+    if ratio >= TYPE_MATCH_THRESHOLD:
+        return "Numeric", ratio, separators
+
+    datetime_ratio, date_format = _datetime_ratio(values)
+    if datetime_ratio >= TYPE_MATCH_THRESHOLD:
+        return "Datetime", datetime_ratio, date_format
+
+    if levels is not None:
+        return "Categorical", 1.0, f"{len(levels)} níveis"
+
+    return "Text", 1.0 - max(ratio, datetime_ratio), ""
+
+
+def _boolean_ratio(values: pd.Series) -> float:
+    return float(values.str.lower().isin(BOOLEAN_VALUES).mean())
+
+
+def _numeric_ratio(values: pd.Series) -> Tuple[float, str]:
+    """Tries the usual number formats and returns the share of values parsed by the best one."""
+    stripped = values.str.replace(NUMERIC_DECORATIONS, "", regex=True).str.replace(" ", "", regex=False)
+    candidates = {
+        "decimal '.'": stripped,
+        "decimal ',' e milhar '.'": stripped.str.replace(".", "", regex=False).str.replace(",", ".", regex=False),
+        "decimal '.' e milhar ','": stripped.str.replace(",", "", regex=False),
+    }
+    best_ratio, best_format = 0.0, ""
+    for number_format, candidate in candidates.items():
+        ratio = float(pd.to_numeric(candidate, errors="coerce").notna().mean())
+        if ratio > best_ratio:
+            best_ratio, best_format = ratio, number_format
+    return best_ratio, best_format
+
+
+def _datetime_ratio(values: pd.Series) -> Tuple[float, str]:
+    """Tries ISO 8601, month-first and day-first dates and returns the share of values parsed by the best one."""
+    if not values.str.contains(DATETIME_CANDIDATE).mean() >= TYPE_MATCH_THRESHOLD:
+        return 0.0, ""
+
+    best_ratio, best_format = 0.0, ""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for date_format, kwargs in {
+            "ISO 8601": {"format": "ISO8601"},
+            "mês primeiro": {"format": "mixed", "dayfirst": False},
+            "dia primeiro": {"format": "mixed", "dayfirst": True},
+        }.items():
+            ratio = float(pd.to_datetime(values, errors="coerce", **kwargs).notna().mean())
+            if ratio > best_ratio:
+                best_ratio, best_format = ratio, date_format
+    return best_ratio, best_format
@@ -0,0 +1,263 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, BinaryIO, Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from loguru import logger
+from pydantic import BaseModel
+
+from csv_explorer import config
+from csv_explorer.timing import timed
+
+
+class UploadInfo(BaseModel):
+    """
+    A file written by `UploadWriter`.
+
+    Attributes:
+        path (str): The path of the file.
+        sha256 (str): The SHA-256 hex digest of its content.
+        size (int): Its size in bytes.
+    """
+
+    path: str
+    sha256: str
+    size: int
+
+
+class UploadWriter:
+    """
+    Writes an upload to a temporary file chunk by chunk, hashing it in the same pass.
+
+    Chunks are written as they arrive, so the upload is never held in memory as a whole. If the block
+    exits with an error, the file is removed.
+
+    Args:
+        directory (str, optional): The directory of the file. Defaults to the system temporary directory.
+        suffix (str, optional): The suffix of the file name. Defaults to '.csv'.
+        max_bytes (int, optional): The maximum size of the upload. Zero disables the limit.
+
+    Example:
+        >>> with UploadWriter() as writer:
+        >>>     for chunk in chunks:
+        >>>         writer.write(chunk)
+        >>> info = writer.info
+    """
+
+    def __init__(self, directory: Optional[str] = None, suffix: str = ".csv", max_bytes: int = 0):
+        self.directory = directory or tempfile.gettempdir()
+        self.suffix = suffix
+        self.max_bytes = max_bytes
+        self.info: Optional[UploadInfo] = None
+        self._digest = hashlib.sha256()
+        self._size = 0
+        self._file = None
+
+    def __enter__(self) -> "UploadWriter":
+        os.makedirs(self.directory, exist_ok=True)
+        self._file = tempfile.NamedTemporaryFile(dir=self.directory, suffix=self.suffix, delete=False)
+        return self
+
+    def write(self, chunk: bytes | memoryview) -> None:
+        """
+        Appends a chunk to the file.
+
+        Args:
+            chunk (bytes | memoryview): The chunk.
+
+        Raises:
+            ValueError: If the upload grows beyond `max_bytes`.
+        """
+        self._size += len(chunk)
+        if self.max_bytes and self._size > self.max_bytes:
+            raise ValueError(f"O arquivo excede o limite de {self.max_bytes} bytes.")
+        self._digest.update(chunk)
+        self._file.write(chunk)
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._file.close()
+        if exc_type is not None:
+            _remove(self._file.name)
+            return
+        self.info = UploadInfo(path=self._file.name, sha256=self._digest.hexdigest(), size=self._size)
+
+
+def write_upload(
+    source: BinaryIO,
+    directory: Optional[str] = None,
+    suffix: str = ".csv",
+    chunk_size: int = config.UPLOAD_CHUNK_SIZE,
+) -> UploadInfo:
+    """
+    Writes an uploaded file to disk in chunks, computing its SHA-256 digest in the same pass.
+
+    In-memory uploads, such as Streamlit's `UploadedFile`, are written from views of their buffer, without
+    copying it; other files are read into a reusable buffer of `chunk_size` bytes.
+
+    Args:
+        source (BinaryIO): The uploaded file.
+        directory (str, optional): The directory of the file. Defaults to the system temporary directory.
+        suffix (str, optional): The suffix of the file name. Defaults to '.csv'.
+        chunk_size (int, optional): The size of the chunks written.
+
+    Returns:
+        UploadInfo: The path, the digest and the size of the written file.
+    """
+    with timed("write_upload"), UploadWriter(directory, suffix) as writer:
+        if hasattr(source, "getbuffer"):
+            with source.getbuffer() as view:
+                for start in range(0, len(view), chunk_size):
+                    writer.write(view[start : start + chunk_size])
+        else:
+            source.seek(0)
+            buffer = memoryview(bytearray(chunk_size))
+            while n_bytes := source.readinto(buffer):
+                writer.write(buffer[:n_bytes])
+    return writer.info
+
+
+def columnar_path(csv_filepath: str) -> str:
+    """
+    Returns the path of the Parquet copy of a CSV file.
+
+    Args:
+        csv_filepath (str): The path to the CSV file.
+
+    Returns:
+        str: The path of the Parquet file, next to the CSV file.
+    """
+    return os.path.splitext(csv_filepath)[0] + ".parquet"
+
+
+def schema_path(csv_filepath: str) -> str:
+    """
+    Returns the path of the schema sidecar of a CSV file.
+
+    Args:
+        csv_filepath (str): The path to the CSV file.
+
+    Returns:
+        str: The path of the JSON schema file, next to the CSV file.
+    """
+    return os.path.splitext(csv_filepath)[0] + ".schema.json"
+
+
+def convert_to_columnar(csv_filepath: str) -> Optional[str]:
+    """
+    Converts a CSV file, once, into a Parquet file with inferred types plus a JSON schema sidecar.
+
+    The CSV is streamed block by block, so memory stays bounded by the block size. When a later block
+    contradicts the types inferred from the first one, the file is read again as a whole, letting Arrow
+    infer the types from all of it.
+
+    Args:
+        csv_filepath (str): The path to the CSV file.
+
+    Returns:
+        str | None: The path of the Parquet file, or None if the conversion failed.
+    """
+    if read_schema(csv_filepath) is not None:
+        return columnar_path(csv_filepath)
+
+    output_path = columnar_path(csv_filepath)
+    try:
+        with timed("convert_to_columnar"):
+            try:
+                num_rows = _stream_to_parquet(csv_filepath, output_path)
+            except pa.ArrowInvalid as err:
+                logger.warning(f"Tipos inconsistentes entre blocos de {csv_filepath}, relendo o arquivo inteiro: {err}")
+                table = pa_csv.read_csv(csv_filepath)
+                pq.write_table(table, output_path)
+                num_rows = table.num_rows
+    except Exception as err:
+        logger.warning(f"Não foi possível converter {csv_filepath} para Parquet: {err}")
+        _remove(output_path)
+        return None
+
+    _write_schema(csv_filepath, output_path, num_rows)
+    return output_path
+
+
+def read_schema(csv_filepath: str) -> Optional[Dict[str, Any]]:
+    """
+    Reads the schema sidecar of a CSV file, if its columnar copy is up to date.
+
+    Args:
+        csv_filepath (str): The path to the CSV file.
+
+    Returns:
+        Dict[str, Any] | None: The schema, with the number of rows and the name and types of each column,
+            or None if there is no valid columnar copy of the file.
+    """
+    try:
+        with open(schema_path(csv_filepath)) as file:
+            schema = json.load(file)
+        stat = os.stat(csv_filepath)
+    except (OSError, ValueError):
+        return None
+
+    is_current = (schema.get("source_size"), schema.get("source_mtime_ns")) == (stat.st_size, stat.st_mtime_ns)
+    if not is_current or not os.path.exists(columnar_path(csv_filepath)):
+        return None
+    return schema
+
+
+def read_columnar(csv_filepath: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Reads the columnar copy of a CSV file, memory-mapping it and decoding only the requested columns.
+
+    Args:
+        csv_filepath (str): The path to the CSV file.
+        columns (List[str], optional): The columns to be read. Defaults to all columns.
+
+    Returns:
+        pd.DataFrame: The DataFrame with the requested columns.
+    """
+    table = pq.read_table(columnar_path(csv_filepath), columns=columns, memory_map=True)
+    return table.to_pandas()
+
+
+def _stream_to_parquet(csv_filepath: str, output_path: str) -> int:
+    read_options = pa_csv.ReadOptions(block_size=config.COLUMNAR_BLOCK_SIZE)
+    reader = pa_csv.open_csv(csv_filepath, read_options=read_options)
+
+    num_rows = 0
+    with pq.ParquetWriter(output_path, reader.schema) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+            num_rows += batch.num_rows
+    return num_rows
+
+
+def _write_schema(csv_filepath: str, output_path: str, num_rows: int) -> None:
+    arrow_schema = pq.read_schema(output_path)
+    stat = os.stat(csv_filepath)
+    schema = {
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "num_rows": num_rows,
+        "columns": [
+            {
+                "name": field.name,
+                "arrow_type": str(field.type),
+                "pandas_dtype": _pandas_dtype(field),
+            }
+            for field in arrow_schema
+        ],
+    }
+    with open(schema_path(csv_filepath), "w") as file:
+        json.dump(schema, file, indent=4, ensure_ascii=False)
+
+
+def _pandas_dtype(field: pa.Field) -> str:
+    return str(pa.schema([field]).empty_table().to_pandas().dtypes.iloc[0])
+
+
+def _remove(filepath: str) -> None:
+    if os.path.exists(filepath):
+        os.remove(filepath)
@@ -0,0 +1,409 @@
+import io
+import multiprocessing
+import os
+import resource
+import threading
+import traceback
+import weakref
+from contextlib import contextmanager, redirect_stdout
+from contextvars import ContextVar
+from typing import Any, Dict, Generator, List, Optional, Set
+
+from loguru import logger
+from matplotlib.figure import Figure
+from pydantic import BaseModel
+
+from csv_explorer import config
+from csv_explorer.figures import render_figure
+from csv_explorer.plot_data import PlotReduction, install_plot_hooks, reduce_figure
+
+KERNEL_PRELUDE = """
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import seaborn as sns
+import pandas as pd
+import numpy as np
+from cycler import cycler
+"""
+
+_CURRENT_KERNEL: ContextVar[Optional["PythonKernel"]] = ContextVar("current_kernel", default=None)
+
+_INLINE_LOCK = threading.Lock()
+
+
+class KernelResult(BaseModel):
+    """
+    The result of running a piece of code in a `PythonKernel`.
+
+    Attributes:
+        output (str): Everything the code printed to the standard output.
+        error (str, optional): The representation of the exception raised by the code, if any.
+        figure (bytes, optional): The current Matplotlib figure rendered as a `config.FIGURE_FORMAT` image,
+            when requested and available.
+        reductions (List[PlotReduction]): How the data of the figure was reduced before rendering it.
+    """
+
+    output: str = ""
+    error: str | None = None
+    figure: bytes | None = None
+    reductions: List[PlotReduction] = []
+
+
+class PythonKernel:
+    """
+    A long-lived Python interpreter, running in a subprocess, that keeps its namespace between calls.
+
+    The kernel starts with Matplotlib, seaborn, pandas and NumPy already imported and the DataFrame of
+    `filepath` loaded as `df`. Inside the kernel, `pd.read_csv(filepath)` returns a copy-on-write view of
+    that same DataFrame, so code written by the agent does not parse the file again. Each call is bound
+    by a timeout, after which the kernel is restarted, and the subprocess address space is bound by a
+    memory limit.
+
+    Each kernel loads its own copy of the DataFrame, so the memory used grows with the number of open
+    sessions times the size of the dataset, and starting a kernel costs a full read of the columnar copy.
+    Set `config.KERNEL_ENABLED` to False to run the code in the current process with `InlineKernel`,
+    sharing the cached DataFrame, when that memory matters more than isolating the code of the agent.
+
+    Args:
+        filepath (str): The path to the CSV file loaded as `df`.
+        timeout (float, optional): Maximum number of seconds a single call may take.
+        memory_limit (int, optional): Maximum address space of the subprocess, in bytes. Zero disables
+            the limit.
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        timeout: float = config.KERNEL_TIMEOUT,
+        memory_limit: int = config.KERNEL_MEMORY_LIMIT,
+    ):
+        self.filepath = filepath
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self._lock = threading.Lock()
+        self._process = None
+        self._connection = None
+        self._ready = False
+        self._finalizer = None
+
+    def start(self) -> "PythonKernel":
+        """
+        Starts the kernel subprocess without waiting for it to finish loading the data.
+
+        Returns:
+            PythonKernel: The kernel instance.
+        """
+        context = multiprocessing.get_context("spawn")
+        connection, child_connection = context.Pipe()
+        process = context.Process(
+            target=_serve,
+            args=(child_connection, self.filepath, self.memory_limit),
+            daemon=True,
+        )
+        process.start()
+        child_connection.close()
+
+        self._process = process
+        self._connection = connection
+        self._ready = False
+        self._finalizer = weakref.finalize(self, _terminate, process, connection)
+        logger.info(f"Kernel iniciado para {self.filepath} (pid {process.pid})")
+        return self
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def memory_usage(self) -> int:
+        """
+        Reports the resident memory of the kernel subprocess.
+
+        Returns:
+            int: The resident set size in bytes, or 0 if the kernel is not running or it cannot be read.
+        """
+        if not self.is_alive():
+            return 0
+        try:
+            with open(f"/proc/{self._process.pid}/statm") as file:
+                return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            return 0
+
+    def run(self, code: str, capture_figure: bool = False) -> KernelResult:
+        """
+        Runs a piece of code in the kernel namespace.
+
+        Args:
+            code (str): The Python code to be executed.
+            capture_figure (bool, optional): Whether the current Matplotlib figure should be returned.
+                Defaults to False.
+
+        Returns:
+            KernelResult: The printed output, the raised error and the figure produced by the code.
+        """
+        with self._lock:
+            if not self.is_alive():
+                self.start()
+
+            if not self._ready:
+                error = self._wait_ready()
+                if error:
+                    return KernelResult(error=error)
+
+            self._connection.send((code, capture_figure))
+
+            if not self._connection.poll(self.timeout):
+                self.close()
+                return KernelResult(
+                    error=f"TimeoutError('A execução excedeu {self.timeout}s. O kernel foi reiniciado.')"
+                )
+
+            try:
+                return self._connection.recv()
+            except (EOFError, OSError):
+                self.close()
+                return KernelResult(error="RuntimeError('O kernel foi encerrado durante a execução.')")
+
+    def close(self) -> None:
+        """Terminates the kernel subprocess, discarding its namespace."""
+        if self._finalizer is not None:
+            self._finalizer()
+        self._process = None
+        self._connection = None
+        self._ready = False
+
+    def _wait_ready(self) -> Optional[str]:
+        """
+        Waits for the subprocess to finish loading the data.
+
+        Returns:
+            str | None: The representation of the startup error, if the kernel failed to start.
+        """
+        try:
+            if not self._connection.poll(config.KERNEL_STARTUP_TIMEOUT):
+                raise TimeoutError(f"O kernel não iniciou em {config.KERNEL_STARTUP_TIMEOUT}s.")
+            message = self._connection.recv()
+            if message != "ready":
+                raise RuntimeError(message)
+        except Exception as err:
+            self.close()
+            return repr(err)
+
+        self._ready = True
+        return None
+
+
+class InlineKernel:
+    """
+    Runs code in the current process, with the interface of `PythonKernel`, for when kernels are disabled.
+
+    The namespace is prepared like the one of `PythonKernel`, but `df` is a shallow copy of the DataFrame in
+    the process-wide cache, and code runs with copy-on-write enabled by `copy_on_write`, so no session holds
+    a copy of the dataset. The code runs without a timeout or a memory limit, and one call at a time in the
+    whole process, since pyplot is not thread-safe.
+
+    Args:
+        filepath (str): The path to the CSV file loaded as `df`.
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self._namespace: Optional[Dict[str, Any]] = None
+
+    def start(self) -> "InlineKernel":
+        return self
+
+    def is_alive(self) -> bool:
+        return True
+
+    def memory_usage(self) -> int:
+        return 0
+
+    def run(self, code: str, capture_figure: bool = False) -> KernelResult:
+        """
+        Runs a piece of code in the namespace of the kernel.
+
+        Args:
+            code (str): The Python code to be executed.
+            capture_figure (bool, optional): Whether the current Matplotlib figure should be returned.
+                Defaults to False.
+
+        Returns:
+            KernelResult: The printed output, the raised error and the figure produced by the code.
+        """
+        from csv_explorer.loader import copy_on_write
+
+        with _INLINE_LOCK, copy_on_write():
+            if self._namespace is None:
+                self._namespace = _inline_namespace(self.filepath)
+            return _execute(code, self._namespace, capture_figure)
+
+    def close(self) -> None:
+        """Discards the namespace of the kernel."""
+        self._namespace = None
+
+
+def new_kernel(filepath: str) -> "PythonKernel | InlineKernel":
+    """
+    Starts a kernel for `filepath`: a `PythonKernel`, or an `InlineKernel` if `config.KERNEL_ENABLED` is False.
+
+    Args:
+        filepath (str): The path to the CSV file loaded as `df`.
+
+    Returns:
+        PythonKernel | InlineKernel: The started kernel.
+    """
+    if config.KERNEL_ENABLED:
+        return PythonKernel(filepath).start()
+    return InlineKernel(filepath)
+
+
+@contextmanager
+def use_kernel(kernel: PythonKernel) -> Generator[PythonKernel, None, None]:
+    """
+    Makes `kernel` the one used by the tools called inside the `with` block.
+
+    Args:
+        kernel (PythonKernel): The kernel of the current session.
+    """
+    token = _CURRENT_KERNEL.set(kernel)
+    try:
+        yield kernel
+    finally:
+        _CURRENT_KERNEL.reset(token)
+
+
+@contextmanager
+def kernel_session(filepath: str) -> Generator[PythonKernel, None, None]:
+    """
+    Provides a kernel for `filepath`.
+
+    The kernel of the current session is used when it was loaded with the same file. Otherwise, a
+    temporary kernel is started and closed when the `with` block exits.
+
+    Args:
+        filepath (str): The path to the CSV file the code will analyse.
+    """
+    kernel = _CURRENT_KERNEL.get()
+    if kernel is not None and kernel.filepath == filepath:
+        yield kernel
+        return
+
+    kernel = new_kernel(filepath)
+    try:
+        yield kernel
+    finally:
+        kernel.close()
+
+
+def _terminate(process, connection) -> None:
+    try:
+        connection.send(None)
+    except Exception:
+        pass
+    process.join(timeout=1)
+    if process.is_alive():
+        process.kill()
+        process.join()
+    connection.close()
+
+
+def _serve(connection, filepath: str, memory_limit: int) -> None:
+    """The main loop of the kernel subprocess."""
+    try:
+        if memory_limit:
+            resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+        namespace = _init_namespace(filepath)
+    except Exception as err:
+        connection.send(repr(err))
+        return
+
+    connection.send("ready")
+
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        code, capture_figure = message
+        connection.send(_execute(code, namespace, capture_figure))
+
+
+def _init_namespace(filepath: str) -> Dict[str, Any]:
+    import pandas as pd
+
+    from csv_explorer.loader import load_dataframe
+
+    install_plot_hooks()
+    pd.set_option("mode.copy_on_write", True)
+    read_csv = pd.read_csv
+
+    def _cached_read_csv(filepath_or_buffer, *args, **kwargs):
+        if isinstance(filepath_or_buffer, (str, os.PathLike)) and not args and not kwargs:
+            return load_dataframe(os.fspath(filepath_or_buffer)).copy(deep=False)
+        return read_csv(filepath_or_buffer, *args, **kwargs)
+
+    pd.read_csv = _cached_read_csv
+
+    namespace: Dict[str, Any] = {"__name__": "__main__"}
+    exec(KERNEL_PRELUDE, namespace)
+    namespace["df"] = _cached_read_csv(filepath)
+    return namespace
+
+
+def _inline_namespace(filepath: str) -> Dict[str, Any]:
+    from csv_explorer.loader import load_dataframe
+
+    install_plot_hooks()
+    namespace: Dict[str, Any] = {"__name__": "__main__"}
+    exec(KERNEL_PRELUDE, namespace)
+    namespace["df"] = load_dataframe(filepath).copy(deep=False)
+    return namespace
+
+
+def _execute(code: str, namespace: Dict[str, Any], capture_figure: bool) -> KernelResult:
+    import matplotlib.pyplot as plt
+
+    stdout = io.StringIO()
+    result = KernelResult()
+    previous = {id(value) for value in namespace.values()}
+
+    try:
+        with redirect_stdout(stdout):
+            exec(code, namespace)
+    except Exception as err:
+        logger.debug(traceback.format_exc())
+        result.error = repr(err)
+
+    result.output = stdout.getvalue()
+
+    if capture_figure and result.error is None:
+        figure = _created_figure(namespace, previous)
+        if figure is not None:
+            result.reductions = reduce_figure(figure, dpi=config.FIGURE_DPI)
+            result.figure = render_figure(figure)
+
+    plt.close("all")
+    return result
+
+
+def _created_figure(namespace: Dict[str, Any], previous: Set[int]) -> Optional[Figure]:
+    """
+    Finds the figure drawn by the code just executed.
+
+    Figures created with the object-oriented API and bound to a new name, such as `fig = Figure()`, are
+    preferred, so the code does not need the pyplot state machine. Otherwise, the last figure opened
+    with pyplot is used, since the figures of previous executions are always closed.
+    """
+    import matplotlib.pyplot as plt
+
+    created = [
+        value for value in namespace.values() if isinstance(value, Figure) and id(value) not in previous
+    ]
+    if created:
+        return created[-1]
+    if plt.get_fignums():
+        return plt.figure(plt.get_fignums()[-1])
+    return None
@@ -0,0 +1,248 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow.parquet as pq
+from loguru import logger
+
+from csv_explorer import config
+from csv_explorer.cache import DATAFRAME_CACHE
+from csv_explorer.dtypes import MemoryReport, apply_dtypes, memory_report, plan_dtypes, read_dtypes, write_dtypes
+from csv_explorer.ingestion import columnar_path, read_columnar, read_schema
+from csv_explorer.tracing import span
+
+_MEMORY_REPORTS: Dict[Tuple[str, int, int], MemoryReport] = {}
+
+_COPY_ON_WRITE_LOCK = threading.Lock()
+_COPY_ON_WRITE_USERS = 0
+_COPY_ON_WRITE_PREVIOUS = False
+
+
+def file_fingerprint(filepath: str) -> Tuple[str, int, int]:
+    """
+    Identifies the current version of a file by its real path, modification time and size.
+
+    Args:
+        filepath (str): The path to the file.
+
+    Returns:
+        Tuple[str, int, int]: The real path, the modification time in nanoseconds and the size in bytes.
+    """
+    stat = os.stat(filepath)
+    return os.path.realpath(filepath), stat.st_mtime_ns, stat.st_size
+
+
+def load_dataframe(filepath: str, columns: Optional[List[str]] = None, **read_kwargs: Any) -> pd.DataFrame:
+    """
+    Reads a CSV file through the process-wide DataFrame cache.
+
+    The file is parsed only the first time it is requested with a given set of `columns` and `read_kwargs`.
+    Later calls return the same DataFrame until the file changes or the entry is evicted, so callers must
+    not modify the returned frame in place. When the file has an up-to-date columnar copy, it is read
+    instead of the CSV, decoding only the requested `columns`. When the whole file is already cached,
+    column subsets are sliced from it.
+
+    Unless `read_kwargs` are given, the columns are converted to the compact dtypes chosen by
+    `load_dtype_plan`, and the memory saved per column is logged and kept for `get_memory_report`.
+
+    Args:
+        filepath (str): The path to the CSV file.
+        columns (List[str], optional): The columns to be read. Defaults to all columns.
+        **read_kwargs: Additional keyword arguments passed to `pd.read_csv`.
+
+    Returns:
+        pd.DataFrame: The parsed DataFrame.
+    """
+    if columns is not None:
+        columns = list(columns)
+        full_key = _dataset_key(filepath, None, read_kwargs)
+        if full_key in DATAFRAME_CACHE:
+            df = DATAFRAME_CACHE.get(full_key)
+            if df is not None:
+                return df[columns]
+
+    key = _dataset_key(filepath, columns, read_kwargs)
+
+    def _read() -> pd.DataFrame:
+        with span("load_dataframe", bytes=os.path.getsize(filepath)) as load_span:
+            if not read_kwargs and read_schema(filepath) is not None:
+                logger.info(f"Lendo a cópia colunar de {filepath}")
+                df = read_columnar(filepath, columns)
+                load_span.set(columnar=True)
+            else:
+                logger.info(f"Lendo o arquivo {filepath}")
+                df = pd.read_csv(filepath, usecols=columns, **read_kwargs)
+                df = df[columns] if columns is not None else df
+
+            if not read_kwargs and config.DTYPE_OPTIMIZATION_ENABLED:
+                df = _optimize_dtypes(filepath, df, full=columns is None)
+            load_span.set(rows=len(df), columns=df.shape[1])
+            return df
+
+    return DATAFRAME_CACHE.get_or_set(key, _read)
+
+
+def load_dtype_plan(filepath: str) -> Dict[str, str]:
+    """
+    Returns the compact dtypes chosen for the columns of a CSV file, shared by every reader of the file.
+
+    The dtypes are read from the sidecar of the file or, the first time, chosen by streaming the file in
+    chunks and written to the sidecar.
+
+    Args:
+        filepath (str): The path to the CSV file.
+
+    Returns:
+        Dict[str, str]: The optimized dtypes, by column name, for the columns whose dtype changes.
+    """
+    dtypes = read_dtypes(filepath)
+    if dtypes is None:
+        dtypes = plan_dtypes(iter_chunks(filepath, chunksize=config.STATS_CHUNKSIZE))
+        write_dtypes(filepath, dtypes)
+    return dtypes
+
+
+def get_memory_report(filepath: str) -> Optional[MemoryReport]:
+    """
+    Returns the memory used by each column of a CSV file before and after its dtypes were optimized.
+
+    Args:
+        filepath (str): The path to the CSV file.
+
+    Returns:
+        MemoryReport | None: The report, or None if the whole file was not loaded since it last changed.
+    """
+    return _MEMORY_REPORTS.get(file_fingerprint(filepath))
+
+
+def is_loaded(filepath: str, columns: Optional[List[str]] = None) -> bool:
+    """
+    Checks whether a CSV file, or a subset of its columns, can be served from the DataFrame cache.
+
+    Args:
+        filepath (str): The path to the CSV file.
+        columns (List[str], optional): The columns to be read. Defaults to all columns.
+
+    Returns:
+        bool: True if the DataFrame is cached.
+    """
+    full_key = _dataset_key(filepath, None, {})
+    if full_key in DATAFRAME_CACHE:
+        return True
+    return columns is not None and _dataset_key(filepath, list(columns), {}) in DATAFRAME_CACHE
+
+
+@contextmanager
+def copy_on_write() -> Iterator[None]:
+    """
+    Enables pandas copy-on-write inside the `with` block.
+
+    Code that modifies a shallow copy of a cached DataFrame then copies the changed columns instead of
+    changing the cached frame. The pandas option is process-wide, so it stays enabled while any block is
+    running, in any thread, and is restored to its previous value when the last one ends.
+    """
+    global _COPY_ON_WRITE_USERS, _COPY_ON_WRITE_PREVIOUS
+    with _COPY_ON_WRITE_LOCK:
+        if _COPY_ON_WRITE_USERS == 0:
+            _COPY_ON_WRITE_PREVIOUS = pd.get_option("mode.copy_on_write")
+            pd.set_option("mode.copy_on_write", True)
+        _COPY_ON_WRITE_USERS += 1
+    try:
+        yield
+    finally:
+        with _COPY_ON_WRITE_LOCK:
+            _COPY_ON_WRITE_USERS -= 1
+            if _COPY_ON_WRITE_USERS == 0:
+                pd.set_option("mode.copy_on_write", _COPY_ON_WRITE_PREVIOUS)
+
+
+def iter_chunks(filepath: str, columns: Optional[List[str]] = None, chunksize: int = 100_000) -> Iterator[pd.DataFrame]:
+    """
+    Reads a CSV file in chunks of rows, bypassing the DataFrame cache, so memory stays bounded by `chunksize`.
+
+    Args:
+        filepath (str): The path to the CSV file.
+        columns (List[str], optional): The columns to be read. Defaults to all columns.
+        chunksize (int, optional): The number of rows per chunk. Defaults to 100_000.
+
+    Yields:
+        pd.DataFrame: The chunks of the file, in order.
+    """
+    if read_schema(filepath) is not None:
+        parquet_file = pq.ParquetFile(columnar_path(filepath), memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+        return
+
+    for chunk in pd.read_csv(filepath, usecols=columns, chunksize=chunksize):
+        yield chunk[columns] if columns is not None else chunk
+
+
+def read_head(filepath: str, n_rows: int) -> pd.DataFrame:
+    """
+    Reads the first rows of a CSV file, without parsing the rest of it.
+
+    The rows come from the DataFrame cache when the file is loaded, from the first batch of the columnar
+    copy when there is one, and otherwise from a bounded read of the CSV.
+
+    Args:
+        filepath (str): The path to the CSV file.
+        n_rows (int): The number of rows.
+
+    Returns:
+        pd.DataFrame: The first `n_rows` rows.
+    """
+    if is_loaded(filepath):
+        return load_dataframe(filepath).head(n_rows)
+    if read_schema(filepath) is not None:
+        parquet_file = pq.ParquetFile(columnar_path(filepath), memory_map=True)
+        batch = next(parquet_file.iter_batches(batch_size=max(n_rows, 1)), None)
+        return batch.to_pandas().head(n_rows) if batch is not None else pd.DataFrame()
+    return pd.read_csv(filepath, nrows=n_rows)
+
+
+def list_columns(filepath: str) -> List[str]:
+    """
+    Lists the columns of a CSV file without reading its data.
+
+    Args:
+        filepath (str): The path to the CSV file.
+
+    Returns:
+        List[str]: The column names.
+    """
+    schema = read_schema(filepath)
+    if schema is not None:
+        return [column["name"] for column in schema["columns"]]
+    return list(pd.read_csv(filepath, nrows=0).columns)
+
+
+def _optimize_dtypes(filepath: str, df: pd.DataFrame, full: bool) -> pd.DataFrame:
+    dtypes = read_dtypes(filepath)
+    if dtypes is None:
+        dtypes = plan_dtypes([df])
+        if full:
+            write_dtypes(filepath, dtypes)
+
+    optimized = apply_dtypes(df, dtypes)
+    if full:
+        report = memory_report(df, optimized)
+        _MEMORY_REPORTS[file_fingerprint(filepath)] = report
+        logger.info(f"Memória de {filepath} com dtypes otimizados: {report}")
+        for column in report.columns:
+            if column.dtype_before != column.dtype_after:
+                logger.info(
+                    f"Coluna {column.column}: {column.dtype_before} ({column.bytes_before} bytes) -> "
+                    f"{column.dtype_after} ({column.bytes_after} bytes)"
+                )
+    return optimized
+
+
+def _dataset_key(filepath: str, columns: Optional[List[str]], read_kwargs: dict) -> Hashable:
+    return (
+        *file_fingerprint(filepath),
+        tuple(columns) if columns is not None else None,
+        repr(sorted(read_kwargs.items())),
+    )
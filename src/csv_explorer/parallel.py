@@ -0,0 +1,223 @@
+import atexit
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow.parquet as pq
+from loguru import logger
+
+from csv_explorer import config
+from csv_explorer.ingestion import columnar_path, read_schema
+
+_POOLS: Dict[int, ProcessPoolExecutor] = {}
+_POOLS_LOCK = threading.Lock()
+
+_SCAN_BLOCK_SIZE = 1 << 20
+
+
+class ByteRangeReader(io.RawIOBase):
+    """
+    A raw binary file object that reads the header line of a CSV file followed by the bytes in `[start, end)`.
+
+    Passing it to `pd.read_csv` parses a slice of the file as if it were a CSV file of its own.
+
+    Args:
+        filepath (str): The path to the CSV file.
+        header (bytes): The header line of the file, including the line break.
+        start (int): The offset of the first byte of the range.
+        end (int): The offset right after the last byte of the range.
+    """
+
+    def __init__(self, filepath: str, header: bytes, start: int, end: int):
+        self._file = open(filepath, "rb")
+        self._file.seek(start)
+        self._header = memoryview(header)
+        self._remaining = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if len(self._header):
+            size = min(len(buffer), len(self._header))
+            buffer[:size] = self._header[:size]
+            self._header = self._header[size:]
+            return size
+
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        read = self._file.readinto(memoryview(buffer)[:size])
+        self._remaining -= read
+        return read
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
+
+
+def split_byte_ranges(filepath: str, n_ranges: int) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """
+    Splits the body of a CSV file into about `n_ranges` contiguous byte ranges aligned to line breaks.
+
+    The body is scanned once to track whether each line break is inside a double-quoted field, so ranges
+    never split a multi-line field. Quotes escaped by doubling them, as in standard CSV, are handled, but
+    quotes escaped with another character are not.
+
+    Args:
+        filepath (str): The path to the CSV file.
+        n_ranges (int): The desired number of ranges.
+
+    Returns:
+        Tuple[bytes, List[Tuple[int, int]]]: The header line and the `(start, end)` offsets of each range.
+    """
+    size = os.path.getsize(filepath)
+
+    with open(filepath, "rb") as file:
+        header = file.readline()
+        body_start = file.tell()
+        step = max((size - body_start) // max(n_ranges, 1), 1)
+        boundaries = [body_start, *_record_boundaries(file, body_start, size, step), size]
+
+    ranges = [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+    return header, ranges
+
+
+def map_partitions(
+    filepath: str,
+    func: Callable[..., Any],
+    columns: Optional[List[str]] = None,
+    chunksize: int = config.STATS_CHUNKSIZE,
+    workers: int = config.STATS_WORKERS,
+    read_kwargs: Optional[dict] = None,
+    **kwargs: Any,
+) -> List[Any]:
+    """
+    Applies `func` to partitions of a CSV file, in a pool of `workers` processes.
+
+    The partitions are the row groups of the columnar copy of the file, when there is one, or newline-aligned
+    byte ranges of the CSV otherwise. `func` must be a module-level function, so it can be sent to the worker
+    processes, and is called as `func(chunks, **kwargs)`, where `chunks` iterates over the DataFrame chunks
+    of one partition.
+
+    Args:
+        filepath (str): The path to the CSV file.
+        func (Callable[..., Any]): The function applied to each partition.
+        columns (List[str], optional): The columns to be read. Defaults to all columns.
+        chunksize (int, optional): The number of rows of each chunk.
+        workers (int, optional): The number of worker processes. With a single worker, the partitions are
+            processed in the current process.
+        read_kwargs (dict, optional): Additional keyword arguments passed to `pd.read_csv` when the CSV itself
+            is read. Defaults to None.
+        **kwargs: Additional keyword arguments passed to `func`.
+
+    Returns:
+        List[Any]: The results of `func`, in the order of the partitions.
+    """
+    if read_schema(filepath) is not None:
+        partitions = _split_row_groups(filepath, workers)
+    else:
+        header, ranges = split_byte_ranges(filepath, workers)
+        partitions = [("csv", (header, start, end)) for start, end in ranges]
+
+    args = [(func, filepath, partition, columns, chunksize, read_kwargs or {}, kwargs) for partition in partitions]
+
+    if workers <= 1 or len(partitions) <= 1:
+        return [_apply(*arg) for arg in args]
+
+    logger.info(f"Processando {len(partitions)} partes de {filepath} em {workers} processos")
+    pool = _get_pool(workers)
+    futures = [pool.submit(_apply, *arg) for arg in args]
+    return [future.result() for future in futures]
+
+
+def _record_boundaries(file: io.BufferedReader, position: int, size: int, step: int) -> List[int]:
+    boundaries = []
+    target = position + step
+    in_quotes = False
+    while target < size:
+        block = file.read(_SCAN_BLOCK_SIZE)
+        if not block:
+            break
+        offset = 0
+        while offset < len(block):
+            start = target - position
+            if start >= len(block):
+                in_quotes ^= block.count(b'"', offset) % 2 == 1
+                break
+            if start > offset:
+                in_quotes ^= block.count(b'"', offset, start) % 2 == 1
+                offset = start
+            newline = block.find(b"\n", offset)
+            if newline < 0:
+                in_quotes ^= block.count(b'"', offset) % 2 == 1
+                break
+            in_quotes ^= block.count(b'"', offset, newline) % 2 == 1
+            offset = newline + 1
+            if not in_quotes:
+                boundaries.append(position + offset)
+                target = position + offset + step
+        position += len(block)
+    return [boundary for boundary in boundaries if boundary < size]
+
+
+def _split_row_groups(filepath: str, n_partitions: int) -> List[Tuple[str, List[int]]]:
+    num_row_groups = pq.ParquetFile(columnar_path(filepath)).num_row_groups
+    n_partitions = max(min(n_partitions, num_row_groups), 1)
+    return [
+        ("parquet", list(range(num_row_groups))[index::n_partitions])
+        for index in range(n_partitions)
+    ]
+
+
+def _iter_partition(
+    filepath: str,
+    partition: Tuple[str, Any],
+    columns: Optional[List[str]],
+    chunksize: int,
+    read_kwargs: dict,
+) -> Iterator[pd.DataFrame]:
+    kind, location = partition
+
+    if kind == "parquet":
+        parquet_file = pq.ParquetFile(columnar_path(filepath), memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, row_groups=location, columns=columns):
+            yield batch.to_pandas()
+        return
+
+    header, start, end = location
+    with io.BufferedReader(ByteRangeReader(filepath, header, start, end)) as reader:
+        for chunk in pd.read_csv(reader, usecols=columns, chunksize=chunksize, **read_kwargs):
+            yield chunk[columns] if columns is not None else chunk
+
+
+def _apply(
+    func: Callable[..., Any],
+    filepath: str,
+    partition: Tuple[str, Any],
+    columns: Optional[List[str]],
+    chunksize: int,
+    read_kwargs: dict,
+    kwargs: dict,
+) -> Any:
+    return func(_iter_partition(filepath, partition, columns, chunksize, read_kwargs), **kwargs)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    with _POOLS_LOCK:
+        if workers not in _POOLS:
+            _POOLS[workers] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _POOLS[workers]
+
+
+@atexit.register
+def _shutdown_pools() -> None:
+    for pool in _POOLS.values():
+        pool.shutdown(wait=False, cancel_futures=True)
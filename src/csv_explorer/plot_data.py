@@ -0,0 +1,227 @@
+import functools
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from matplotlib.axes import Axes
+from matplotlib.collections import PathCollection
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from pydantic import BaseModel
+
+from csv_explorer import config
+
+PIE_OTHERS_LABEL = "Outros"
+
+_REDUCTIONS_ATTRIBUTE = "_csv_explorer_reductions"
+
+
+class PlotReduction(BaseModel):
+    """
+    The reduction of the data of one plotted artist.
+
+    Attributes:
+        artist (str): The kind of artist reduced: 'line', 'scatter', 'bar' or 'pie'.
+        method (str): How the data was reduced.
+        n_before (int): The number of points, bars or slices given to the plot.
+        n_after (int): The number of points, bars or slices drawn.
+    """
+
+    artist: str
+    method: str
+    n_before: int
+    n_after: int
+
+    def __str__(self) -> str:
+        ratio = self.n_after / self.n_before if self.n_before else 1.0
+        return f"{self.artist} ({self.method}): {self.n_before:,} -> {self.n_after:,} ({ratio:.1%})"
+
+
+def reduce_figure(figure: Figure, dpi: Optional[float] = None) -> List[PlotReduction]:
+    """
+    Reduces the data of the lines and scatters of a figure to what can be seen at the rendered resolution.
+
+    Lines with more than `config.PLOT_MAX_POINTS` points and increasing x values keep, for each quarter of
+    a column of pixels, only their first, last, lowest and highest points (min/max decimation), which draws
+    the same shape, up to anti-aliasing. The columns are taken in display space, so lines on logarithmic and
+    other non-linear scales are binned as drawn. Scatters with more than `config.PLOT_MAX_POINTS` opaque
+    markers keep only the last marker drawn on each pixel with each color and size, the one left visible.
+    Lines with markers, translucent scatters and data with missing values are left untouched.
+
+    The figure is laid out first, without rendering it, so the axis limits left to autoscaling and the
+    positions set by layout engines are the ones the data is mapped to pixels with. The reductions made by
+    the bar and pie hooks installed by `install_plot_hooks` are reported too.
+
+    Args:
+        figure (Figure): The figure, with all of its data plotted.
+        dpi (float, optional): The resolution the figure will be rendered at. Defaults to the figure dpi.
+
+    Returns:
+        List[PlotReduction]: The reductions made.
+    """
+    figure.draw_without_rendering()
+    scale = (dpi or figure.dpi) / figure.dpi
+    reductions = []
+    for ax in figure.axes:
+        reductions.extend(getattr(ax, _REDUCTIONS_ATTRIBUTE, []))
+        width = ax.get_window_extent().width * scale
+        for line in ax.get_lines():
+            reduction = _decimate_line(ax, line, width)
+            if reduction is not None:
+                reductions.append(reduction)
+        for collection in ax.collections:
+            if isinstance(collection, PathCollection):
+                reduction = _thin_scatter(collection, scale)
+                if reduction is not None:
+                    reductions.append(reduction)
+    return reductions
+
+
+def install_plot_hooks() -> None:
+    """
+    Makes `Axes.bar`, `Axes.barh` and `Axes.pie` aggregate their data before drawing it.
+
+    Bars given more than `config.PLOT_MAX_BARS` values with repeated categories, as when the rows of a
+    table are plotted without grouping them, are drawn once per category with the tallest value, the
+    one visible when the bars overlap. Pies with slices smaller than `config.PLOT_PIE_MIN_FRACTION` of the
+    total, invisible at any resolution, are drawn with those slices folded into one 'Outros' slice.
+
+    Meant for the kernel subprocess, where the plotting code written by the agent runs.
+    """
+    if getattr(Axes.bar, "_csv_explorer_hook", False):
+        return
+    Axes.bar = _hook(Axes.bar, _aggregate_bars)
+    Axes.barh = _hook(Axes.barh, _aggregate_bars)
+    Axes.pie = _hook(Axes.pie, _fold_pie)
+
+
+def _hook(method: Callable, prepare: Callable) -> Callable:
+    @functools.wraps(method)
+    def wrapper(ax, *args, **kwargs):
+        try:
+            args, kwargs, reduction = prepare(*args, **kwargs)
+        except Exception as err:
+            logger.debug(f"Dados do gráfico não reduzidos: {err!r}")
+            reduction = None
+        if reduction is not None:
+            setattr(ax, _REDUCTIONS_ATTRIBUTE, [*getattr(ax, _REDUCTIONS_ATTRIBUTE, []), reduction])
+        return method(ax, *args, **kwargs)
+
+    wrapper._csv_explorer_hook = True
+    return wrapper
+
+
+def _decimate_line(ax: Axes, line: Line2D, width: float) -> Optional[PlotReduction]:
+    xy = line.get_xydata()
+    n_points = len(xy)
+    if n_points <= config.PLOT_MAX_POINTS or line.get_marker() not in (None, "None", "", " "):
+        return None
+    if line.get_drawstyle() != "default" or not np.isfinite(xy).all() or (np.diff(xy[:, 0]) < 0).any():
+        return None
+
+    extent = ax.get_window_extent()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pixels = ax.transData.transform(xy)[:, 0]
+    if extent.width <= 0 or not np.isfinite(pixels).all():
+        return None
+    n_bins = max(int(width) * 4, 1)
+    bins = np.clip(np.floor((pixels - extent.x0) / extent.width * n_bins), -1, n_bins).astype(np.int64)
+    if ax.xaxis_inverted():
+        bins = n_bins - 1 - bins
+
+    boundaries = np.flatnonzero(np.diff(bins)) + 1
+    starts = np.concatenate([[0], boundaries])
+    ends = np.concatenate([boundaries, [n_points]]) - 1
+    order = np.lexsort((xy[:, 1], bins))
+    keep = np.unique(np.concatenate([starts, ends, order[starts], order[ends]]))
+
+    x, y = np.asarray(line.get_xdata(orig=True)), np.asarray(line.get_ydata(orig=True))
+    line.set_data(x[keep], y[keep])
+    return PlotReduction(artist="line", method="min/max", n_before=n_points, n_after=len(keep))
+
+
+def _thin_scatter(collection: PathCollection, scale: float) -> Optional[PlotReduction]:
+    offsets = np.asarray(collection.get_offsets())
+    n_points = len(offsets)
+    if n_points <= config.PLOT_MAX_POINTS or not np.isfinite(offsets).all():
+        return None
+
+    facecolors, edgecolors = collection.get_facecolor(), collection.get_edgecolor()
+    values, sizes = collection.get_array(), collection.get_sizes()
+    alphas = [collection.get_alpha() or 1.0, *facecolors[:, 3], *edgecolors[:, 3]]
+    if min(alphas) < 1.0:
+        return None
+
+    pixels = np.floor(collection.get_offset_transform().transform(offsets) * scale).astype(np.int64)
+    keys = pd.DataFrame({"x": pixels[:, 0], "y": pixels[:, 1]})
+    for name, attribute in [("value", values), ("size", sizes)]:
+        if attribute is not None and len(attribute) == n_points:
+            keys[name] = np.asarray(attribute)
+    for name, colors in [("face", facecolors), ("edge", edgecolors)]:
+        if len(colors) == n_points:
+            for channel in range(4):
+                keys[f"{name}_{channel}"] = colors[:, channel]
+
+    keep = np.flatnonzero(~keys.duplicated(keep="last").to_numpy())
+    if len(keep) == n_points:
+        return None
+
+    collection.set_offsets(offsets[keep])
+    if values is not None and len(values) == n_points:
+        collection.set_array(values[keep])
+    if len(sizes) == n_points:
+        collection.set_sizes(sizes[keep])
+    if len(facecolors) == n_points and values is None:
+        collection.set_facecolor(facecolors[keep])
+    if len(edgecolors) == n_points:
+        collection.set_edgecolor(edgecolors[keep])
+    return PlotReduction(artist="scatter", method="pixel", n_before=n_points, n_after=len(keep))
+
+
+def _aggregate_bars(*args: Any, **kwargs: Any):
+    if len(args) < 2 or kwargs.get("data") is not None:
+        return args, kwargs, None
+    positions, sizes, *rest = args
+    n_bars = len(positions) if hasattr(positions, "__len__") else 1
+    if n_bars <= config.PLOT_MAX_BARS or np.ndim(sizes) == 0:
+        return args, kwargs, None
+    if any(_is_sequence(value, n_bars) for value in [*rest, *kwargs.values()]):
+        return args, kwargs, None
+
+    values = pd.Series(np.asarray(sizes), index=pd.Index(np.asarray(positions)))
+    if (values >= 0).all():
+        aggregated = values.groupby(level=0, sort=False).max()
+    elif (values <= 0).all():
+        aggregated = values.groupby(level=0, sort=False).min()
+    else:
+        return args, kwargs, None
+    if len(aggregated) == n_bars:
+        return args, kwargs, None
+
+    reduction = PlotReduction(artist="bar", method="max por categoria", n_before=n_bars, n_after=len(aggregated))
+    return (aggregated.index.to_numpy(), aggregated.to_numpy(), *rest), kwargs, reduction
+
+
+def _fold_pie(x: Any, *args: Any, **kwargs: Any):
+    values = np.asarray(x, dtype=float)
+    labels = kwargs.get("labels")
+    if args or kwargs.get("explode") is not None or kwargs.get("colors") is not None or len(values) < 2:
+        return (x, *args), kwargs, None
+
+    total = values.sum()
+    small = values < total * config.PLOT_PIE_MIN_FRACTION if total > 0 else np.zeros(len(values), bool)
+    if small.sum() < 2:
+        return (x, *args), kwargs, None
+
+    folded = np.append(values[~small], values[small].sum())
+    if labels is not None:
+        kwargs["labels"] = [label for label, is_small in zip(labels, small) if not is_small] + [PIE_OTHERS_LABEL]
+    reduction = PlotReduction(
+        artist="pie", method="fatias pequenas agrupadas", n_before=len(values), n_after=len(folded)
+    )
+    return (folded,), kwargs, reduction
+
+
+def _is_sequence(value: Any, length: int) -> bool:
+    return not isinstance(value, (str, bytes, dict)) and hasattr(value, "__len__") and len(value) == length
@@ -0,0 +1,238 @@
+import json
+import math
+import os
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from loguru import logger
+from pydantic import BaseModel
+
+from csv_explorer import config
+from csv_explorer.inference import infer_column_types
+from csv_explorer.ingestion import read_schema
+from csv_explorer.loader import is_loaded, load_dataframe, load_dtype_plan, read_head
+from csv_explorer.parallel import map_partitions
+from csv_explorer.statistics import merge_summaries, summarize_chunks
+from csv_explorer.timing import timed
+
+TOP_VALUES = 3
+
+
+class ColumnProfile(BaseModel):
+    name: str
+    dtype: str
+    type: str
+    null_ratio: float
+    unique: int
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    top_values: List[str] = []
+
+
+class DatasetProfile(BaseModel):
+    """
+    A compact description of a CSV file: its size, the schema and statistics of each column and a few rows.
+
+    It is computed once, when the file is uploaded, and given to the agent with every question, so it does
+    not need to call tools just to discover the columns, their types or what the values look like.
+    """
+
+    source_size: int
+    source_mtime_ns: int
+    n_rows: int
+    columns: List[ColumnProfile]
+    sample_rows: List[Dict[str, Any]]
+
+    def to_prompt(self, max_tokens: int = config.PROFILE_MAX_TOKENS) -> str:
+        """
+        Renders the profile as markdown that fits in a token budget.
+
+        When the full profile is too long, sample rows are dropped first and then the last columns.
+
+        Args:
+            max_tokens (int, optional): The maximum number of tokens of the text.
+
+        Returns:
+            str: The rendered profile, or an empty string if not even the header fits in the budget.
+        """
+        n_columns = len(self.columns)
+        n_rows = len(self.sample_rows)
+        text = self._render(n_columns, n_rows)
+        while _count_tokens(text) > max_tokens:
+            if n_rows > 0:
+                n_rows -= 1
+            elif n_columns > 0:
+                n_columns = max(n_columns - max(n_columns // 10, 1), 0)
+            else:
+                return ""
+            text = self._render(n_columns, n_rows)
+        return text
+
+    def _render(self, n_columns: int, n_rows: int) -> str:
+        lines = [
+            f"{self.n_rows} linhas e {len(self.columns)} colunas.",
+            "",
+            "| coluna | dtype | tipo | nulos | únicos | resumo |",
+            "|---|---|---|---|---|---|",
+        ]
+        for column in self.columns[:n_columns]:
+            lines.append(
+                f"| {column.name} | {column.dtype} | {column.type} | {column.null_ratio:.1%} "
+                f"| {column.unique} | {_summary(column)} |"
+            )
+        if n_columns < len(self.columns):
+            lines.append(f"\n... e mais {len(self.columns) - n_columns} colunas (use `get_column_names`).")
+
+        if n_rows:
+            sample = pd.DataFrame(self.sample_rows[:n_rows])[[column.name for column in self.columns[:n_columns]]]
+            lines += ["", "Primeiras linhas:", "", sample.to_markdown(index=False)]
+        return "\n".join(lines)
+
+
+def profile_path(csv_filepath: str) -> str:
+    """
+    Returns the path of the profile sidecar of a CSV file.
+
+    Args:
+        csv_filepath (str): The path to the CSV file.
+
+    Returns:
+        str: The path of the JSON profile file, next to the CSV file.
+    """
+    return os.path.splitext(csv_filepath)[0] + ".profile.json"
+
+
+def build_profile(csv_filepath: str, sample_rows: int = config.PROFILE_SAMPLE_ROWS) -> DatasetProfile:
+    """
+    Computes the profile of a CSV file and writes it to its sidecar.
+
+    Column statistics come from the streaming, parallel summaries used by `describe_csv` and the
+    column types from `infer_column_types`, so the file is never loaded as a whole for profiling.
+
+    Args:
+        csv_filepath (str): The path to the CSV file.
+        sample_rows (int, optional): The number of rows included in the profile.
+
+    Returns:
+        DatasetProfile: The profile of the file.
+    """
+    with timed("build_profile"):
+        head = read_head(csv_filepath, sample_rows)
+        dtypes = _read_dtypes(csv_filepath, head)
+        types = infer_column_types(csv_filepath).set_index("column")
+        summaries = merge_summaries(map_partitions(csv_filepath, summarize_chunks))
+
+        columns = []
+        for name, summary in summaries.items():
+            numeric = summary.is_numeric and summary.moments.count > 0
+            columns.append(
+                ColumnProfile(
+                    name=str(name),
+                    dtype=dtypes.get(name, "object"),
+                    type=types.loc[name, "type"] if name in types.index else "Other",
+                    null_ratio=summary.null_count / max(summary.count + summary.null_count, 1),
+                    unique=min(summary.distinct.estimate(), summary.count),
+                    minimum=summary.moments.minimum if numeric else None,
+                    maximum=summary.moments.maximum if numeric else None,
+                    top_values=[str(value) for value, _ in summary.frequent.most_common(TOP_VALUES)],
+                )
+            )
+
+        stat = os.stat(csv_filepath)
+        profile = DatasetProfile(
+            source_size=stat.st_size,
+            source_mtime_ns=stat.st_mtime_ns,
+            n_rows=max((s.count + s.null_count for s in summaries.values()), default=0),
+            columns=columns,
+            sample_rows=json.loads(head.to_json(orient="records", date_format="iso", force_ascii=False)),
+        )
+
+    path = profile_path(csv_filepath)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "w") as file:
+            file.write(profile.model_dump_json(indent=4))
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+    return profile
+
+
+def read_profile(csv_filepath: str) -> Optional[DatasetProfile]:
+    """
+    Reads the profile sidecar of a CSV file, if it is up to date.
+
+    Args:
+        csv_filepath (str): The path to the CSV file.
+
+    Returns:
+        DatasetProfile | None: The profile, or None if there is no valid profile of the current file.
+    """
+    try:
+        with open(profile_path(csv_filepath)) as file:
+            profile = DatasetProfile.model_validate_json(file.read())
+        stat = os.stat(csv_filepath)
+    except (OSError, ValueError):
+        return None
+
+    if (profile.source_size, profile.source_mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+        return None
+    return profile
+
+
+def load_profile(csv_filepath: str) -> Optional[DatasetProfile]:
+    """
+    Returns the profile of a CSV file, computing it only if there is no up-to-date sidecar.
+
+    The profile is optional: when it cannot be computed, the error is logged and the callers go on without it.
+
+    Args:
+        csv_filepath (str): The path to the CSV file.
+
+    Returns:
+        DatasetProfile | None: The profile, or None if it could not be computed.
+    """
+    profile = read_profile(csv_filepath)
+    if profile is not None:
+        return profile
+    try:
+        return build_profile(csv_filepath)
+    except Exception as err:
+        logger.warning(f"Não foi possível calcular o perfil de {csv_filepath}, continuando sem ele: {err!r}")
+        return None
+
+
+def _read_dtypes(csv_filepath: str, head: pd.DataFrame) -> Dict[str, str]:
+    if is_loaded(csv_filepath):
+        return {name: str(dtype) for name, dtype in load_dataframe(csv_filepath).dtypes.items()}
+    schema = read_schema(csv_filepath)
+    if schema is not None:
+        dtypes = {column["name"]: column["pandas_dtype"] for column in schema["columns"]}
+    else:
+        dtypes = {name: str(dtype) for name, dtype in head.dtypes.items()}
+    if config.DTYPE_OPTIMIZATION_ENABLED:
+        dtypes.update(load_dtype_plan(csv_filepath))
+    return dtypes
+
+
+def _summary(column: ColumnProfile) -> str:
+    if column.minimum is not None and column.maximum is not None:
+        return f"{_format_number(column.minimum)} a {_format_number(column.maximum)}"
+    return ", ".join(value[:30] for value in column.top_values)
+
+
+def _format_number(value: float) -> str:
+    if math.isfinite(value) and value == int(value):
+        return str(int(value))
+    return f"{value:.4g}"
+
+
+def _count_tokens(text: str) -> int:
+    """Counts the tokens of a text with the tokenizer of the OpenAI chat models, or estimates them."""
+    try:
+        import tiktoken
+
+        return len(tiktoken.get_encoding("cl100k_base").encode(text))
+    except Exception:
+        return len(text) // 4 + 1
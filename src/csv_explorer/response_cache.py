@@ -0,0 +1,241 @@
+import hashlib
+import hmac
+import json
+import os
+import pickle
+import secrets
+import sqlite3
+import stat
+import threading
+import time
+from contextlib import closing
+from typing import Any, Dict, Hashable, Optional
+
+from loguru import logger
+
+from csv_explorer import config
+
+_SIGNATURE_SIZE = hashlib.sha256().digest_size
+
+
+class ResponseCache:
+    """
+    A persistent cache of agent responses, stored in a SQLite database shared by every process.
+
+    Entries expire `ttl` seconds after being written and, when the stored values exceed `max_bytes`,
+    the least recently read entries are evicted. Values are pickled, so they must be picklable, and signed
+    with HMAC-SHA256 with a key kept next to the database. Entries with an invalid signature are discarded
+    without being unpickled, and the database must be in a directory only its owner can write to.
+
+    Args:
+        path (str): The path of the SQLite database.
+        ttl (float, optional): The lifetime of an entry, in seconds.
+        max_bytes (int, optional): The maximum total size of the stored values.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = config.RESPONSE_CACHE_TTL,
+        max_bytes: int = config.RESPONSE_CACHE_MAX_BYTES,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        _private_directory(os.path.dirname(os.path.abspath(path)))
+        self._key = _load_key(f"{path}.key")
+        with closing(self._connect()) as connection, connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    def get(self, key: str) -> Any:
+        """
+        Get a cached value, if it exists and has not expired.
+
+        Args:
+            key (str): The key of the entry.
+
+        Returns:
+            Any: The cached value, or None if there is no valid entry.
+        """
+        now = time.time()
+        with self._lock, closing(self._connect()) as connection, connection:
+            row = connection.execute(
+                "SELECT value FROM responses WHERE key = ? AND created_at > ?", (key, now - self.ttl)
+            ).fetchone()
+            if row is not None:
+                connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        try:
+            signature, data = row[0][:_SIGNATURE_SIZE], row[0][_SIGNATURE_SIZE:]
+            if not hmac.compare_digest(signature, self._sign(data)):
+                raise ValueError("assinatura inválida")
+            value = pickle.loads(data)
+        except Exception as err:
+            logger.warning(f"Descartando resposta em cache inválida: {err}")
+            self.pop(key)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Store a value, evicting expired and least recently read entries to stay within `max_bytes`.
+
+        Values larger than `max_bytes` are not stored.
+
+        Args:
+            key (str): The key of the entry.
+            value (Any): The value to be cached.
+        """
+        data = pickle.dumps(value)
+        if len(data) > self.max_bytes:
+            logger.info(f"Resposta de {len(data)} bytes grande demais para o cache")
+            return
+
+        now = time.time()
+        with self._lock, closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, self._sign(data) + data, len(data), now, now),
+            )
+            connection.execute("DELETE FROM responses WHERE created_at <= ?", (now - self.ttl,))
+            self._evict(connection)
+
+    def pop(self, key: str) -> None:
+        """
+        Remove an entry, if it exists.
+
+        Args:
+            key (str): The key of the entry.
+        """
+        with self._lock, closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        """
+        Remove every entry.
+        """
+        with self._lock, closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the cache statistics.
+
+        Returns:
+            Dict[str, int]: The number of entries, their total size and the hits and misses of this instance.
+        """
+        with closing(self._connect()) as connection:
+            entries, size = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"entries": entries, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _sign(self, data: bytes) -> bytes:
+        return hmac.new(self._key, data, hashlib.sha256).digest()
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+        for key, size in connection.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        connection.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        logger.info(f"{len(evicted)} respostas removidas do cache")
+
+
+def response_key(**parts: Hashable) -> str:
+    """
+    Builds the key of a response from everything the response depends on.
+
+    Args:
+        **parts: The dataset fingerprint, model, temperature, question, conversation state, etc.
+
+    Returns:
+        str: The SHA-256 digest of the parts.
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normalizes a question, so it matches the same question typed with different case, spacing or final punctuation.
+
+    Args:
+        question (str): The question.
+
+    Returns:
+        str: The normalized question.
+    """
+    return " ".join(question.casefold().split()).rstrip(" ?!.")
+
+
+_RESPONSE_CACHE: Optional[ResponseCache] = None
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Returns the process-wide response cache, creating it on first use.
+
+    Returns:
+        ResponseCache | None: The cache, or None if it is disabled or its database cannot be opened.
+    """
+    global _RESPONSE_CACHE
+    if not config.RESPONSE_CACHE_ENABLED:
+        return None
+
+    with _RESPONSE_CACHE_LOCK:
+        if _RESPONSE_CACHE is None:
+            try:
+                _RESPONSE_CACHE = ResponseCache(config.RESPONSE_CACHE_PATH)
+            except (OSError, sqlite3.Error) as err:
+                logger.warning(f"Cache de respostas desativado: {err}")
+                return None
+        return _RESPONSE_CACHE
+
+
+def _private_directory(directory: str) -> None:
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.stat(directory)
+    if info.st_uid != os.getuid() or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError(f"O diretório {directory} do cache de respostas pode ser alterado por outros usuários")
+
+
+def _load_key(path: str) -> bytes:
+    if not os.path.exists(path):
+        temporary = f"{path}.{secrets.token_hex(8)}"
+        descriptor = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(secrets.token_bytes(32))
+        try:
+            os.link(temporary, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(temporary)
+    with open(path, "rb") as file:
+        return file.read()
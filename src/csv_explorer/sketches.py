@@ -0,0 +1,293 @@
+import math
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class Moments:
+    """
+    Running count, mean, variance, minimum and maximum of a stream of numbers.
+
+    Chunks are folded in with the parallel form of Welford's algorithm (Chan et al.), so two
+    instances built over different parts of a stream can be merged without loss of precision.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def update(self, values: np.ndarray) -> "Moments":
+        """
+        Adds a chunk of values to the stream.
+
+        Args:
+            values (np.ndarray): The values, without NaNs.
+
+        Returns:
+            Moments: The updated instance.
+        """
+        if len(values) == 0:
+            return self
+        chunk = Moments()
+        chunk.count = len(values)
+        chunk.mean = float(values.mean())
+        chunk.m2 = float(((values - chunk.mean) ** 2).sum())
+        chunk.minimum = float(values.min())
+        chunk.maximum = float(values.max())
+        return self.merge(chunk)
+
+    def merge(self, other: "Moments") -> "Moments":
+        """
+        Merges the moments of another part of the stream into this instance.
+
+        Args:
+            other (Moments): The moments to be merged.
+
+        Returns:
+            Moments: The updated instance.
+        """
+        if other.count == 0:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta**2 * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    @property
+    def std(self) -> float:
+        """The sample standard deviation, as computed by `pd.Series.std`."""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan
+
+
+class KLLSketch:
+    """
+    Approximate quantiles of a stream of numbers in bounded memory (Karnin, Lang and Liberty).
+
+    Items are kept in levels of compactors, where an item at level `h` stands for `2**h` items of the
+    stream. When a level overflows, it is sorted and every other item, starting at a random offset, is
+    promoted to the next level. The rank error is about `1.65 / k` with high probability.
+
+    Args:
+        k (int, optional): The capacity of the top compactor, which controls the accuracy. Defaults to 200.
+        seed (int, optional): Seed of the random offsets. Defaults to None.
+    """
+
+    def __init__(self, k: int = 200, seed: int | None = None):
+        self.k = k
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray) -> "KLLSketch":
+        """
+        Adds a chunk of values to the sketch.
+
+        Args:
+            values (np.ndarray): The values, without NaNs.
+
+        Returns:
+            KLLSketch: The updated instance.
+        """
+        self.levels[0] = np.concatenate([self.levels[0], np.asarray(values, dtype=np.float64)])
+        self.n += len(values)
+        self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """
+        Merges another sketch into this instance.
+
+        Args:
+            other (KLLSketch): The sketch to be merged.
+
+        Returns:
+            KLLSketch: The updated instance.
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates a quantile of the stream.
+
+        Args:
+            q (float): The quantile, between 0 and 1.
+
+        Returns:
+            float: The estimated quantile, or NaN if the sketch is empty.
+        """
+        items = np.concatenate(self.levels)
+        if len(items) == 0:
+            return math.nan
+        weights = np.concatenate(
+            [np.full(len(level_items), 2.0**level) for level, level_items in enumerate(self.levels)]
+        )
+        order = np.argsort(items, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        index = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+        return float(items[order][min(index, len(items) - 1)])
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(int(math.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _compress(self) -> None:
+        while True:
+            overflowing = [
+                level for level in range(len(self.levels)) if len(self.levels[level]) > self._capacity(level)
+            ]
+            if not overflowing:
+                return
+            level = overflowing[0]
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+
+            items = np.sort(self.levels[level])
+            kept = items[:0]
+            if len(items) % 2:
+                kept, items = items[-1:], items[:-1]
+            promoted = items[self._rng.integers(2)::2]
+
+            self.levels[level] = kept
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+
+
+class HyperLogLog:
+    """
+    Approximate count of distinct values in bounded memory (Flajolet et al.).
+
+    Args:
+        p (int, optional): Number of bits used to pick a register. The sketch keeps `2**p` registers and
+            its relative error is about `1.04 / sqrt(2**p)`. Defaults to 14.
+    """
+
+    def __init__(self, p: int = 14):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def update(self, values: pd.Series) -> "HyperLogLog":
+        """
+        Adds a chunk of values to the sketch.
+
+        Args:
+            values (pd.Series): The values, without nulls.
+
+        Returns:
+            HyperLogLog: The updated instance.
+        """
+        if len(values) == 0:
+            return self
+        hashes = pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        remainder = (hashes << np.uint64(self.p)) >> np.uint64(12)
+        _, bit_length = np.frexp(remainder.astype(np.float64))
+        rank = (52 - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """
+        Merges another sketch, built with the same `p`, into this instance.
+
+        Args:
+            other (HyperLogLog): The sketch to be merged.
+
+        Returns:
+            HyperLogLog: The updated instance.
+        """
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> int:
+        """
+        Estimates the number of distinct values added to the sketch.
+
+        Returns:
+            int: The estimated number of distinct values.
+        """
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(2.0 ** -self.registers.astype(np.float64))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class FrequentItems:
+    """
+    The most frequent values of a stream in bounded memory (Misra-Gries).
+
+    At most `capacity` counters are kept. Reported counts are lower bounds that undercount each value
+    by at most `n / (capacity + 1)`, and are exact while fewer than `capacity` distinct values were seen.
+
+    Args:
+        capacity (int, optional): The maximum number of counters. Defaults to 100.
+    """
+
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+
+    def update(self, values: pd.Series) -> "FrequentItems":
+        """
+        Adds a chunk of values to the summary.
+
+        Args:
+            values (pd.Series): The values, without nulls.
+
+        Returns:
+            FrequentItems: The updated instance.
+        """
+        return self._combine(values.value_counts(sort=False))
+
+    def merge(self, other: "FrequentItems") -> "FrequentItems":
+        """
+        Merges another summary into this instance.
+
+        Args:
+            other (FrequentItems): The summary to be merged.
+
+        Returns:
+            FrequentItems: The updated instance.
+        """
+        return self._combine(other.counts)
+
+    def most_common(self, n: int | None = None) -> List[Tuple[object, int]]:
+        """
+        Lists the most frequent values.
+
+        Args:
+            n (int, optional): Number of values to be listed. Defaults to all tracked values.
+
+        Returns:
+            List[Tuple[object, int]]: Pairs of value and estimated count, most frequent first.
+        """
+        counts = self.counts.sort_values(ascending=False, kind="stable")
+        if n is not None:
+            counts = counts.head(n)
+        return [(value, int(count)) for value, count in counts.items()]
+
+    def _combine(self, counts: pd.Series) -> "FrequentItems":
+        if len(counts) == 0:
+            return self
+        combined = counts.astype(np.int64) if len(self.counts) == 0 else self.counts.add(counts, fill_value=0)
+        if len(combined) > self.capacity:
+            threshold = combined.nlargest(self.capacity + 1).iloc[-1]
+            combined = combined - threshold
+            combined = combined[combined > 0]
+        self.counts = combined.astype(np.int64)
+        return self
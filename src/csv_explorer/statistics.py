@@ -0,0 +1,199 @@
+import math
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_float_dtype, is_numeric_dtype
+
+from csv_explorer import config
+from csv_explorer.parallel import map_partitions
+from csv_explorer.sketches import FrequentItems, HyperLogLog, KLLSketch, Moments
+from csv_explorer.timing import timed
+
+DESCRIBE_ROWS = ["count", "unique", "top", "freq", "mean", "std", "min", "25%", "50%", "75%", "max"]
+
+QUANTILES = {"25%": 0.25, "50%": 0.5, "75%": 0.75}
+
+
+class ColumnSummary:
+    """
+    Mergeable, bounded-memory summary of a column, built chunk by chunk.
+
+    A column is treated as numeric while every non-null value seen is numeric. Numeric columns keep their
+    moments and a quantile sketch, and every column keeps a distinct count sketch and its most frequent values.
+    Both are fed with the values as strings, whatever their type, so that they still count the values of the
+    numeric chunks when a later chunk turns the column into a non-numeric one. Integral floats are written as
+    integers, as in the CSV text of integer columns read as floats because of their nulls.
+
+    Args:
+        name (str): The name of the column.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.null_count = 0
+        self.is_numeric = True
+        self.moments = Moments()
+        self.quantiles = KLLSketch()
+        self.distinct = HyperLogLog()
+        self.frequent = FrequentItems()
+
+    def update(self, series: pd.Series) -> "ColumnSummary":
+        """
+        Adds a chunk of the column to the summary.
+
+        Args:
+            series (pd.Series): The chunk of the column.
+
+        Returns:
+            ColumnSummary: The updated instance.
+        """
+        values = series.dropna()
+        self.count += len(values)
+        self.null_count += len(series) - len(values)
+
+        if self.is_numeric and len(values) and not (is_numeric_dtype(values) and not is_bool_dtype(values)):
+            self.is_numeric = False
+            self.moments, self.quantiles = Moments(), KLLSketch()
+
+        if self.is_numeric:
+            numbers = values.to_numpy(dtype=np.float64)
+            self.moments.update(numbers)
+            self.quantiles.update(numbers)
+
+        labels = _labels(values)
+        self.distinct.update(labels)
+        self.frequent.update(labels)
+        return self
+
+    def merge(self, other: "ColumnSummary") -> "ColumnSummary":
+        """
+        Merges the summary of another part of the same column into this instance.
+
+        Args:
+            other (ColumnSummary): The summary to be merged.
+
+        Returns:
+            ColumnSummary: The updated instance.
+        """
+        self.count += other.count
+        self.null_count += other.null_count
+        if self.is_numeric and other.is_numeric:
+            self.moments.merge(other.moments)
+            self.quantiles.merge(other.quantiles)
+        self.is_numeric = self.is_numeric and other.is_numeric
+        self.distinct.merge(other.distinct)
+        self.frequent.merge(other.frequent)
+        return self
+
+    def describe(self) -> Dict[str, object]:
+        """
+        Describes the column with the statistics of `pd.DataFrame.describe`.
+
+        Returns:
+            Dict[str, object]: The statistics, keyed by the row labels used by pandas.
+        """
+        row: Dict[str, object] = {"count": float(self.count)}
+
+        if not self.is_numeric:
+            top = self.frequent.most_common(1)
+            row["unique"] = min(self.distinct.estimate(), self.count)
+            row["top"], row["freq"] = top[0] if top else (math.nan, math.nan)
+            return row
+
+        row["mean"] = self.moments.mean if self.moments.count else math.nan
+        row["std"] = self.moments.std
+        row["min"] = self.moments.minimum if self.moments.count else math.nan
+        for label, q in QUANTILES.items():
+            row[label] = self.quantiles.quantile(q)
+        row["max"] = self.moments.maximum if self.moments.count else math.nan
+        return row
+
+
+def summarize_chunks(chunks: Iterable[pd.DataFrame]) -> Dict[str, ColumnSummary]:
+    """
+    Builds the summaries of every column of a stream of DataFrame chunks.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): The chunks, all with the same columns.
+
+    Returns:
+        Dict[str, ColumnSummary]: The summaries, keyed by column name, in the order of the columns.
+    """
+    summaries: Dict[str, ColumnSummary] = {}
+    for chunk in chunks:
+        for name in chunk.columns:
+            summaries.setdefault(name, ColumnSummary(name)).update(chunk[name])
+    return summaries
+
+
+def merge_summaries(parts: Iterable[Dict[str, ColumnSummary]]) -> Dict[str, ColumnSummary]:
+    """
+    Merges the column summaries built over different parts of the same file.
+
+    Args:
+        parts (Iterable[Dict[str, ColumnSummary]]): The summaries of each part, keyed by column name.
+
+    Returns:
+        Dict[str, ColumnSummary]: The summaries of the whole file, keyed by column name.
+    """
+    merged: Dict[str, ColumnSummary] = {}
+    for part in parts:
+        for name, summary in part.items():
+            if name in merged:
+                merged[name].merge(summary)
+            else:
+                merged[name] = summary
+    return merged
+
+
+def describe_summaries(summaries: Dict[str, ColumnSummary]) -> pd.DataFrame:
+    """
+    Formats column summaries as the table returned by `pd.DataFrame.describe(include="all")`.
+
+    Args:
+        summaries (Dict[str, ColumnSummary]): The summaries, keyed by column name.
+
+    Returns:
+        pd.DataFrame: The statistics, one column per summarized column.
+    """
+    described = pd.DataFrame({name: pd.Series(summary.describe(), dtype=object) for name, summary in summaries.items()})
+    rows = [row for row in DESCRIBE_ROWS if row in described.index]
+    return described.reindex(rows)
+
+
+def describe_csv(
+    filepath: str,
+    columns: Optional[List[str]] = None,
+    chunksize: int = config.STATS_CHUNKSIZE,
+    workers: int = config.STATS_WORKERS,
+) -> pd.DataFrame:
+    """
+    Computes descriptive statistics of a CSV file in a single streaming pass with bounded memory.
+
+    The file is split into partitions that are summarized in parallel by `workers` processes, and the
+    partial summaries are merged. Counts, means, standard deviations, minimums and maximums are exact.
+    Quantiles, numbers of unique values and most frequent values are approximated with sketches.
+
+    Args:
+        filepath (str): The path to the CSV file.
+        columns (List[str], optional): The columns to be described. Defaults to all columns.
+        chunksize (int, optional): The number of rows read at a time.
+        workers (int, optional): The number of worker processes.
+
+    Returns:
+        pd.DataFrame: The statistics, in the format of `pd.DataFrame.describe(include="all")`.
+    """
+    with timed("describe_csv"):
+        parts = map_partitions(filepath, summarize_chunks, columns=columns, chunksize=chunksize, workers=workers)
+        return describe_summaries(merge_summaries(parts))
+
+
+def _labels(values: pd.Series) -> pd.Series:
+    labels = values.astype(str)
+    if is_float_dtype(values):
+        numbers = values.to_numpy(dtype=np.float64)
+        integral = (np.abs(numbers) < 2**53) & (numbers == np.round(numbers))
+        labels[integral] = numbers[integral].astype(np.int64).astype(str)
+    return labels
@@ -0,0 +1,265 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from typing import Iterator, List, Optional
+
+from loguru import logger
+from pydantic import BaseModel
+
+from csv_explorer import config
+from csv_explorer.dtypes import dtypes_path
+from csv_explorer.ingestion import UploadInfo, columnar_path, schema_path
+from csv_explorer.profile import profile_path
+
+
+class StoreUsage(BaseModel):
+    """
+    The disk usage of a `DatasetStore`.
+
+    Attributes:
+        datasets (int): The number of stored datasets.
+        referenced (int): The number of datasets in use by at least one session.
+        bytes (int): The size of the datasets and of their derived artifacts.
+        quota_bytes (int): The disk quota of the store.
+    """
+
+    datasets: int
+    referenced: int
+    bytes: int
+    quota_bytes: int
+
+
+class DatasetStore:
+    """
+    A content-addressed store of CSV files, shared by every session and process using the same directory.
+
+    Each dataset is stored once, as `<sha256>.csv`, no matter how many times it is uploaded, so the
+    artifacts derived from it next to the file, such as its columnar copy, schema, dtypes and profile,
+    and the DataFrame cache entries keyed by its path, are computed once and shared by every session.
+    Sessions hold references to the datasets they use, counted in a SQLite index. When the store grows
+    beyond `quota_bytes`, unreferenced datasets are removed with their artifacts, least recently used first.
+    Adding, acquiring and removing datasets each run in one `BEGIN IMMEDIATE` transaction, so a dataset
+    checked or moved in by one process cannot be removed by another before its reference is counted.
+
+    Args:
+        root (str): The directory of the store.
+        quota_bytes (int, optional): The disk quota of the store.
+
+    Example:
+        >>> store = DatasetStore("/tmp/csv_explorer/store")
+        >>> filepath = store.add(write_upload(uploaded_file, directory=store.incoming_dir))
+        >>> ...
+        >>> store.release(upload.sha256)
+    """
+
+    def __init__(self, root: str, quota_bytes: int = config.STORE_QUOTA_BYTES):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.incoming_dir = os.path.join(root, "incoming")
+        self._lock = threading.Lock()
+
+        os.makedirs(self.incoming_dir, exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS datasets ("
+                "sha256 TEXT PRIMARY KEY, refcount INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+
+    def path(self, sha256: str) -> str:
+        """
+        Returns the path of a dataset in the store.
+
+        Args:
+            sha256 (str): The digest of the dataset.
+
+        Returns:
+            str: The path of the CSV file.
+        """
+        if not sha256.isalnum():
+            raise ValueError(f"Identificador de dataset inválido: {sha256}")
+        return os.path.join(self.root, f"{sha256}.csv")
+
+    def __contains__(self, sha256: str) -> bool:
+        return sha256.isalnum() and os.path.exists(self.path(sha256))
+
+    def add(self, upload: UploadInfo, acquire: bool = True) -> str:
+        """
+        Moves an upload into the store, discarding it if the same content is already stored.
+
+        Args:
+            upload (UploadInfo): The upload, written in `incoming_dir` so it can be moved without copying.
+            acquire (bool, optional): Whether to take a reference to the dataset. Defaults to True.
+
+        Returns:
+            str: The path of the dataset in the store.
+        """
+        filepath = self.path(upload.sha256)
+        now = time.time()
+        with self._transaction() as connection:
+            if os.path.exists(filepath):
+                logger.info(f"Dataset {upload.sha256} já está armazenado, descartando a cópia enviada")
+                os.remove(upload.path)
+            else:
+                os.replace(upload.path, filepath)
+            connection.execute(
+                "INSERT INTO datasets (sha256, refcount, created_at, accessed_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (sha256) DO UPDATE SET refcount = refcount + ?, accessed_at = ?",
+                (upload.sha256, int(acquire), now, now, int(acquire), now),
+            )
+        self.collect(keep=upload.sha256)
+        return filepath
+
+    def acquire(self, sha256: str) -> str:
+        """
+        Takes a reference to a stored dataset, so it is not collected while in use.
+
+        Args:
+            sha256 (str): The digest of the dataset.
+
+        Returns:
+            str: The path of the dataset.
+
+        Raises:
+            KeyError: If the dataset is not stored.
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            if sha256 not in self:
+                raise KeyError(sha256)
+            connection.execute(
+                "INSERT INTO datasets (sha256, refcount, created_at, accessed_at) VALUES (?, 1, ?, ?) "
+                "ON CONFLICT (sha256) DO UPDATE SET refcount = refcount + 1, accessed_at = ?",
+                (sha256, now, now, now),
+            )
+        return self.path(sha256)
+
+    def release(self, sha256: str) -> None:
+        """
+        Drops a reference to a dataset, letting it be collected once no session uses it.
+
+        Args:
+            sha256 (str): The digest of the dataset.
+        """
+        with self._transaction() as connection:
+            connection.execute(
+                "UPDATE datasets SET refcount = MAX(refcount - 1, 0), accessed_at = ? WHERE sha256 = ?",
+                (time.time(), sha256),
+            )
+        self.collect()
+
+    def remove(self, sha256: str) -> bool:
+        """
+        Removes a dataset and its artifacts, unless a session uses it.
+
+        Args:
+            sha256 (str): The digest of the dataset.
+
+        Returns:
+            bool: Whether the dataset was removed.
+        """
+        with self._transaction() as connection:
+            row = connection.execute("SELECT refcount FROM datasets WHERE sha256 = ?", (sha256,)).fetchone()
+            if row is not None and row[0] > 0:
+                return False
+            self._remove_artifacts(sha256)
+            connection.execute("DELETE FROM datasets WHERE sha256 = ?", (sha256,))
+        logger.info(f"Dataset {sha256} removido do armazenamento")
+        return True
+
+    def collect(self, keep: Optional[str] = None) -> List[str]:
+        """
+        Removes unreferenced datasets, least recently used first, until the store fits its quota.
+
+        Args:
+            keep (str, optional): The digest of a dataset never removed, such as one just uploaded.
+
+        Returns:
+            List[str]: The digests of the removed datasets.
+        """
+        with self._transaction() as connection:
+            rows = connection.execute("SELECT sha256, refcount FROM datasets ORDER BY accessed_at").fetchall()
+            total = sum(self._size(sha256) for sha256, _ in rows)
+            removed = []
+            for sha256, refcount in rows:
+                if total <= self.quota_bytes:
+                    break
+                if refcount > 0 or sha256 == keep:
+                    continue
+                total -= self._size(sha256)
+                self._remove_artifacts(sha256)
+                removed.append(sha256)
+            connection.executemany("DELETE FROM datasets WHERE sha256 = ?", [(sha256,) for sha256 in removed])
+
+        if removed:
+            logger.info(f"{len(removed)} datasets removidos do armazenamento, {total} bytes em uso")
+        return removed
+
+    def usage(self) -> StoreUsage:
+        """
+        Reports the disk usage of the store.
+
+        Returns:
+            StoreUsage: The number of datasets, how many are in use and their size with their artifacts.
+        """
+        with closing(self._connect()) as connection:
+            rows = connection.execute("SELECT sha256, refcount FROM datasets").fetchall()
+        return StoreUsage(
+            datasets=len(rows),
+            referenced=sum(refcount > 0 for _, refcount in rows),
+            bytes=sum(self._size(sha256) for sha256, _ in rows),
+            quota_bytes=self.quota_bytes,
+        )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock, closing(self._connect()) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.rollback()
+                raise
+            connection.commit()
+
+    def _artifacts(self, sha256: str) -> List[str]:
+        filepath = self.path(sha256)
+        return [
+            filepath,
+            columnar_path(filepath),
+            schema_path(filepath),
+            dtypes_path(filepath),
+            profile_path(filepath),
+        ]
+
+    def _remove_artifacts(self, sha256: str) -> None:
+        for path in self._artifacts(sha256):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _size(self, sha256: str) -> int:
+        return sum(os.path.getsize(path) for path in self._artifacts(sha256) if os.path.exists(path))
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(os.path.join(self.root, "store.sqlite"), timeout=30)
+
+
+_DATASET_STORE: Optional[DatasetStore] = None
+_DATASET_STORE_LOCK = threading.Lock()
+
+
+def get_dataset_store() -> DatasetStore:
+    """
+    Returns the process-wide dataset store, in `config.STORE_DIR`, creating it on first use.
+
+    Returns:
+        DatasetStore: The store.
+    """
+    global _DATASET_STORE
+    with _DATASET_STORE_LOCK:
+        if _DATASET_STORE is None:
+            _DATASET_STORE = DatasetStore(config.STORE_DIR)
+        return _DATASET_STORE
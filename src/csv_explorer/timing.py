@@ -0,0 +1,36 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Generator, Optional
+
+from loguru import logger
+
+from csv_explorer.tracing import Span, span
+
+
+@contextmanager
+def timed(label: str, timings: Optional[Dict[str, float]] = None) -> Generator[Span, None, None]:
+    """
+    Measures the wall-clock time spent inside the `with` block and logs it.
+
+    The block is also traced as a span named `label`, child of the current span, which is yielded so
+    measurements such as rows or bytes can be added to it.
+
+    Args:
+        label (str): The name of the measured stage.
+        timings (Dict[str, float], optional): A dictionary where the elapsed seconds are stored
+            under `label`. Defaults to None.
+
+    Example:
+        >>> timings = {}
+        >>> with timed("reset", timings):
+        >>>     explorer.reset()
+    """
+    start = time.perf_counter()
+    try:
+        with span(label) as current:
+            yield current
+    finally:
+        elapsed = time.perf_counter() - start
+        if timings is not None:
+            timings[label] = elapsed
+        logger.info(f"{label} levou {elapsed:.3f}s")
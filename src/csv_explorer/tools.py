@@ -1,12 +1,18 @@
 import os
 import json
 import uuid
+from typing import List, Optional
 import pandas as pd
 from langchain.agents import tool
+from loguru import logger
 from tabulate import tabulate
-import matplotlib.pyplot as plt
-from langchain_experimental.utilities import PythonREPL
 from csv_explorer_ui.config import PLT_STYLE
+from csv_explorer import config
+from csv_explorer.kernel import kernel_session
+from csv_explorer.inference import infer_column_types
+from csv_explorer.loader import is_loaded, list_columns, load_dataframe
+from csv_explorer.statistics import describe_csv
+from csv_explorer.tracing import span
 from csv_explorer.types import ChatFigureResponse, ChatResponse, ChatDataFrameResponse, ChatPythonREPLResponse
 
 
@@ -46,82 +52,83 @@ def plot_generator(
     if "matplotlib.use('Agg')" not in prefix:
         prefix = "import matplotlib\n" "matplotlib.use('Agg')\n" f"{prefix}"
 
-    if f"pd.read_csv('{csv_filepath}')" not in matplotlib_code:
-        matplotlib_code = f"df = pd.read_csv('{csv_filepath}')\n\n" f"{matplotlib_code}"
-
     if "plt.show()" not in matplotlib_code:
         matplotlib_code = matplotlib_code + "\n" + "plt.show()"
 
     matplotlib_code = prefix + "\n" + matplotlib_code
 
-    try:
-        python_repl = PythonREPL()
-        python_repl.run(matplotlib_code)
-        return ChatFigureResponse(code=matplotlib_code)
-    except Exception as err:
-        return f"[ERROR] Not possible to run 'plot_generator'. Error: {err}"
+    with span("tool.plot_generator", code_chars=len(matplotlib_code)) as tool_span:
+        try:
+            with kernel_session(csv_filepath) as kernel:
+                result = kernel.run(matplotlib_code, capture_figure=True)
+            if result.error:
+                return f"[ERROR] Not possible to run 'plot_generator'. Error: {result.error}"
+            if result.figure is None:
+                return "[ERROR] Not possible to run 'plot_generator'. Error: the code did not create a figure."
+            for reduction in result.reductions:
+                logger.info(f"Dados do gráfico reduzidos: {reduction}")
+            tool_span.set(
+                bytes=len(result.figure),
+                points_before=sum(reduction.n_before for reduction in result.reductions),
+                points_after=sum(reduction.n_after for reduction in result.reductions),
+            )
+            return ChatFigureResponse(code=matplotlib_code, figure=result.figure)
+        except Exception as err:
+            return f"[ERROR] Not possible to run 'plot_generator'. Error: {err}"
 
 
 @tool
-def infer_column_types_of_csv_file(csv_filepath: str) -> ChatResponse:
+def infer_column_types_of_csv_file(csv_filepath: str, columns: Optional[List[str]] = None) -> ChatResponse:
     """
     Infers the types of columns in a CSV file and categorizes them as 'Numeric',
-    'Categorical', 'Boolean', 'Text', or 'Other'.
+    'Categorical', 'Boolean', 'Datetime', 'Text', or 'Other', with the confidence
+    of each inference. Optionally, pass `columns` with only the columns the question
+    is about.
     """
 
-    try:
-        df = pd.read_csv(csv_filepath, nrows=5)
-
-        basic_types = df.dtypes
-        inferred_types = {}
-        for column, dtype in basic_types.items():
-            if dtype == "object" or dtype.name == "category":
-                unique_values = df[column].nunique()
-                if unique_values < 10:
-                    inferred_types[column] = "Categorical"
-                else:
-                    inferred_types[column] = "Text"
-            elif dtype in ["int64", "float64"]:
-                inferred_types[column] = "Numeric"
-            elif dtype == "bool":
-                inferred_types[column] = "Boolean"
-            else:
-                inferred_types[column] = "Other"
-
-        return ChatDataFrameResponse(
-            pd.DataFrame(
-                [t for t in inferred_types.items()],
-                columns=["column", "type"],
-            )
-        )
-    except Exception as err:
-        return f"[ERROR]. Not possible to run 'infer_column_types_of_csv_file'. Error: {err}"
+    with span("tool.infer_column_types_of_csv_file") as tool_span:
+        try:
+            df = infer_column_types(csv_filepath, columns=columns)
+            tool_span.set(rows=len(df))
+            return ChatDataFrameResponse(df)
+        except Exception as err:
+            return f"[ERROR]. Not possible to run 'infer_column_types_of_csv_file'. Error: {err}"
 
 
 @tool
 def get_column_names(csv_filepath: str) -> str:
     """Get a dataframe from csv filepeth and extracts the column names."""
-    try:
-        df = pd.read_csv(csv_filepath, nrows=2)
-        return ", ".join(df.columns)
-    except Exception as err:
-        return f"[ERROR]. Not possible to run 'get_column_names'. Error: {err}"
+    with span("tool.get_column_names") as tool_span:
+        try:
+            names = list_columns(csv_filepath)
+            tool_span.set(columns=len(names))
+            return ", ".join(names)
+        except Exception as err:
+            return f"[ERROR]. Not possible to run 'get_column_names'. Error: {err}"
 
 
 @tool
-def generate_descriptive_statistics(csv_filepath: str) -> ChatResponse:
+def generate_descriptive_statistics(csv_filepath: str, columns: Optional[List[str]] = None) -> ChatResponse:
     """
     Generate a formatted table of descriptive statistics for a given DataFrame from csv path.
     This function calculates descriptive statistics that summarize the central
     tendency, dispersion, and shape of a dataset’s distribution, excluding NaN values.
     It includes statistics like mean, median, mode, standard deviation, and more for
     each column. Can be used to describe the database and get some general insights.
+    Optionally, pass `columns` with only the columns the question is about.
     """
-    try:
-        df = pd.read_csv(csv_filepath).describe(include="all")
-        return ChatDataFrameResponse(df)
-    except Exception as err:
-        return f"[ERROR]. Not possible to run 'generate_descriptive_statistics'. Error: {err}"
+    with span("tool.generate_descriptive_statistics") as tool_span:
+        try:
+            size = os.path.getsize(csv_filepath)
+            streaming = not is_loaded(csv_filepath, columns) and size > config.STATS_STREAMING_THRESHOLD
+            if not streaming:
+                df = load_dataframe(csv_filepath, columns=columns).describe(include="all")
+            else:
+                df = describe_csv(csv_filepath, columns=columns)
+            tool_span.set(bytes=size, streaming=streaming, columns=df.shape[1])
+            return ChatDataFrameResponse(df)
+        except Exception as err:
+            return f"[ERROR]. Not possible to run 'generate_descriptive_statistics'. Error: {err}"
 
 
 @tool
@@ -129,7 +136,8 @@ def python_evaluator(python_code: str, csv_filepath: str) -> ChatResponse:
     """
     Use this tool when you need to perform complex calculations that cannot be derived
     from descriptive statistics. To use this tool, provide a Python code and the CSV
-    file path of the dataframe to be analyzed.
+    file path of the dataframe to be analyzed. The dataframe is already loaded as `df`
+    and variables are kept between calls.
 
     Attention: the `python_code` must have a `print` statement to return the result.
     """
@@ -137,9 +145,11 @@ def python_evaluator(python_code: str, csv_filepath: str) -> ChatResponse:
     if "print(" not in python_code:
         return f"[ERROR] The python code `{python_code}` do no have the statement `print`."
 
-    try:
-        python_repl = PythonREPL()
-        response = python_repl.run(python_code)
-        return ChatPythonREPLResponse(code=python_code, response=response)
-    except Exception as err:
-        return f"[ERROR] Not possible to run 'python_evaluator'. Error: {err}"
+    with span("tool.python_evaluator", code_chars=len(python_code)) as tool_span:
+        try:
+            with kernel_session(csv_filepath) as kernel:
+                result = kernel.run(python_code)
+            tool_span.set(output_chars=len(result.error or result.output), error=bool(result.error))
+            return ChatPythonREPLResponse(code=python_code, response=result.error or result.output)
+        except Exception as err:
+            return f"[ERROR] Not possible to run 'python_evaluator'. Error: {err}"
@@ -0,0 +1,248 @@
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Generator, List, Optional
+
+from loguru import logger
+from pydantic import BaseModel, Field
+
+from csv_explorer import config
+
+SERVICE_NAME = "csv_explorer"
+
+_CURRENT_SPAN: ContextVar[Optional["Span"]] = ContextVar("csv_explorer_current_span", default=None)
+
+_OPEN_TRACES: Dict[str, List["Span"]] = {}
+_FINISHED_TRACES: "OrderedDict[str, List[Span]]" = OrderedDict()
+_TRACES_LOCK = threading.Lock()
+_EXPORT_LOCK = threading.Lock()
+
+
+class Span(BaseModel):
+    """
+    A timed stage of the work of the application, part of a trace.
+
+    Attributes:
+        name (str): The name of the stage.
+        trace_id (str): The id of the trace, shared by the root span and every span under it.
+        span_id (str): The id of the span.
+        parent_id (str, optional): The id of the parent span, or None for the root span of the trace.
+        start_ns (int): When the span started, in nanoseconds since the epoch.
+        end_ns (int, optional): When the span ended, or None while it is open.
+        attributes (Dict[str, Any]): Measurements of the stage, such as rows, bytes and tokens.
+        error (str, optional): The error that ended the span, if any.
+    """
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start_ns: int
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = Field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        """
+        The duration of the span, in seconds, up to now while it is open.
+        """
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def set(self, **attributes: Any) -> "Span":
+        """
+        Adds attributes to the span.
+
+        Args:
+            **attributes: The attributes, with values of type str, int, float or bool.
+
+        Returns:
+            Span: The span.
+        """
+        self.attributes.update(attributes)
+        return self
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        """
+        Ends the span. When the root span of a trace ends, the trace is kept in the recent traces and
+        exported to `config.TRACE_EXPORT_PATH`, if set.
+
+        Args:
+            error (BaseException, optional): The error that ended the span, if any.
+        """
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = repr(error)
+
+        with _TRACES_LOCK:
+            spans = _OPEN_TRACES.get(self.trace_id)
+            if spans is None or self.parent_id is not None:
+                return
+            del _OPEN_TRACES[self.trace_id]
+            _FINISHED_TRACES[self.trace_id] = spans
+            while len(_FINISHED_TRACES) > config.TRACE_HISTORY:
+                _FINISHED_TRACES.popitem(last=False)
+
+        if config.TRACE_EXPORT_PATH:
+            export_trace(spans, config.TRACE_EXPORT_PATH)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """
+        Converts the span to the OpenTelemetry protocol (OTLP) JSON encoding.
+
+        Returns:
+            Dict[str, Any]: The span, as in the `spans` of an OTLP `ScopeSpans`.
+        """
+        otlp = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id is not None:
+            otlp["parentSpanId"] = self.parent_id
+        return otlp
+
+
+def start_span(name: str, parent: Optional[Span] = None, **attributes: Any) -> Span:
+    """
+    Starts a span, without making it the current span. It must be ended with `Span.end`.
+
+    Meant for stages that start and end in different callbacks, such as LLM calls. Use `span` otherwise.
+
+    Args:
+        name (str): The name of the stage.
+        parent (Span, optional): The parent span. Defaults to the current span, or a new trace if there is none.
+        **attributes: The attributes of the span.
+
+    Returns:
+        Span: The span.
+    """
+    parent = parent or _CURRENT_SPAN.get()
+    new = Span(
+        name=name,
+        trace_id=parent.trace_id if parent else secrets.token_hex(16),
+        span_id=secrets.token_hex(8),
+        parent_id=parent.span_id if parent else None,
+        start_ns=time.time_ns(),
+        attributes=attributes,
+    )
+    with _TRACES_LOCK:
+        spans = _OPEN_TRACES.get(new.trace_id)
+        if spans is not None:
+            spans.append(new)
+        elif parent is None:
+            _OPEN_TRACES[new.trace_id] = [new]
+    return new
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Generator[Span, None, None]:
+    """
+    Traces the `with` block as a span, child of the current span, making it the current span inside the block.
+
+    The current span follows the context, so spans opened in threads started with a copy of the
+    context, such as the agent thread of `CSVExplorer.stream`, are children of the span that started them.
+
+    Args:
+        name (str): The name of the stage.
+        **attributes: The attributes of the span. More can be added with `Span.set`.
+
+    Example:
+        >>> with span("load_dataframe", bytes=os.path.getsize(filepath)) as load_span:
+        >>>     df = pd.read_csv(filepath)
+        >>>     load_span.set(rows=len(df))
+    """
+    current = start_span(name, **attributes)
+    token = _CURRENT_SPAN.set(current)
+    try:
+        yield current
+    except BaseException as err:
+        current.end(error=err)
+        raise
+    finally:
+        _CURRENT_SPAN.reset(token)
+        current.end()
+
+
+def current_span() -> Optional[Span]:
+    """
+    Returns the current span.
+
+    Returns:
+        Span | None: The innermost open span of the context, or None if there is none.
+    """
+    return _CURRENT_SPAN.get()
+
+
+def get_trace(trace_id: str) -> Optional[List[Span]]:
+    """
+    Returns the spans of a finished trace, among the last `config.TRACE_HISTORY` traces.
+
+    Args:
+        trace_id (str): The id of the trace.
+
+    Returns:
+        List[Span] | None: The spans, in the order they started, or None if the trace is unknown.
+    """
+    with _TRACES_LOCK:
+        spans = _FINISHED_TRACES.get(trace_id)
+    return sorted(spans, key=lambda item: item.start_ns) if spans is not None else None
+
+
+def to_otlp(spans: List[Span]) -> Dict[str, Any]:
+    """
+    Converts spans to an OTLP `ExportTraceServiceRequest`, in the JSON encoding.
+
+    Args:
+        spans (List[Span]): The spans.
+
+    Returns:
+        Dict[str, Any]: The request, readable by OpenTelemetry collectors and tools.
+    """
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": [item.to_otlp() for item in spans]}],
+            }
+        ]
+    }
+
+
+def export_trace(spans: List[Span], path: str) -> None:
+    """
+    Appends a trace to a file, as one OTLP JSON line, the format of the OpenTelemetry collector file exporter.
+
+    Args:
+        spans (List[Span]): The spans of the trace.
+        path (str): The path of the file.
+    """
+    line = json.dumps(to_otlp(spans), ensure_ascii=False, default=str) + "\n"
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with _EXPORT_LOCK, open(path, "a") as file:
+            file.write(line)
+    except OSError as err:
+        logger.warning(f"Não foi possível exportar o trace para {path}: {err}")
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
@@ -1,9 +1,10 @@
 from abc import ABC, abstractmethod
-import matplotlib
-from matplotlib import pyplot as plt
 from streamlit_chat_handler.types import StreamlitChatElement
 from tabulate import tabulate
 
+from csv_explorer import config
+from csv_explorer.figures import figure_digest, intern_figure
+
 
 class ChatResponse(ABC):
     """
@@ -87,13 +88,20 @@ class ChatDataFrameResponse(ChatResponse):
 
 class ChatFigureResponse(ChatResponse):
     """
-    A chat response that displays a Matplotlib figure.
+    A chat response that displays a Matplotlib figure, rendered once to image bytes.
+
+    The image is kept in the figure cache, keyed by its content hash, so identical figures share their bytes.
 
     Args:
         code (str): The code used to generate the Matplotlib figure.
+        figure (bytes): The figure rendered as an image, as returned by the kernel that ran the code.
+        format (str, optional): The format of the image, 'png' or 'svg'. Defaults to `config.FIGURE_FORMAT`.
     """
-    def __init__(self, code):
+    def __init__(self, code, figure: bytes, format: str = config.FIGURE_FORMAT):
         self.code = code
+        self.image = intern_figure(figure)
+        self.digest = figure_digest(self.image)
+        self.format = format
 
     def __str__(self):
         return f"\n```\n{self.code}\n```\n"
@@ -101,29 +109,28 @@ class ChatFigureResponse(ChatResponse):
     def __repr__(self):
         return f"\n```\n{self.code}\n```\n"
 
-    @property
-    def figure(self) -> matplotlib.figure.Figure:
+    def __setstate__(self, state: dict) -> None:
         """
-        Get the Matplotlib figure.
+        Restore the response from a pickle, sharing the image with the figure cache.
 
-        Returns:
-            matplotlib.figure.Figure: The Matplotlib figure.
+        Args:
+            state (dict): The attributes of the response.
         """
-        fig = plt.gcf()
-        fig.set_facecolor("none")
-        return fig
+        self.__dict__.update(state)
+        self.image = intern_figure(self.image)
 
     def to_element(self) -> StreamlitChatElement:
         """
-        Convert the Matplotlib figure response to a `StreamlitChatElement`.
+        Convert the figure response to a `StreamlitChatElement`, shown with `st.image`.
 
         Returns:
-            StreamlitChatElement: The Matplotlib figure response as a `StreamlitChatElement`.
+            StreamlitChatElement: The figure response as a `StreamlitChatElement`.
         """
         return StreamlitChatElement(
             role="assistant",
-            type="pyplot",
-            content=self.figure,
+            type="image",
+            content=self.image.decode() if self.format == "svg" else self.image,
+            kwargs={"use_column_width": "auto"},
         )
 
 
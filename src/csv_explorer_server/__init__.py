@@ -0,0 +1,2 @@
+from csv_explorer_server.app import create_app, serialize_response
+from csv_explorer_server.pool import ExplorerPool
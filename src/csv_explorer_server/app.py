@@ -0,0 +1,232 @@
+import asyncio
+import base64
+import json
+import os
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from loguru import logger
+from starlette.applications import Starlette
+from starlette.concurrency import iterate_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from csv_explorer.csv_explorer import ChatResponse, CSVExplorer
+from csv_explorer.ingestion import UploadWriter, convert_to_columnar
+from csv_explorer.profile import load_profile
+from csv_explorer.store import DatasetStore
+from csv_explorer_server import config
+from csv_explorer_server.pool import ExplorerPool
+
+EXPLORER_SETTINGS = {"model", "temperature", "agent_type", "memory_k", "use_profile"}
+
+
+class Session:
+    """
+    A conversation with an explorer. Questions of the same session are answered one at a time.
+
+    Args:
+        dataset_id (str): The id of the dataset of the session.
+        explorer (CSVExplorer): The explorer of the session.
+    """
+
+    def __init__(self, dataset_id: str, explorer: CSVExplorer):
+        self.dataset_id = dataset_id
+        self.explorer = explorer
+        self.lock = asyncio.Lock()
+
+
+def create_app(
+    pool_size: int = config.POOL_SIZE,
+    max_sessions: int = config.MAX_SESSIONS,
+    defaults: Optional[Dict[str, Any]] = None,
+) -> Starlette:
+    """
+    Creates the ASGI app that serves `CSVExplorer` over HTTP.
+
+    Datasets are kept in a `DatasetStore` in `config.DATA_DIR`, named by the hash of their content, so every
+    instance behind a load balancer sharing that directory can open them, and each session holds a
+    reference to its dataset until it is closed, as does the pool while it keeps explorers of the dataset warm.
+    Sessions live in the memory of the instance that created them, and their ids start with the instance id,
+    so the load balancer can route them back to it.
+
+    Endpoints:
+        POST /datasets: Uploads a CSV file, sent as the raw request body.
+        POST /sessions: Creates a session, with a JSON body with the `dataset_id` and optional settings.
+        POST /sessions/{session_id}/questions: Answers the `question` of the JSON body. With `?stream=true`,
+            the answer is streamed as newline-delimited JSON events.
+        DELETE /sessions/{session_id}: Closes a session.
+        GET /health: Reports the instance id, the number of sessions and the disk usage of the dataset store.
+
+    Closing a session, explicitly or because it is the least recently used, waits for the question it is
+    answering, if any, before closing its explorer.
+
+    Args:
+        pool_size (int, optional): The number of warm explorers kept per dataset.
+        max_sessions (int, optional): The maximum number of open sessions; the least recently used is closed.
+        defaults (Dict[str, Any], optional): The default settings of the explorers, such as `model`.
+
+    Returns:
+        Starlette: The app.
+    """
+    store = DatasetStore(config.DATA_DIR)
+    pool = ExplorerPool(
+        pool_size,
+        on_track=lambda filepath: store.acquire(_dataset_id(filepath)),
+        on_evict=lambda filepath: store.release(_dataset_id(filepath)),
+        **(defaults or {}),
+    )
+    sessions: "OrderedDict[str, Session]" = OrderedDict()
+    closing: Set[asyncio.Task] = set()
+    instance_id = config.instance_id()
+
+    async def end_session(session: Session) -> None:
+        async with session.lock:
+            await asyncio.to_thread(session.explorer.close)
+        store.release(session.dataset_id)
+
+    async def upload_dataset(request: Request) -> Response:
+        try:
+            with UploadWriter(store.incoming_dir, max_bytes=config.UPLOAD_MAX_BYTES) as writer:
+                async for chunk in request.stream():
+                    writer.write(chunk)
+        except ValueError:
+            return JSONResponse({"error": "Arquivo grande demais."}, status_code=413)
+
+        upload = writer.info
+        filepath = store.add(upload)
+        try:
+            await asyncio.to_thread(_prepare_dataset, filepath)
+        except Exception as err:
+            logger.error(f"Não foi possível preparar o dataset {upload.sha256}: {err!r}")
+            store.release(upload.sha256)
+            store.remove(upload.sha256)
+            return JSONResponse({"error": "Não foi possível processar o arquivo."}, status_code=422)
+        try:
+            pool.warm(filepath)
+        finally:
+            store.release(upload.sha256)
+        return JSONResponse({"dataset_id": upload.sha256, "size": upload.size}, status_code=201)
+
+    async def create_session(request: Request) -> Response:
+        body = await request.json()
+        dataset_id = str(body.get("dataset_id", ""))
+        try:
+            filepath = store.acquire(dataset_id)
+        except KeyError:
+            return JSONResponse({"error": "Dataset não encontrado."}, status_code=404)
+
+        settings = {key: value for key, value in body.items() if key in EXPLORER_SETTINGS}
+        try:
+            explorer = await asyncio.to_thread(pool.acquire, filepath, **settings)
+        except Exception:
+            store.release(dataset_id)
+            raise
+
+        session_id = f"{instance_id}-{uuid.uuid4().hex}"
+        sessions[session_id] = Session(dataset_id, explorer)
+        while len(sessions) > max_sessions:
+            evicted_id, evicted = sessions.popitem(last=False)
+            logger.info(f"Fechando a sessão {evicted_id}, a menos usada recentemente")
+            task = asyncio.create_task(end_session(evicted))
+            closing.add(task)
+            task.add_done_callback(closing.discard)
+        return JSONResponse({"session_id": session_id}, status_code=201)
+
+    async def ask(request: Request) -> Response:
+        session = _get_session(sessions, request.path_params["session_id"])
+        if session is None:
+            return JSONResponse({"error": "Sessão não encontrada."}, status_code=404)
+        question = str((await request.json()).get("question", "")).strip()
+        if not question:
+            return JSONResponse({"error": "Pergunta vazia."}, status_code=400)
+
+        if request.query_params.get("stream", "false").lower() == "true":
+            return StreamingResponse(_stream_answer(session, question), media_type="application/x-ndjson")
+
+        async with session.lock:
+            response = await session.explorer.ainvoke(question)
+        return JSONResponse(serialize_response(response))
+
+    async def close_session(request: Request) -> Response:
+        session = sessions.pop(request.path_params["session_id"], None)
+        if session is None:
+            return JSONResponse({"error": "Sessão não encontrada."}, status_code=404)
+        await end_session(session)
+        return Response(status_code=204)
+
+    async def health(request: Request) -> Response:
+        return JSONResponse(
+            {"instance_id": instance_id, "sessions": len(sessions), "store": store.usage().model_dump()}
+        )
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        yield
+        await asyncio.gather(*closing, *(end_session(session) for session in sessions.values()))
+        sessions.clear()
+        await asyncio.to_thread(pool.close)
+
+    return Starlette(
+        routes=[
+            Route("/datasets", upload_dataset, methods=["POST"]),
+            Route("/sessions", create_session, methods=["POST"]),
+            Route("/sessions/{session_id}/questions", ask, methods=["POST"]),
+            Route("/sessions/{session_id}", close_session, methods=["DELETE"]),
+            Route("/health", health, methods=["GET"]),
+        ],
+        lifespan=lifespan,
+    )
+
+
+def serialize_response(response: ChatResponse) -> Dict[str, Any]:
+    """
+    Converts a `ChatResponse` to JSON, with tables in pandas' `split` format and figures as base64 PNGs
+    or SVG documents.
+
+    Args:
+        response (ChatResponse): The response of the explorer.
+
+    Returns:
+        Dict[str, Any]: The output and the elements of the response.
+    """
+    return {"output": response.output, "elements": [_serialize_element(element) for element in response.elements]}
+
+
+async def _stream_answer(session: Session, question: str) -> AsyncIterator[str]:
+    async with session.lock:
+        async for event in iterate_in_threadpool(session.explorer.stream(question)):
+            if event.type == "response":
+                payload = {"type": "response", **serialize_response(event.content)}
+            else:
+                payload = {"type": event.type, "name": event.name, "content": str(event.content)}
+            yield json.dumps(payload, ensure_ascii=False) + "\n"
+
+
+def _serialize_element(element: Any) -> Dict[str, Any]:
+    if element.type == "dataframe":
+        return {"type": "dataframe", "content": json.loads(element.content.to_json(orient="split", date_format="iso"))}
+    if element.type == "image" and isinstance(element.content, str):
+        return {"type": "image", "format": "svg", "content": element.content}
+    if element.type == "image":
+        return {"type": "image", "format": "png", "content": base64.b64encode(element.content).decode()}
+    return {"type": element.type, "content": str(element.content)}
+
+
+def _get_session(sessions: "OrderedDict[str, Session]", session_id: str) -> Optional[Session]:
+    session = sessions.get(session_id)
+    if session is not None:
+        sessions.move_to_end(session_id)
+    return session
+
+
+def _dataset_id(filepath: str) -> str:
+    return os.path.splitext(os.path.basename(filepath))[0]
+
+
+def _prepare_dataset(filepath: str) -> None:
+    convert_to_columnar(filepath)
+    load_profile(filepath)
@@ -0,0 +1,27 @@
+import os
+import uuid
+
+DATA_DIR = os.environ.get("CSV_EXPLORER_SERVER_DATA_DIR", "/tmp/csv_explorer/datasets")
+
+POOL_SIZE = int(os.environ.get("CSV_EXPLORER_SERVER_POOL_SIZE", 2))
+
+POOL_MAX_DATASETS = int(os.environ.get("CSV_EXPLORER_SERVER_POOL_MAX_DATASETS", 8))
+
+MAX_SESSIONS = int(os.environ.get("CSV_EXPLORER_SERVER_MAX_SESSIONS", 64))
+
+UPLOAD_MAX_BYTES = int(os.environ.get("CSV_EXPLORER_SERVER_UPLOAD_MAX_BYTES", 4 * 1024**3))
+
+_DEFAULT_INSTANCE_ID = uuid.uuid4().hex[:8]
+
+
+def instance_id() -> str:
+    """
+    Returns the id of this server instance, the prefix of the ids of its sessions.
+
+    It is read when called, not on import, so `serve` can set `CSV_EXPLORER_SERVER_INSTANCE_ID` for each
+    worker process after this module was imported.
+
+    Returns:
+        str: The value of `CSV_EXPLORER_SERVER_INSTANCE_ID`, or a random id fixed for the process.
+    """
+    return os.environ.get("CSV_EXPLORER_SERVER_INSTANCE_ID", _DEFAULT_INSTANCE_ID)
@@ -0,0 +1,132 @@
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from csv_explorer.csv_explorer import CSVExplorer
+from csv_explorer_server import config
+
+
+class ExplorerPool:
+    """
+    Keeps `size` warm `CSVExplorer` instances per dataset, with their agent built and their kernel started.
+
+    Acquiring an explorer hands out a warm one, reconfigured with `CSVExplorer.set` when other settings are
+    requested, and refills the pool in a background thread, so new sessions do not wait for a kernel to start.
+    Warm explorers are kept for the `max_datasets` most recently used datasets only; the warm explorers of
+    the least recently used dataset are closed, with their kernels, when another dataset is warmed.
+    `on_track` is called when a dataset starts being kept warm and `on_evict` once its warm explorers are
+    closed, so the owner of the datasets can hold a reference to them meanwhile.
+
+    Args:
+        size (int, optional): The number of warm explorers kept per dataset.
+        max_datasets (int, optional): The number of datasets with warm explorers.
+        on_track (Callable[[str], None], optional): Called with the path of each dataset that starts being
+            kept warm. When it raises, the dataset is not warmed.
+        on_evict (Callable[[str], None], optional): Called with the path of each dataset no longer kept warm.
+        **defaults: The settings the warm explorers are created with, such as `model`.
+    """
+
+    def __init__(
+        self,
+        size: int = config.POOL_SIZE,
+        max_datasets: int = config.POOL_MAX_DATASETS,
+        on_track: Optional[Callable[[str], None]] = None,
+        on_evict: Optional[Callable[[str], None]] = None,
+        **defaults: Any,
+    ):
+        self.size = size
+        self.max_datasets = max_datasets
+        self.on_track = on_track
+        self.on_evict = on_evict
+        self.defaults = defaults
+        self._warm: "OrderedDict[str, List[CSVExplorer]]" = OrderedDict()
+        self._filling: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def warm(self, filepath: str) -> None:
+        """
+        Starts filling the pool of a dataset in the background, making it the most recently used dataset.
+
+        Args:
+            filepath (str): The path to the CSV file.
+        """
+        if self.size <= 0 or self.max_datasets <= 0:
+            return
+        with self._lock:
+            try:
+                evicted = self._track(filepath)
+            except Exception as err:
+                logger.warning(f"Não foi possível aquecer exploradores para {filepath}: {err!r}")
+                return
+            missing = max(self.size - len(self._warm[filepath]) - self._filling[filepath], 0)
+            self._filling[filepath] += missing
+        self._close_datasets(evicted)
+        for _ in range(missing):
+            threading.Thread(target=self._add, args=(filepath,), daemon=True).start()
+
+    def acquire(self, filepath: str, **kwargs: Any) -> CSVExplorer:
+        """
+        Takes an explorer of a dataset out of the pool, creating one if there is no warm explorer.
+
+        Args:
+            filepath (str): The path to the CSV file.
+            **kwargs: The settings of the explorer, such as `model` or `temperature`.
+
+        Returns:
+            CSVExplorer: The explorer, ready to answer.
+        """
+        with self._lock:
+            warm = self._warm.get(filepath)
+            explorer = warm.pop() if warm else None
+        self.warm(filepath)
+
+        if explorer is None:
+            logger.info(f"Nenhum explorador aquecido para {filepath}, criando um novo")
+            return CSVExplorer(filepath, **{**self.defaults, **kwargs})
+        return explorer.set(**kwargs)
+
+    def close(self) -> None:
+        """
+        Closes every warm explorer.
+        """
+        with self._lock:
+            evicted = list(self._warm.items())
+            self._warm.clear()
+        self._close_datasets(evicted)
+
+    def _track(self, filepath: str) -> List[Tuple[str, List[CSVExplorer]]]:
+        if filepath in self._warm:
+            self._warm.move_to_end(filepath)
+            return []
+        if self.on_track is not None:
+            self.on_track(filepath)
+        self._warm[filepath] = []
+        evicted = []
+        while len(self._warm) > self.max_datasets:
+            evicted.append(self._warm.popitem(last=False))
+        return evicted
+
+    def _close_datasets(self, evicted: List[Tuple[str, List[CSVExplorer]]]) -> None:
+        for filepath, explorers in evicted:
+            logger.info(f"Fechando {len(explorers)} exploradores aquecidos de {filepath}")
+            for explorer in explorers:
+                explorer.close()
+            if self.on_evict is not None:
+                self.on_evict(filepath)
+
+    def _add(self, filepath: str) -> None:
+        try:
+            explorer = CSVExplorer(filepath, **self.defaults)
+        except Exception as err:
+            logger.warning(f"Não foi possível aquecer um explorador para {filepath}: {err}")
+            explorer = None
+        with self._lock:
+            self._filling[filepath] = max(self._filling[filepath] - 1, 0)
+            warm = self._warm.get(filepath)
+            if explorer is not None and warm is not None:
+                warm.append(explorer)
+                explorer = None
+        if explorer is not None:
+            explorer.close()
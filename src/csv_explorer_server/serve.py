@@ -0,0 +1,33 @@
+import multiprocessing
+import os
+
+import uvicorn
+
+
+def serve(host: str = "0.0.0.0", port: int = 8000, workers: int = 1) -> None:
+    """
+    Runs the server in `workers` independent processes, listening on consecutive ports from `port`.
+
+    Each process keeps its own sessions, identified by its instance id, so a load balancer in front of the
+    ports must route each session, by the prefix of its id, to the process that created it.
+
+    Args:
+        host (str, optional): The host to bind to. Defaults to "0.0.0.0".
+        port (int, optional): The port of the first process. Defaults to 8000.
+        workers (int, optional): The number of processes. Defaults to 1.
+    """
+    if workers <= 1:
+        _run(host, port)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_run, args=(host, port + index)) for index in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+def _run(host: str, port: int) -> None:
+    os.environ.setdefault("CSV_EXPLORER_SERVER_INSTANCE_ID", f"{port}")
+    uvicorn.run("csv_explorer_server.app:create_app", factory=True, host=host, port=port)
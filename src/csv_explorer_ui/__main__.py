@@ -1,8 +1,13 @@
+from typing import Optional
+
 import typer
 
 from dotenv import load_dotenv
+from tabulate import tabulate
 
 import csv_explorer_ui
+from csv_explorer.batch import read_questions, run_batch
+from csv_explorer_ui.analytics import AnalyticsStore
 
 
 app = typer.Typer()
@@ -10,12 +15,125 @@ app = typer.Typer()
 front_app = typer.Typer()
 app.add_typer(front_app, name="frontend")
 
+server_app = typer.Typer()
+app.add_typer(server_app, name="server")
+
+analytics_app = typer.Typer()
+app.add_typer(analytics_app, name="analytics")
+
 
 @front_app.command()
 def start():
     csv_explorer_ui.run()
 
 
+@server_app.command("start")
+def start_server(host: str = "0.0.0.0", port: int = 8000, workers: int = 1):
+    """
+    Starts the headless HTTP server, in `workers` processes listening on consecutive ports from `port`.
+    Requires the `server` extra.
+    """
+    from csv_explorer_server.serve import serve
+
+    serve(host=host, port=port, workers=workers)
+
+
+@analytics_app.command("latency")
+def analytics_latency(
+    by: str = "model",
+    metric: str = "latency",
+    percentile: float = 0.95,
+    days: Optional[float] = 7.0,
+):
+    """
+    Shows a percentile of the latency, time to first token or tokens of the interactions of the last
+    `days` days, by model, agent_type, session, tools or day. Ingests the new session logs first.
+    """
+    store = _analytics_store()
+    since = days * 24 * 3600 if days else None
+    _echo_frame(store.latency_percentiles(by=by, metric=metric, percentile=percentile, since=since))
+
+
+@analytics_app.command("tools")
+def analytics_tools(limit: int = 10, min_interactions: int = 1, days: Optional[float] = None):
+    """
+    Shows the tool sequences with the lowest average rating. Ingests the new session logs first.
+    """
+    store = _analytics_store()
+    since = days * 24 * 3600 if days else None
+    _echo_frame(store.tool_sequences(limit=limit, min_interactions=min_interactions, since=since))
+
+
+@analytics_app.command("steps")
+def analytics_steps(days: Optional[float] = 7.0):
+    """
+    Shows the mean and maximum duration of the LLM calls and of each tool. Ingests the new session logs first.
+    """
+    store = _analytics_store()
+    _echo_frame(store.step_latencies(since=days * 24 * 3600 if days else None))
+
+
+@analytics_app.command("query")
+def analytics_query(sql: str):
+    """
+    Runs a read-only SQL query over the `interactions` and `steps` tables. Ingests the new session logs first.
+    """
+    _echo_frame(_analytics_store().query(sql))
+
+
+def _analytics_store() -> AnalyticsStore:
+    store = AnalyticsStore()
+    store.ingest()
+    return store
+
+
+def _echo_frame(df) -> None:
+    if df.empty:
+        typer.echo("Nenhuma interação.")
+        return
+    typer.echo(tabulate(df, headers="keys", showindex=False, floatfmt=".3f"))
+
+
+@app.command()
+def batch(
+    csv_filepath: str,
+    questions_filepath: str,
+    output_dir: str = "batch_output",
+    concurrency: int = 4,
+    rate_limit: float = 0.0,
+    model: str = "gpt-3.5-turbo",
+    agent_type: str = "openai-tools",
+    temperature: float = 0.0,
+):
+    """
+    Answers the questions of a file, one per line or a JSON list, about a CSV file and writes the
+    answers, tables and figures to `output_dir`. `rate_limit` is the maximum number of questions
+    started per minute, 0 for no limit.
+    """
+    report = run_batch(
+        csv_filepath,
+        read_questions(questions_filepath),
+        output_dir,
+        concurrency=concurrency,
+        rate_limit=rate_limit,
+        model=model,
+        agent_type=agent_type,
+        temperature=temperature,
+    )
+
+    for result in report.results:
+        status = "erro: " + result.error if result.error else "ok"
+        typer.echo(f"{result.index + 1:>3}. [{result.latency:6.1f}s] {result.question} ({status})")
+    typer.echo(
+        f"\n{len(report.results)} perguntas em {report.elapsed:.1f}s "
+        f"({report.throughput:.1f} perguntas/min, {report.errors} erros)\n"
+        f"Latência: média {report.latency_mean:.1f}s, p50 {report.latency_p50:.1f}s, "
+        f"p95 {report.latency_p95:.1f}s, máx {report.latency_max:.1f}s\n"
+        f"Espera por um explorador: média {report.wait_mean:.1f}s\n"
+        f"Respostas em {output_dir}"
+    )
+
+
 if __name__ == "__main__":
     load_dotenv()
     app()
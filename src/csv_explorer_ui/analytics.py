@@ -0,0 +1,266 @@
+import glob
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Any, Dict, Optional
+
+import pandas as pd
+from loguru import logger
+
+from csv_explorer_ui import config
+
+GROUP_COLUMNS = {
+    "model": "model",
+    "agent_type": "agent_type",
+    "session": "session_id",
+    "tools": "tool_sequence",
+    "day": "date(created_at, 'unixepoch')",
+}
+
+METRIC_COLUMNS = ["latency", "ttft", "prompt_tokens", "completion_tokens"]
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS interactions ("
+    "session_id TEXT NOT NULL, interaction INTEGER NOT NULL, created_at REAL NOT NULL, "
+    "model TEXT, agent_type TEXT, prompt TEXT, output TEXT, tool_sequence TEXT NOT NULL, "
+    "latency REAL, ttft REAL, prompt_tokens INTEGER, completion_tokens INTEGER, rating INTEGER, comment TEXT, "
+    "PRIMARY KEY (session_id, interaction))",
+    "CREATE INDEX IF NOT EXISTS interactions_created_at ON interactions (created_at)",
+    "CREATE INDEX IF NOT EXISTS interactions_model ON interactions (model, created_at)",
+    "CREATE INDEX IF NOT EXISTS interactions_tool_sequence ON interactions (tool_sequence, rating)",
+    "CREATE INDEX IF NOT EXISTS interactions_rating ON interactions (rating)",
+    "CREATE TABLE IF NOT EXISTS steps ("
+    "session_id TEXT NOT NULL, interaction INTEGER NOT NULL, position INTEGER NOT NULL, "
+    "label TEXT NOT NULL, seconds REAL NOT NULL, PRIMARY KEY (session_id, interaction, position))",
+    "CREATE INDEX IF NOT EXISTS steps_label ON steps (label)",
+    "CREATE TABLE IF NOT EXISTS sources (path TEXT PRIMARY KEY, offset INTEGER NOT NULL)",
+]
+
+
+class AnalyticsStore:
+    """
+    An indexed SQLite store of the interactions of every session, built from the session logs.
+
+    Each interaction is one row, with its prompt, output, tool sequence, latency, tokens, rating and
+    comment, and the duration of each LLM call and tool run is a row of `steps`. `ingest` reads only the
+    bytes appended to the logs since the last ingestion, so queries never scan the log files.
+
+    Args:
+        path (str, optional): The path of the SQLite database. Defaults to `config.ANALYTICS_PATH`.
+
+    Example:
+        >>> store = AnalyticsStore()
+        >>> store.ingest(config.LOGS_PATH)
+        >>> store.latency_percentiles(by="model", since=7 * 24 * 3600, percentile=0.95)
+    """
+
+    def __init__(self, path: str = config.ANALYTICS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            for statement in _SCHEMA:
+                connection.execute(statement)
+
+    def ingest(self, logs_path: str = config.LOGS_PATH) -> int:
+        """
+        Adds the records appended to the session logs since the last ingestion.
+
+        Args:
+            logs_path (str, optional): The directory of the session logs. Defaults to `config.LOGS_PATH`.
+
+        Returns:
+            int: The number of records read.
+        """
+        n_records = 0
+        with self._lock, closing(self._connect()) as connection, connection:
+            offsets = dict(connection.execute("SELECT path, offset FROM sources").fetchall())
+            for filepath in sorted(glob.glob(os.path.join(logs_path, "session_*.jsonl"))):
+                key = os.path.abspath(filepath)
+                offset = offsets.get(key, 0)
+                if os.path.getsize(filepath) < offset:
+                    offset = 0
+                if os.path.getsize(filepath) == offset:
+                    continue
+
+                session_id = os.path.basename(filepath)[len("session_") : -len(".jsonl")]
+                with open(filepath, "rb") as file:
+                    file.seek(offset)
+                    for line in file:
+                        if not line.endswith(b"\n"):
+                            break
+                        offset += len(line)
+                        try:
+                            record = json.loads(line)
+                        except ValueError as err:
+                            logger.warning(f"Registro inválido em {filepath}: {err}")
+                            continue
+                        self._add_record(connection, session_id, record)
+                        n_records += 1
+                connection.execute(
+                    "INSERT INTO sources (path, offset) VALUES (?, ?) ON CONFLICT (path) DO UPDATE SET offset = ?",
+                    (key, offset, offset),
+                )
+
+        if n_records:
+            logger.info(f"{n_records} registros de log adicionados à base de análise")
+        return n_records
+
+    def latency_percentiles(
+        self,
+        by: str = "model",
+        metric: str = "latency",
+        percentile: float = 0.95,
+        since: Optional[float] = None,
+    ) -> pd.DataFrame:
+        """
+        Computes a percentile of a metric of the interactions, by group, with the nearest-rank method.
+
+        Args:
+            by (str, optional): The grouping: 'model', 'agent_type', 'session', 'tools' or 'day'.
+                Defaults to 'model'.
+            metric (str, optional): The metric: 'latency', 'ttft', 'prompt_tokens' or 'completion_tokens'.
+                Defaults to 'latency'.
+            percentile (float, optional): The percentile, between 0 and 1. Defaults to 0.95.
+            since (float, optional): Only interactions of the last `since` seconds are considered.
+
+        Returns:
+            pd.DataFrame: The columns `group`, `interactions`, `mean` and `percentile`, by group.
+        """
+        group = self._group_column(by)
+        if metric not in METRIC_COLUMNS:
+            raise ValueError(f"Métrica não suportada: {metric}. Use uma de {METRIC_COLUMNS}.")
+        if not 0 < percentile <= 1:
+            raise ValueError(f"O percentil deve estar entre 0 e 1, não {percentile}.")
+
+        query = (
+            f"WITH ranked AS (SELECT {group} AS grp, {metric} AS value, "
+            f"ROW_NUMBER() OVER (PARTITION BY {group} ORDER BY {metric}) AS position, "
+            f"COUNT(*) OVER (PARTITION BY {group}) AS total "
+            f"FROM interactions WHERE {metric} IS NOT NULL AND created_at >= ?) "
+            "SELECT grp AS 'group', total AS interactions, AVG(value) AS mean, "
+            "MIN(CASE WHEN position >= total * ? - 1e-9 THEN value END) AS percentile "
+            "FROM ranked GROUP BY grp ORDER BY percentile DESC"
+        )
+        return self._query(query, (self._since(since), percentile))
+
+    def tool_sequences(
+        self,
+        limit: int = 10,
+        min_interactions: int = 1,
+        since: Optional[float] = None,
+    ) -> pd.DataFrame:
+        """
+        Lists the tool sequences of the rated interactions, lowest average rating first.
+
+        Args:
+            limit (int, optional): The number of sequences. Defaults to 10.
+            min_interactions (int, optional): The minimum number of rated interactions of a sequence.
+                Defaults to 1.
+            since (float, optional): Only interactions of the last `since` seconds are considered.
+
+        Returns:
+            pd.DataFrame: The columns `tool_sequence`, `interactions`, `mean_rating` and `mean_latency`.
+        """
+        query = (
+            "SELECT tool_sequence, COUNT(*) AS interactions, AVG(rating) AS mean_rating, "
+            "AVG(latency) AS mean_latency FROM interactions "
+            "WHERE rating IS NOT NULL AND created_at >= ? GROUP BY tool_sequence "
+            "HAVING COUNT(*) >= ? ORDER BY mean_rating, interactions DESC LIMIT ?"
+        )
+        return self._query(query, (self._since(since), min_interactions, limit))
+
+    def step_latencies(self, since: Optional[float] = None) -> pd.DataFrame:
+        """
+        Summarizes the duration of the LLM calls and of each tool.
+
+        Args:
+            since (float, optional): Only interactions of the last `since` seconds are considered.
+
+        Returns:
+            pd.DataFrame: The columns `label`, `runs`, `mean` and `max`, slowest on average first.
+        """
+        query = (
+            "SELECT label, COUNT(*) AS runs, AVG(seconds) AS mean, MAX(seconds) AS max FROM steps "
+            "JOIN interactions USING (session_id, interaction) WHERE created_at >= ? "
+            "GROUP BY label ORDER BY mean DESC"
+        )
+        return self._query(query, (self._since(since),))
+
+    def query(self, sql: str, parameters: tuple = ()) -> pd.DataFrame:
+        """
+        Runs a read-only SQL query over the `interactions` and `steps` tables.
+
+        Args:
+            sql (str): The query.
+            parameters (tuple, optional): The parameters of the query.
+
+        Returns:
+            pd.DataFrame: The result.
+        """
+        return self._query(sql, parameters, read_only=True)
+
+    def _add_record(self, connection: sqlite3.Connection, session_id: str, record: Dict[str, Any]) -> None:
+        if record.get("event") == "rating":
+            connection.execute(
+                "UPDATE interactions SET rating = ?, comment = ? WHERE session_id = ? AND interaction = ?",
+                (record.get("rating"), record.get("comment"), session_id, record["interaction"]),
+            )
+            return
+        if record.get("event") != "interaction":
+            return
+
+        tools = [tool for tool in record.get("tools", []) if tool]
+        connection.execute(
+            "INSERT OR REPLACE INTO interactions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                session_id,
+                record["interaction"],
+                record.get("time", time.time()),
+                record.get("model"),
+                record.get("agent_type"),
+                record.get("prompt"),
+                record.get("output"),
+                " > ".join(tools),
+                record.get("latency"),
+                record.get("ttft"),
+                record.get("prompt_tokens"),
+                record.get("completion_tokens"),
+                record.get("rating"),
+                record.get("comment"),
+            ),
+        )
+        connection.execute(
+            "DELETE FROM steps WHERE session_id = ? AND interaction = ?", (session_id, record["interaction"])
+        )
+        connection.executemany(
+            "INSERT INTO steps VALUES (?, ?, ?, ?, ?)",
+            [
+                (session_id, record["interaction"], position, label, seconds)
+                for position, (label, seconds) in enumerate(record.get("steps", []))
+            ],
+        )
+
+    def _query(self, sql: str, parameters: tuple, read_only: bool = False) -> pd.DataFrame:
+        uri = f"file:{os.path.abspath(self.path)}?mode=ro" if read_only else None
+        connection = sqlite3.connect(uri, uri=True, timeout=30) if uri else self._connect()
+        with closing(connection):
+            return pd.read_sql_query(sql, connection, params=parameters)
+
+    @staticmethod
+    def _group_column(by: str) -> str:
+        if by not in GROUP_COLUMNS:
+            raise ValueError(f"Agrupamento não suportado: {by}. Use um de {list(GROUP_COLUMNS)}.")
+        return GROUP_COLUMNS[by]
+
+    @staticmethod
+    def _since(since: Optional[float]) -> float:
+        return time.time() - since if since is not None else 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
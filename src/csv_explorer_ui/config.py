@@ -29,4 +29,18 @@ if not os.path.exists(LOGS_PATH):
 ICON_ALERT = "🚨"
 ICON_HIGH_TEMPERATURE = "🌡️"
 ICON_ERROR = "❌"
-ICON_SUCCESS = "✅"
\ No newline at end of file
+ICON_SUCCESS = "✅"
+
+MAX_SESSIONS = int(os.environ.get("CSV_EXPLORER_MAX_SESSIONS", 100))
+
+SESSION_IDLE_TIMEOUT = float(os.environ.get("CSV_EXPLORER_SESSION_IDLE_TIMEOUT", 3600))
+
+HISTORY_TURNS = int(os.environ.get("CSV_EXPLORER_HISTORY_TURNS", 10))
+
+LOG_FLUSH_INTERVAL = float(os.environ.get("CSV_EXPLORER_LOG_FLUSH_INTERVAL", 1.0))
+
+LOG_DATAFRAME_ROWS = int(os.environ.get("CSV_EXPLORER_LOG_DATAFRAME_ROWS", 20))
+
+ANALYTICS_PATH = os.environ.get("CSV_EXPLORER_ANALYTICS_PATH", os.path.join(LOGS_PATH, "analytics.sqlite"))
+
+DEBUG_PANEL = os.environ.get("CSV_EXPLORER_DEBUG_PANEL", "0") == "1"
@@ -0,0 +1,61 @@
+from typing import List
+
+import pandas as pd
+import streamlit as st
+
+from csv_explorer.tracing import Span
+
+
+def debug_panel() -> None:
+    """
+    Renders, in the sidebar, the timeline of the spans of the last turn of the session.
+
+    The trace of the last rerun that answered a prompt is kept in `st.session_state["last_turn_trace"]`.
+    """
+    spans = st.session_state.get("last_turn_trace")
+    with st.sidebar.expander("Depuração: última interação", expanded=False):
+        if not spans:
+            st.caption("Nenhuma interação ainda.")
+            return
+
+        timeline = timeline_frame(spans)
+        total = spans[0].duration * 1000
+        st.caption(f"{len(spans)} etapas em {total:.0f} ms")
+        st.dataframe(
+            timeline,
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "duração (ms)": st.column_config.ProgressColumn(
+                    "duração (ms)", format="%.0f", min_value=0, max_value=max(total, 1.0)
+                ),
+            },
+        )
+
+
+def timeline_frame(spans: List[Span]) -> pd.DataFrame:
+    """
+    Builds the timeline of a trace, with one row per span, in the order they started.
+
+    Args:
+        spans (List[Span]): The spans of the trace, the root span first.
+
+    Returns:
+        pd.DataFrame: The columns `etapa`, indented by depth, `início (ms)`, from the start of the root
+            span, `duração (ms)` and `atributos`.
+    """
+    depths = {}
+    rows = []
+    for item in spans:
+        depth = depths.get(item.parent_id, -1) + 1
+        depths[item.span_id] = depth
+        attributes = ", ".join(f"{key}={value}" for key, value in item.attributes.items())
+        rows.append(
+            {
+                "etapa": " " * depth + item.name + (" ❌" if item.error else ""),
+                "início (ms)": (item.start_ns - spans[0].start_ns) / 1e6,
+                "duração (ms)": item.duration * 1000,
+                "atributos": attributes,
+            }
+        )
+    return pd.DataFrame(rows)
@@ -1,10 +1,13 @@
-import tempfile
-
 from loguru import logger
 import pydantic
 import streamlit as st
 import pandas as pd
 from csv_explorer.csv_explorer import CSVExplorer
+from csv_explorer.ingestion import convert_to_columnar, write_upload
+from csv_explorer.loader import read_head
+from csv_explorer.profile import load_profile
+from csv_explorer.store import get_dataset_store
+from csv_explorer.tracing import span
 from csv_explorer_ui import config
 from streamlit_chat_handler.types import StreamlitChatElement
 
@@ -29,54 +32,80 @@ def is_in_dialog_flow():
 def prepare_csv():
     logger.info("Preparing CSV file...")
     rendered = st.session_state["chat_handler"].rendered_elements
-    st.session_state["chat_handler"].append(
+    chat_handler = st.session_state["chat_handler"]
+    upload_id = rendered["file_upload"].file_id
+    if st.session_state.get("csv_failed_upload") == upload_id:
+        st.error("Não foi possível processar o arquivo. Envie outro arquivo.", icon=config.ICON_ALERT)
+        return
+
+    store = get_dataset_store()
+    upload = write_upload(rendered["file_upload"], directory=store.incoming_dir)
+    csv_filepath = store.add(upload)
+    logger.info(f"Armazenamento de datasets: {store.usage()}")
+
+    live = chat_handler.start_live()
+    try:
+        head = read_head(csv_filepath, 10)
+        chat_handler.update_live(live, head, type="dataframe")
+        with st.spinner("Processando..."):
+            convert_to_columnar(csv_filepath)
+            load_profile(csv_filepath)
+    except Exception as err:
+        logger.exception(f"Não foi possível preparar o arquivo {csv_filepath}: {err}")
+        store.release(upload.sha256)
+        st.session_state["csv_failed_upload"] = upload_id
+        st.error(f"Não foi possível processar o arquivo: {err}", icon=config.ICON_ALERT)
+        return
+    finally:
+        chat_handler.end_live(live)
+
+    st.session_state["csv_filepath"] = csv_filepath
+    st.session_state["csv_sha256"] = upload.sha256
+    chat_handler.resources["dataset"] = upload.sha256
+
+    chat_handler.append(
         role="user",
         content="Arquivo carregado.",
         type="markdown",
         render=True,
     )
     _add_instructions()
-    
-    with st.spinner("Processando..."):
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as tmp_file:
-            tmp_file.write(rendered["file_upload"].getvalue())
-            st.session_state["csv_filepath"] = tmp_file.name
-
-        elements = [
-            StreamlitChatElement(
-                role="assistant",
-                type="markdown",
-                content="Aqui estão as primeiras linhas do dataframe:",
-            ),
-
-            StreamlitChatElement(
-                role="assistant",
-                type="dataframe",
-                content=pd.read_csv(st.session_state["csv_filepath"]).head(10),
-            ),
-
-            StreamlitChatElement(
-                role="assistant",
-                type="markdown",
-                content="O que você gostaria de saber sobre esse dataframe?",
-                index="csv_prepared",
-            ),
-        ]
-        st.session_state["chat_handler"].append_multiple(elements, render=True)
-        st.toast("✔️ Arquivo carregado.")
-        st.rerun()
+    preview = [
+        StreamlitChatElement(
+            role="assistant",
+            type="markdown",
+            content="Aqui estão as primeiras linhas do dataframe:",
+        ),
+
+        StreamlitChatElement(
+            role="assistant",
+            type="dataframe",
+            content=head,
+        ),
+    ]
+    chat_handler.append_multiple(preview, render=True)
+    chat_handler.append(
+        role="assistant",
+        type="markdown",
+        content="O que você gostaria de saber sobre esse dataframe?",
+        index="csv_prepared",
+    )
+    st.toast("✔️ Arquivo carregado.")
+    st.rerun()
 
 
 def set_explorer():
 
     try:
-        if "explorer" not in st.session_state:
-            st.session_state["explorer"] = CSVExplorer(
-                filepath=st.session_state["csv_filepath"],
-                model=st.session_state.get("model", "gpt-3.5-turbo"),
-                temperature=st.session_state.get("temperature", 0.0),
-                memory_k=st.session_state.get("memory_k", 10),
-            )
+        with span("set_explorer", created="explorer" not in st.session_state):
+            if "explorer" not in st.session_state:
+                st.session_state["explorer"] = CSVExplorer(
+                    filepath=st.session_state["csv_filepath"],
+                    model=st.session_state.get("model", "gpt-3.5-turbo"),
+                    temperature=st.session_state.get("temperature", 0.0),
+                    memory_k=st.session_state.get("memory_k", 10),
+                )
+                st.session_state["chat_handler"].resources["explorer"] = st.session_state["explorer"]
 
     except pydantic.v1.error_wrappers.ValidationError:
 
@@ -1,12 +1,17 @@
+import time
 import traceback
+from typing import List, Tuple
+
 import openai
 from pydantic import BaseModel
 import streamlit as st
 from loguru import logger
-from langchain_community.callbacks.streamlit import StreamlitCallbackHandler
 
+from csv_explorer.callbacks import TimingCallbackHandler
 from csv_explorer.csv_explorer import ChatResponse
+from csv_explorer.tracing import Span, get_trace, span
 from csv_explorer_ui import config
+from csv_explorer_ui.elements.debug import debug_panel
 from csv_explorer_ui.elements.settings import initiate_session_state, page_config
 from csv_explorer_ui.elements.sidebar import sidebar
 from csv_explorer_ui.elements.flow import (
@@ -16,7 +21,7 @@ from csv_explorer_ui.elements.flow import (
     set_explorer,
     was_csv_just_uploaded,
 )
-from csv_explorer_ui.utils import persist_logs
+from csv_explorer_ui.utils import log_interaction
 
 
 class InteractionStep(BaseModel):
@@ -28,12 +33,27 @@ class InteractionStep(BaseModel):
         response (ChatResponse): The response generated by the system to the prompt.
         rating (int, optional): The rating given by the user for the interaction step, if any.
         comment (str, optional): A comment provided by the user for the interaction step, if any.
+        ttft (float, optional): The time, in seconds, until the first token of the response was shown.
+        latency (float, optional): The time, in seconds, until the whole response was received.
+        model (str, optional): The LLM model that answered.
+        agent_type (str, optional): The type of the agent that answered.
+        steps (List[Tuple[str, float]]): The duration, in seconds, of each LLM call (`llm`) and tool run
+            (`tool.<name>`) of the agent, in the order they finished.
+        prompt_tokens (int, optional): The prompt tokens of every LLM call, if reported by the model.
+        completion_tokens (int, optional): The completion tokens of every LLM call, if reported by the model.
     """
 
     prompt: str
     response: ChatResponse
     rating: int | None = None
     comment: str | None = None
+    ttft: float | None = None
+    latency: float | None = None
+    model: str | None = None
+    agent_type: str | None = None
+    steps: List[Tuple[str, float]] = []
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
 
 
 def front():
@@ -46,6 +66,25 @@ def front():
     It checks if a CSV file is missing, if a new CSV file has been uploaded, and if the
     application is in the dialog flow. Based on these conditions, it renders the appropriate
     UI elements and handles user input and responses.
+
+    Each rerun is traced as a `streamlit.rerun` span. The trace of the last rerun that answered a
+    prompt is shown in the debug panel, when `config.DEBUG_PANEL` is set.
+    """
+    with span("streamlit.rerun") as rerun_span:
+        _front(rerun_span)
+
+    if "interaction" in rerun_span.attributes:
+        st.session_state["last_turn_trace"] = get_trace(rerun_span.trace_id)
+    if config.DEBUG_PANEL:
+        debug_panel()
+
+
+def _front(rerun_span: Span) -> None:
+    """
+    Runs one rerun of the UI, recording the interaction it answered, if any, in `rerun_span`.
+
+    Args:
+        rerun_span (Span): The span of the rerun.
     """
     page_config(layout="centered", sidebar="auto")
     initiate_session_state()
@@ -66,11 +105,13 @@ def front():
         prompt = st.chat_input("Digite aqui...")
         if prompt and ("explorer" in st.session_state):
             st.session_state.counter += 1
+            rerun_span.set(session_id=st.session_state["session_id"], interaction=st.session_state.counter)
             _render_user_prompt(prompt)
             try:
-                response = _generate_response(prompt)
-                _set_interaction_metadata(prompt, response)
-                persist_logs()
+                timing, start = TimingCallbackHandler(), time.perf_counter()
+                response = _generate_response(prompt, timing)
+                _set_interaction_metadata(prompt, response, timing, latency=time.perf_counter() - start)
+                log_interaction(st.session_state.counter)
                 _render_assistant_response(response)
 
             except KeyError as err:
@@ -119,18 +160,36 @@ def _render_user_prompt(prompt):
     )
 
 
-def _generate_response(prompt: str) -> ChatResponse:
+def _generate_response(prompt: str, timing: TimingCallbackHandler) -> ChatResponse:
     """
     Generates a response for the given user prompt using the CSV Explorer's API.
 
+    The answer is streamed into a live chat element as it is generated, showing the tools being run,
+    and the live element is removed once the final response is ready to be rendered.
+
     Args:
         prompt (str): The user's input prompt.
+        timing (TimingCallbackHandler): The handler recording the steps and tokens of the agent.
 
     Returns:
         ChatResponse: The response object containing elements to be rendered.
     """
-    callbacks = [StreamlitCallbackHandler(st.container(), expand_new_thoughts=True)]
-    response = st.session_state["explorer"].invoke(prompt, callbacks=callbacks)
+    chat_handler = st.session_state["chat_handler"]
+    live_index = chat_handler.start_live(role="assistant")
+    text, response = "", None
+    try:
+        for event in st.session_state["explorer"].stream(prompt, callbacks=[timing]):
+            if event.type == "token":
+                text += event.content
+                chat_handler.update_live(live_index, text + "▌")
+            elif event.type == "tool_start":
+                text = ""
+                chat_handler.update_live(live_index, f"Executando `{event.name}`...")
+            elif event.type == "response":
+                response = event.content
+    finally:
+        chat_handler.end_live(live_index)
+
     logger.info(f"Recebendo a resposta {response}")
     return response
 
@@ -146,7 +205,9 @@ def _render_assistant_response(response: ChatResponse) -> None:
     st.session_state["chat_handler"].append_multiple(response.elements, render=True)
 
 
-def _set_interaction_metadata(prompt: str, response: ChatResponse) -> None:
+def _set_interaction_metadata(
+    prompt: str, response: ChatResponse, timing: TimingCallbackHandler, latency: float
+) -> None:
     """
     Set the interaction metadata in the session state.
 
@@ -156,6 +217,8 @@ def _set_interaction_metadata(prompt: str, response: ChatResponse) -> None:
     Args:
         prompt (str): The prompt for the current interaction step.
         response (ChatResponse): The response object for the current interaction step.
+        timing (TimingCallbackHandler): The handler that recorded the steps and tokens of the interaction.
+        latency (float): The time, in seconds, until the whole response was received.
     """
     logger.info(f"Formatando os metadadaos da interação")
 
@@ -173,8 +236,20 @@ def _set_interaction_metadata(prompt: str, response: ChatResponse) -> None:
         rating = None
         comment = None
 
+    explorer = st.session_state["explorer"]
+    has_tokens = timing.prompt_tokens or timing.completion_tokens
     metadata = InteractionStep(
-        prompt=prompt, response=response, rating=rating, comment=comment
+        prompt=prompt,
+        response=response,
+        rating=rating,
+        comment=comment,
+        ttft=explorer.timings.get("invoke.ttft"),
+        latency=latency,
+        model=explorer.model,
+        agent_type=explorer.agent_type,
+        steps=timing.events,
+        prompt_tokens=timing.prompt_tokens if has_tokens else None,
+        completion_tokens=timing.completion_tokens if has_tokens else None,
     )
     st.session_state.interactions[st.session_state.counter] = metadata
 
@@ -1,12 +1,48 @@
 from collections import OrderedDict
 import uuid
 import streamlit as st
+from loguru import logger
 from streamlit_chat_handler import StreamlitChatHandler
 
+from csv_explorer.store import get_dataset_store
 from csv_explorer_ui import config
 
+StreamlitChatHandler.registry.max_sessions = config.MAX_SESSIONS
+StreamlitChatHandler.registry.idle_timeout = config.SESSION_IDLE_TIMEOUT
+StreamlitChatHandler.history_size = config.HISTORY_TURNS
+
+
+@StreamlitChatHandler.registry.on_evict
+def release_session(session_id: str, chat_handler: StreamlitChatHandler) -> None:
+    """
+    Release the resources of an evicted session: its explorer, with its Python kernel, and its
+    reference to its dataset, which the dataset store removes once no session uses it.
+
+    The session may be answering a question in its own script thread; `CSVExplorer.close` then lets the
+    answer finish and terminates the kernel when it returns.
+    """
+    explorer = chat_handler.resources.pop("explorer", None)
+    if explorer is not None:
+        explorer.close()
+
+    dataset = chat_handler.resources.pop("dataset", None)
+    if dataset is not None:
+        get_dataset_store().release(dataset)
+
+    chat_handler.elements.clear()
+    chat_handler.rendered_elements.clear()
+    chat_handler.interactions.clear()
+
 
 def initiate_session_state() -> None:
+    if "chat_handler" in st.session_state:
+        if StreamlitChatHandler.registry.get(st.session_state["session_id"]) is None:
+            logger.info(f"A sessão {st.session_state['session_id']} expirou, reiniciando")
+            st.session_state.clear()
+        else:
+            usage = st.session_state["chat_handler"].memory_usage()
+            logger.debug(f"Memória da sessão {st.session_state['session_id']}: {usage}")
+
     if "session_id" not in st.session_state:
         st.session_state["session_id"] = uuid.uuid4().hex
 
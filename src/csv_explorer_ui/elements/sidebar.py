@@ -18,7 +18,7 @@ def update_model():
 def update_temperature():
     if ("model" in st.session_state) and ("explorer" in st.session_state):
         st.session_state["explorer"].set(
-            temperature=str(st.session_state["temperature"])
+            temperature=float(st.session_state["temperature"])
         )
         st.session_state["chat_handler"].append(
             role="user",
@@ -29,7 +29,7 @@ def update_temperature():
 
 def update_memory_k():
     if ("model" in st.session_state) and ("explorer" in st.session_state):
-        st.session_state["explorer"].set(memory_k=str(st.session_state["memory_k"]))
+        st.session_state["explorer"].set(memory_k=int(st.session_state["memory_k"]))
         st.session_state["chat_handler"].append(
             role="user",
             content=f"Janela de memória foi alterada para {st.session_state['memory_k']} passos",
@@ -0,0 +1,198 @@
+import atexit
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+from loguru import logger
+
+from csv_explorer_ui import config
+
+_CLOSE = object()
+
+
+class LogWriter:
+    """
+    Appends JSON records to log files from a background thread.
+
+    Records are queued by `write` and serialized by the writer thread, which waits up to
+    `flush_interval` seconds for more records and appends each batch to its files at once, so logging
+    never blocks the caller. The queue is drained when the interpreter exits.
+
+    Args:
+        flush_interval (float, optional): How long, in seconds, records are buffered before being written.
+            Defaults to `config.LOG_FLUSH_INTERVAL`.
+
+    Example:
+        >>> writer = LogWriter()
+        >>> writer.write("logs/session.jsonl", {"event": "rating", "interaction": 1, "rating": 5})
+    """
+
+    def __init__(self, flush_interval: float = config.LOG_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="csv-explorer-logs", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, path: str, record: Dict[str, Any]) -> None:
+        """
+        Queues a record to be appended to a log file, as one JSON line.
+
+        Args:
+            path (str): The path of the log file.
+            record (Dict[str, Any]): The record. It must not be changed after being queued.
+        """
+        self._queue.put((path, record))
+
+    def flush(self) -> None:
+        """
+        Waits until every queued record is written.
+        """
+        self._queue.join()
+
+    def close(self) -> None:
+        """
+        Writes the queued records and stops the writer thread.
+        """
+        if self._thread.is_alive():
+            self._queue.put(_CLOSE)
+            self._thread.join()
+
+    def _run(self) -> None:
+        closing = False
+        while not closing:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while batch[-1] is not _CLOSE and (timeout := deadline - time.monotonic()) > 0:
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            closing = batch[-1] is _CLOSE
+            records = [item for item in batch if item is not _CLOSE]
+            try:
+                self._append(records)
+            except Exception as err:
+                logger.error(f"Não foi possível persistir {len(records)} registros de log: {err!r}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    @staticmethod
+    def _append(records: List[Tuple[str, Dict[str, Any]]]) -> None:
+        lines = defaultdict(list)
+        for path, record in records:
+            lines[path].append(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        for path, path_lines in lines.items():
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "a") as file:
+                file.writelines(path_lines)
+
+
+_LOG_WRITER: Optional[LogWriter] = None
+_LOG_WRITER_LOCK = threading.Lock()
+
+
+def get_log_writer() -> LogWriter:
+    """
+    Returns the process-wide log writer, starting it on first use.
+
+    Returns:
+        LogWriter: The log writer.
+    """
+    global _LOG_WRITER
+    with _LOG_WRITER_LOCK:
+        if _LOG_WRITER is None:
+            _LOG_WRITER = LogWriter()
+        return _LOG_WRITER
+
+
+def session_log_path(session_id: str) -> str:
+    """
+    Returns the path of the log of a session.
+
+    Args:
+        session_id (str): The id of the session.
+
+    Returns:
+        str: The path of the JSONL file in `config.LOGS_PATH`.
+    """
+    return os.path.join(config.LOGS_PATH, f"session_{session_id}.jsonl")
+
+
+def interaction_record(index: int, interaction: Any, messages: List[Any]) -> Dict[str, Any]:
+    """
+    Builds the log record of one interaction.
+
+    Only the interaction itself is serialized, so the cost of logging a turn does not grow with the
+    history. DataFrames are logged by their shape, columns and first `config.LOG_DATAFRAME_ROWS` rows,
+    and images by their size and content hash.
+
+    Args:
+        index (int): The number of the interaction in the session.
+        interaction (InteractionStep): The interaction.
+        messages (List[BaseMessage]): The messages the interaction added to the chat memory.
+
+    Returns:
+        Dict[str, Any]: The record.
+    """
+    response = interaction.response
+    return {
+        "event": "interaction",
+        "time": time.time(),
+        "interaction": index,
+        "prompt": interaction.prompt,
+        "output": str(response.output),
+        "elements": [_element_record(element) for element in response.elements],
+        "intermediate_outputs": [str(output) for output in response.intermediate_outputs],
+        "intermediate_actions": [str(action) for action in response.intermediate_actions],
+        "tools": [getattr(action, "tool", None) for action in response.intermediate_actions],
+        "messages": [{"type": message.type, "content": str(message.content)} for message in messages],
+        "rating": interaction.rating,
+        "comment": interaction.comment,
+        "ttft": interaction.ttft,
+        "latency": interaction.latency,
+        "model": interaction.model,
+        "agent_type": interaction.agent_type,
+        "steps": [[label, seconds] for label, seconds in interaction.steps],
+        "prompt_tokens": interaction.prompt_tokens,
+        "completion_tokens": interaction.completion_tokens,
+    }
+
+
+def rating_record(index: int, rating: Optional[int], comment: Optional[str]) -> Dict[str, Any]:
+    """
+    Builds the log record of a change to the rating of an interaction.
+
+    Args:
+        index (int): The number of the interaction in the session.
+        rating (int, optional): The new rating.
+        comment (str, optional): The new comment.
+
+    Returns:
+        Dict[str, Any]: The record. The last rating record of an interaction supersedes its previous ones.
+    """
+    return {"event": "rating", "time": time.time(), "interaction": index, "rating": rating, "comment": comment}
+
+
+def _element_record(element: Any) -> Dict[str, Any]:
+    content = element.content
+    if isinstance(content, pd.DataFrame):
+        content = {
+            "n_rows": content.shape[0],
+            "n_columns": content.shape[1],
+            "columns": [str(column) for column in content.columns],
+            "head": json.loads(content.head(config.LOG_DATAFRAME_ROWS).to_json(orient="records", date_format="iso")),
+        }
+    elif isinstance(content, bytes):
+        content = {"bytes": len(content), "sha256": hashlib.sha256(content).hexdigest()}
+    else:
+        content = str(content)
+    return {"type": element.type, "content": content}
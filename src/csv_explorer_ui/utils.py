@@ -1,72 +1,39 @@
-import json
-
-import pandas as pd
 import streamlit as st
 from loguru import logger
 
-from csv_explorer_ui import config
-import os
+from csv_explorer_ui.logs import get_log_writer, interaction_record, rating_record, session_log_path
 
 
-def persist_logs() -> None:
+def log_interaction(index: int) -> None:
     """
-    Persists the logs for the CSV Explorer application.
+    Appends an interaction of the session to its log.
 
-    This function performs the following tasks:
-    1. Extracts the messages from the chat memory of the Explorer object and writes them to a JSON file at the location specified by `config.MEMORY_LOGS_PATH`.
-    2. Iterates through the interactions stored in `st.session_state.interactions`, and for each interaction, writes detailed information about the interaction (including the prompt, response, output, elements, intermediate outputs and actions, rating, and comment) to a file at the location specified by `config.RATING_LOGS_PATH`.
+    Only the interaction and the messages it added to the chat memory are logged, in one JSON line of
+    `session_<session_id>.jsonl` in `config.LOGS_PATH`, written by the background log writer.
 
-    The function uses the `logger` object to log an informational message about the log persistence process.
+    Args:
+        index (int): The number of the interaction, a key of `st.session_state.interactions`.
     """
+    logger.info(f"Persistindo a interação {index}")
 
-    logger.info(f"Persistindo os logs")
-
-    extracted_messages = [
-        x.__repr__() for x in st.session_state["explorer"].memory.chat_memory.messages
-    ]
-
-    if not os.path.exists(config.LOGS_PATH):
-        os.makedirs(config.LOGS_PATH) 
-    memory_logs_path = os.path.join(config.LOGS_PATH, f"memory_{st.session_state['session_id']}.txt")
-    metadata_logs_path = os.path.join(config.LOGS_PATH, f"metadata_{st.session_state['session_id']}.yaml")
+    messages = st.session_state["explorer"].memory.chat_memory.messages
+    logged = st.session_state.get("logged_messages", 0)
+    if logged > len(messages):
+        logged = 0
+    st.session_state["logged_messages"] = len(messages)
 
-    with open(memory_logs_path, "w") as file:
-        file.write(json.dumps(extracted_messages, indent=4, ensure_ascii=False))
+    record = interaction_record(index, st.session_state.interactions[index], messages[logged:])
+    get_log_writer().write(session_log_path(st.session_state["session_id"]), record)
 
-    with open(metadata_logs_path, "w") as file:
-        for index, int in st.session_state.interactions.items():
-            tab = 2 * " "
-            msg = (
-                f"{index}:\n"
-                + f"{tab}{int.__class__.__name__}:\n"
-                + f'{2*tab}prompt:\n{3*tab}"{int.prompt}"\n'
-                + f"{2*tab}response:\n{3*tab}{int.response.__class__.__name__}:\n"
-                + f"{4*tab}output: " + '"' + f"\n{5*tab}"
-                + str(int.response.output).replace("\n", f"\n{5*tab}").replace('"', "'") + '"'
-                + "\n"
-                + f"{4*tab}elements:"
-            )
-            for element in int.response.elements:
-                msg += f"\n{5*tab}- {element.__class__.__name__}:"
-                for k, v in element.__dict__.items():
-                    if isinstance(v, pd.DataFrame):
-                        value = "\n\n" + str(v.to_markdown()).replace(
-                            "-:|", "--|"
-                        ).replace("|:-", "|--") + "\n"
-                        value = value.replace("\n", f"\n{6*tab + '  ' + tab}")
-                    else:
-                        value = str(v).replace("\n", f"\n{6*tab + '  ' + tab}").replace('"', "'")
-                    msg += f"\n{6*tab}  {k}: \"{str(value).strip().replace('None', 'null')}\""
-            msg += "\n"
-            msg += f"{4*tab}intermediate_outputs:\n"
-            for output in int.response.intermediate_outputs:
-                msg += f"{5*tab}- \"" + str(output).replace('\n', '\n  ' + 6*tab).replace("None", "null").replace('"', "'") + "\"\n"
 
-            msg += f"{4*tab}intermediate_actions:\n"
-            for action in int.response.intermediate_outputs:
-                msg += f"{5*tab}- \"" + str(action).replace('\n', '\n  ' + 6*tab).replace("None", "null").replace('"', "'") + "\"\n"
+def log_rating(index: int, rating: int | None, comment: str | None) -> None:
+    """
+    Appends a change to the rating of an interaction to the log of the session.
 
-            msg += f"{2*tab}rating: {int.rating}\n"
-            msg += f'{2*tab}comment: "{int.comment}"\n'
-            msg += "\n"
-            file.write(msg)
+    Args:
+        index (int): The number of the interaction.
+        rating (int, optional): The new rating.
+        comment (str, optional): The new comment.
+    """
+    logger.info(f"Persistindo a avaliação da interação {index}")
+    get_log_writer().write(session_log_path(st.session_state["session_id"]), rating_record(index, rating, comment))
@@ -1,7 +1,9 @@
 from streamlit_chat_handler._handler import StreamlitChatHandler
+from streamlit_chat_handler._registry import SessionRegistry
 
 
 
 __all__ = [
     "StreamlitChatHandler",
+    "SessionRegistry",
 ]
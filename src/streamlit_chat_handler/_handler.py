@@ -1,3 +1,4 @@
+import sys
 import uuid
 from typing import Any, List, Literal, Tuple
 from collections import OrderedDict
@@ -7,8 +8,10 @@ from loguru import logger
 from pydantic import BaseModel
 from streamlit_star_rating import st_star_rating
 from streamlit.runtime.state.session_state_proxy import SessionStateProxy
+from streamlit_chat_handler._registry import SessionRegistry
 from streamlit_chat_handler.types import StreamlitChatElement
-from csv_explorer_ui.utils import persist_logs
+from csv_explorer.tracing import span
+from csv_explorer_ui.utils import log_rating
 
 
 class ChatInteraction(BaseModel):
@@ -42,12 +45,20 @@ class StreamlitChatHandler:
 
     This class manages chat elements in a Streamlit application, allowing for creating,
     storing, and rendering user and assistant messages dynamically. It uses a singleton pattern
-    to maintain a unique instance per session.
+    to maintain a unique instance per session, kept in a bounded `SessionRegistry` that evicts idle
+    and least recently used sessions.
 
     Attributes:
         session_state (dict): A reference to Streamlit's session state object.
         session_id (str): The unique identifier for the session.
         elements_label (str): The key used to store chat elements in the session state.
+        elements (OrderedDict): The chat elements of the session, the same object stored in the session state.
+        resources (dict): Objects owned by the session, such as its explorer, released when it is evicted.
+        registry (SessionRegistry): The registry of the instances of every session.
+        history_size (int): The number of turns, each starting with a user message, rendered on each rerun.
+            Older turns are only rendered when the user asks for them. Set to 0 to render every turn.
+        pinned_elements (tuple): The indexes of the elements rendered on every rerun, even in collapsed turns,
+            such as the file uploader, whose widget state Streamlit drops when it is not rendered.
 
     Example:
         >>> import uuid
@@ -72,20 +83,28 @@ class StreamlitChatHandler:
 
     """
 
-    _instances: dict[str, "StreamlitChatHandler"] = {}
+    registry: SessionRegistry = SessionRegistry()
     elements_label: str = "elements"
+    history_size: int = 10
+    pinned_elements: tuple = ("init", "file_upload", "csv_prepared")
 
     def __new__(cls, session_state: SessionStateProxy, session_id: str):
         """Ensure only one instance per session_id."""
-        if session_id not in cls._instances:
+
+        def _create() -> "StreamlitChatHandler":
             instance = super(StreamlitChatHandler, cls).__new__(cls)
-            cls._instances[session_id] = instance
             instance.session_state = session_state
             instance.session_id = session_id
             instance._init_session_state()
+            instance.elements = session_state[cls.elements_label]
             instance.rendered_elements = OrderedDict({})
             instance.interactions = OrderedDict({})
-        return cls._instances[session_id]
+            instance.live_elements = {}
+            instance.resources = {}
+            instance.history_pages = 1
+            return instance
+
+        return cls.registry.get_or_create(session_id, _create)
 
     def __init__(self, session_state: SessionStateProxy, session_id: str):
         """Initialize the instance with the session state and ID."""
@@ -144,29 +163,80 @@ class StreamlitChatHandler:
     ) -> None:
         """Append multiple chat elements to the session state."""
 
-        chat_element = OrderedDict(
-            {self._set_index(chat_element=e): e for e in elements}
-        )
-
-        for index, element in chat_element.items():
-            self.append(
-                role=element.role,
-                type=element.type,
-                content=element.content,
-                index=index,
-                render=element.index,  # Aqui, os componentes serão renderizados separadamente
-                parent=element.parent,
-                parent_args=element.parent_args,
-                parent_kwargs=element.parent_kwargs,
+        with span("append_multiple", elements=len(elements), render=render):
+            chat_element = OrderedDict(
+                {self._set_index(chat_element=e): e for e in elements}
             )
 
-        if render:
-            response = self._render_elements(chat_element)
+            for index, element in chat_element.items():
+                self.append(
+                    role=element.role,
+                    type=element.type,
+                    content=element.content,
+                    index=index,
+                    render=element.index,  # Aqui, os componentes serão renderizados separadamente
+                    parent=element.parent,
+                    parent_args=element.parent_args,
+                    parent_kwargs=element.parent_kwargs,
+                )
+
+            if render:
+                response = self._render_elements(chat_element)
+
+                for index, value in response.items():
+                    if index in self.rendered_elements:
+                        del self.rendered_elements[index]
+                    self.rendered_elements[index] = value
+
+    def start_live(self, role: Literal["user", "assistant"] = "assistant", index: str | None = None) -> str:
+        """Start a live chat element, whose content can be updated while it is being generated.
+
+        Live elements are drawn in a placeholder and are not stored in the session state. Once the
+        content is complete, call `end_live` and append the final elements.
 
-            for index, value in response.items():
-                if index in self.rendered_elements:
-                    del self.rendered_elements[index]
-                self.rendered_elements[index] = value
+        Args:
+            role: The role of the message ('user' or 'assistant').
+            index: Optional; a unique identifier for the live element. Automatically generated if not provided.
+
+        Returns:
+            The index of the live element.
+        """
+        index = self._set_index(index)
+        self.live_elements[index] = (st.empty(), role)
+        return index
+
+    def update_live(self, index: str, content: Any, type: str = "markdown") -> None:
+        """Replace the content of a live chat element.
+
+        Args:
+            index: The index returned by `start_live`.
+            content: The new content of the element.
+            type: Optional; the Streamlit widget used to draw the content. Defaults to 'markdown'.
+        """
+        placeholder, role = self.live_elements[index]
+        with placeholder.container():
+            getattr(st.chat_message(role), type)(content)
+
+    def end_live(self, index: str) -> None:
+        """Remove a live chat element from the page.
+
+        Args:
+            index: The index returned by `start_live`.
+        """
+        placeholder, _ = self.live_elements.pop(index)
+        placeholder.empty()
+
+    def memory_usage(self) -> dict[str, int]:
+        """Estimate the memory held by the session.
+
+        Returns:
+            The bytes held by the chat elements and by each resource with a `memory_usage` method.
+        """
+        usage = {"elements": sum(_sizeof(element.content) for element in self.elements.values())}
+        for name, resource in self.resources.items():
+            if hasattr(resource, "memory_usage"):
+                usage[name] = int(resource.memory_usage())
+        return usage
 
     def increment_step_counter(self) -> None:
         """Finish the current step."""
@@ -178,12 +248,37 @@ class StreamlitChatHandler:
         self.rendered_elements[last_key] = last_element.render()
 
     def render(self) -> "StreamlitChatHandler":
-        """Render all chat elements in the session."""
-        self.rendered_elements = self._render_elements(
-            self.session_state[self.elements_label],
-        )
+        """Render the chat elements of the last turns of the session.
+
+        Only the last `history_size` turns are rendered; older turns are collapsed behind a button that
+        loads `history_size` more turns each time it is clicked. The `pinned_elements` of the collapsed turns,
+        such as the file uploader, are still rendered, so their widgets keep their values across reruns.
+        """
+        with span("render") as render_span:
+            elements = self.session_state[self.elements_label]
+            turns = _split_turns(list(elements.items()))
+
+            hidden = self._hidden_turns(len(turns))
+            if hidden and st.button(
+                f"Mostrar mensagens anteriores ({hidden})",
+                key=f"{self.session_id}_history",
+                use_container_width=True,
+            ):
+                self.history_pages += 1
+                hidden = self._hidden_turns(len(turns))
+
+            pinned = [item for turn in turns[:hidden] for item in turn if item[0] in self.pinned_elements]
+            visible = OrderedDict(pinned + [item for turn in turns[hidden:] for item in turn])
+            self.rendered_elements.update(self._render_elements(visible))
+            render_span.set(elements=len(elements), rendered=len(visible), turns=len(turns))
         return self
 
+    def _hidden_turns(self, n_turns: int) -> int:
+        """Count the oldest turns not rendered on this rerun."""
+        if self.history_size <= 0:
+            return 0
+        return max(n_turns - self.history_size * self.history_pages, 0)
+
     def _init_session_state(self) -> None:
         """Initialize the session state for storing chat elements if it doesn't already exist."""
         if self.elements_label not in self.session_state:
@@ -272,17 +367,15 @@ class StreamlitChatHandler:
         if isinstance(chat_element, StreamlitChatElement):
             chat_element = OrderedDict({self._set_index(): chat_element})
 
-        chat_element_list = [v for v in chat_element.values()]
-        element_groups = _group_elements_by_role(chat_element_list)
+        element_groups = _group_elements_by_role(list(chat_element.items()))
 
         response = OrderedDict({})
 
-        count = 0
         for element_list in element_groups:
-            role = element_list[0].role
+            role = element_list[0][1].role
             chat_message = st.chat_message(role)
             last_index = None
-            for element in element_list:
+            for index, element in element_list:
                 try:
                     parent = (
                         getattr(chat_message, element.parent)(
@@ -291,16 +384,15 @@ class StreamlitChatHandler:
                         if element.parent
                         else chat_message
                     )
-                    last_index = list(chat_element)[count]
+                    last_index = index
                     response[last_index] = getattr(parent, element.type)(
                         element.content, *element.args, **element.kwargs
                     )
 
                 except Exception as err:
                     logger.warning(
-                        f"Error rendering element {element} in key {list(chat_element)[count]}: {err}"
+                        f"Error rendering element {element} in key {index}: {err}"
                     )
-                count += 1
 
             blocked_ids = ["file_upload", "csv_prepared"]
             if last_index and (role == "assistant") and (last_index not in blocked_ids):
@@ -330,33 +422,34 @@ def _get_last_item(ordered_dict: OrderedDict) -> Tuple[str, Any]:
 
 
 def _group_elements_by_role(
-    elements: list[StreamlitChatElement],
-) -> list[list[StreamlitChatElement]]:
+    elements: list[Tuple[str, StreamlitChatElement]],
+) -> list[list[Tuple[str, StreamlitChatElement]]]:
     """Group elements by their role attribute.
 
-    This function takes a list of StreamlitChatElement instances and groups them into
+    This function takes a list of (index, StreamlitChatElement) pairs and groups them into
     sublists, where each sublist contains elements of the same role. It ensures that
     elements are grouped consecutively as per the order in the original list.
 
     Args:
-        elements (List[StreamlitChatElement]): A list of chat elements to be grouped.
+        elements (List[Tuple[str, StreamlitChatElement]]): A list of indexed chat elements to be grouped.
 
     Returns:
-        List[List[StreamlitChatElement]]: A list of lists, where each sublist contains elements of the same role.
+        List[List[Tuple[str, StreamlitChatElement]]]: A list of lists, where each sublist contains elements
+            of the same role.
     """
     grouped_elements = []
     if not elements:
         return grouped_elements
 
     current_group = []
-    current_role = elements[0].role
+    current_role = elements[0][1].role
 
-    for element in elements:
+    for index, element in elements:
         if element.role == current_role:
-            current_group.append(element)
+            current_group.append((index, element))
         else:
             grouped_elements.append(current_group)
-            current_group = [element]
+            current_group = [(index, element)]
             current_role = element.role
 
     if current_group:
@@ -365,6 +458,40 @@ def _group_elements_by_role(
     return grouped_elements
 
 
+def _split_turns(
+    elements: list[Tuple[str, StreamlitChatElement]],
+) -> list[list[Tuple[str, StreamlitChatElement]]]:
+    """Split indexed elements into turns, each starting with a user message after an assistant one.
+
+    Elements before the first user message form the first turn.
+
+    Args:
+        elements (List[Tuple[str, StreamlitChatElement]]): A list of indexed chat elements.
+
+    Returns:
+        List[List[Tuple[str, StreamlitChatElement]]]: The elements of each turn, in order.
+    """
+    turns = []
+    previous_role = None
+    for index, element in elements:
+        if not turns or (element.role == "user" and previous_role != "user"):
+            turns.append([])
+        turns[-1].append((index, element))
+        previous_role = element.role
+    return turns
+
+
+def _sizeof(content: Any) -> int:
+    """Estimate the bytes held by the content of a chat element."""
+    if hasattr(content, "memory_usage"):
+        usage = content.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    if hasattr(content, "get_size_inches") and hasattr(content, "dpi"):
+        width, height = content.get_size_inches() * content.dpi
+        return int(width * height * 4)
+    return sys.getsizeof(content)
+
+
 def _check_argument(argument: Any):
     if argument is not None:
         return True
@@ -427,7 +554,7 @@ def _render_feedback(parent, last_index, default_value=None, default_comment="")
             logger.info(
                 f"Comentário da interação {interaction_number} foi alterado para {comment}"
             )
-            persist_logs()
+            log_rating(interaction_number, rating, comment)
             st.rerun()
 
 
@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from loguru import logger
+
+
+class SessionRegistry:
+    """A bounded registry of per-session objects, evicting idle and least recently used sessions.
+
+    Sessions not accessed for `idle_timeout` seconds are evicted, and when there are more than
+    `max_sessions`, the least recently used ones are evicted too. Every eviction calls the registered
+    hooks with the session id and its object, so the resources of the session can be released.
+
+    Attributes:
+        max_sessions (int): The maximum number of sessions kept.
+        idle_timeout (float): The number of seconds after which an unused session is evicted.
+
+    Example:
+        >>> registry = SessionRegistry(max_sessions=100, idle_timeout=3600)
+        >>> registry.on_evict(lambda session_id, handler: handler.close())
+        >>> handler = registry.get_or_create(session_id, lambda: Handler())
+    """
+
+    def __init__(self, max_sessions: int = 100, idle_timeout: float = 3600):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions: OrderedDict[Hashable, Tuple[Any, float]] = OrderedDict()
+        self._hooks: List[Callable[[Hashable, Any], None]] = []
+        self._lock = threading.RLock()
+
+    def __contains__(self, session_id: Hashable) -> bool:
+        with self._lock:
+            return session_id in self._sessions
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def get(self, session_id: Hashable) -> Optional[Any]:
+        """Get the object of a session, marking the session as used.
+
+        Args:
+            session_id: The session id.
+
+        Returns:
+            The object of the session, or None if there is no such session.
+        """
+        with self._lock:
+            if session_id not in self._sessions:
+                return None
+            value, _ = self._sessions.pop(session_id)
+            self._sessions[session_id] = (value, time.monotonic())
+        self.sweep()
+        return value
+
+    def get_or_create(self, session_id: Hashable, factory: Callable[[], Any]) -> Any:
+        """Get the object of a session, creating it with `factory` if the session is not registered.
+
+        Args:
+            session_id: The session id.
+            factory: A function returning the object of a new session.
+
+        Returns:
+            The object of the session.
+        """
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            value = entry[0] if entry is not None else factory()
+            self._sessions[session_id] = (value, time.monotonic())
+        self.sweep()
+        return value
+
+    def pop(self, session_id: Hashable) -> Optional[Any]:
+        """Evict a session, calling the eviction hooks.
+
+        Args:
+            session_id: The session id.
+
+        Returns:
+            The object of the evicted session, or None if there is no such session.
+        """
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+        if entry is None:
+            return None
+        self._evict(session_id, entry[0])
+        return entry[0]
+
+    def on_evict(self, hook: Callable[[Hashable, Any], None]) -> Callable[[Hashable, Any], None]:
+        """Register a function called with the session id and the object of every evicted session.
+
+        Args:
+            hook: The function to be called.
+
+        Returns:
+            The same function, so this method can be used as a decorator.
+        """
+        self._hooks.append(hook)
+        return hook
+
+    def sweep(self) -> int:
+        """Evict the idle sessions and, beyond `max_sessions`, the least recently used ones.
+
+        Returns:
+            The number of evicted sessions.
+        """
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            for session_id, (value, last_access) in list(self._sessions.items()):
+                if now - last_access <= self.idle_timeout and len(self._sessions) <= self.max_sessions:
+                    break
+                del self._sessions[session_id]
+                evicted.append((session_id, value))
+
+        for session_id, value in evicted:
+            self._evict(session_id, value)
+        return len(evicted)
+
+    def memory_usage(self, sizeof: Callable[[Any], int]) -> Dict[Hashable, int]:
+        """Report the memory used by each session.
+
+        Args:
+            sizeof: A function returning the number of bytes used by the object of a session.
+
+        Returns:
+            The number of bytes used by each session, keyed by session id.
+        """
+        with self._lock:
+            sessions = [(session_id, value) for session_id, (value, _) in self._sessions.items()]
+        return {session_id: sizeof(value) for session_id, value in sessions}
+
+    def _evict(self, session_id: Hashable, value: Any) -> None:
+        logger.info(f"Removendo a sessão {session_id}")
+        for hook in self._hooks:
+            try:
+                hook(session_id, value)
+            except Exception as err:
+                logger.warning(f"Erro ao liberar os recursos da sessão {session_id}: {err}")
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from csv_explorer.inference import RowReservoir
+
+
+@pytest.mark.parametrize("chunk_size", [16, 1000])
+def test_row_reservoir_is_uniform_over_chunks(chunk_size):
+    n_rows, size, trials = 200, 20, 300
+    frame = pd.DataFrame({"row": np.arange(n_rows)}, index=np.arange(n_rows) * 2)
+
+    counts = np.zeros(n_rows)
+    for seed in range(trials):
+        reservoir = RowReservoir(size, seed=seed)
+        for start in range(0, n_rows, chunk_size):
+            reservoir.update(frame.iloc[start : start + chunk_size])
+        assert len(reservoir.rows) == size and reservoir.rows["row"].is_unique
+        counts[reservoir.rows["row"].to_numpy()] += 1
+
+    expected = size / n_rows
+    assert np.abs(counts / trials - expected).max() < 5 * np.sqrt(expected * (1 - expected) / trials)
+
+
+def test_row_reservoir_merge_keeps_smallest_keys():
+    frame = pd.DataFrame({"row": np.arange(1000)})
+    left = RowReservoir(50, seed=1).update(frame.iloc[:600])
+    right = RowReservoir(50, seed=2).update(frame.iloc[600:])
+    keys = np.concatenate([left.keys, right.keys])
+
+    merged = left.merge(right)
+
+    assert len(merged.rows) == 50
+    assert np.array_equal(np.sort(merged.keys), np.sort(keys)[:50])
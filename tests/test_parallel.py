@@ -0,0 +1,27 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from csv_explorer import parallel
+from csv_explorer.parallel import ByteRangeReader, split_byte_ranges
+
+
+@pytest.mark.parametrize("block_size", [7, 64, 1 << 20])
+@pytest.mark.parametrize("n_ranges", [1, 3, 16])
+def test_byte_ranges_do_not_split_quoted_fields(tmp_path, monkeypatch, block_size, n_ranges):
+    monkeypatch.setattr(parallel, "_SCAN_BLOCK_SIZE", block_size)
+    rng = np.random.default_rng(n_ranges)
+    texts = ["simples", "com, vírgula", 'várias\nlinhas "citadas"', '"', "\n\n", ""]
+    frame = pd.DataFrame({"id": np.arange(2000), "text": rng.choice(texts, size=2000), "value": rng.random(2000)})
+    filepath = str(tmp_path / "data.csv")
+    frame.to_csv(filepath, index=False)
+
+    header, ranges = split_byte_ranges(filepath, n_ranges)
+    parts = [pd.read_csv(io.BufferedReader(ByteRangeReader(filepath, header, start, end))) for start, end in ranges]
+
+    assert ranges[0][0] == len(header) and ranges[-1][1] == os.path.getsize(filepath)
+    assert all(previous[1] == following[0] for previous, following in zip(ranges, ranges[1:]))
+    pd.testing.assert_frame_equal(pd.concat(parts, ignore_index=True), pd.read_csv(filepath))
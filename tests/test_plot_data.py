@@ -0,0 +1,67 @@
+import io
+
+import numpy as np
+import pytest
+from matplotlib.figure import Figure
+from matplotlib.image import imread
+
+from csv_explorer.figures import render_figure
+from csv_explorer.plot_data import reduce_figure
+
+DPI = 150
+
+
+def _line(layout=None, xscale="linear", inverted=False):
+    rng = np.random.default_rng(0)
+    figure = Figure(layout=layout)
+    ax = figure.add_subplot()
+    x = np.arange(1, 200_001)
+    ax.plot(x, np.cumsum(rng.normal(size=len(x))))
+    ax.set_xscale(xscale)
+    if inverted:
+        ax.invert_xaxis()
+    return figure
+
+
+def _scatter(layout=None):
+    rng = np.random.default_rng(0)
+    figure = Figure(layout=layout)
+    ax = figure.add_subplot()
+    ax.scatter(rng.normal(size=100_000), rng.normal(size=100_000), s=4)
+    return figure
+
+
+def _image(figure):
+    return imread(io.BytesIO(render_figure(figure, format="png", dpi=DPI)))
+
+
+@pytest.mark.parametrize(
+    "build",
+    [
+        pytest.param(_line, id="line"),
+        pytest.param(lambda: _line(xscale="log"), id="line-log"),
+        pytest.param(lambda: _line(inverted=True), id="line-inverted"),
+        pytest.param(lambda: _line(layout="constrained"), id="line-constrained"),
+        pytest.param(_scatter, id="scatter"),
+        pytest.param(lambda: _scatter(layout="constrained"), id="scatter-constrained"),
+    ],
+)
+def test_reduced_figure_renders_as_the_original(build):
+    original = _image(build())
+    figure = build()
+
+    reductions = reduce_figure(figure, dpi=DPI)
+    reduced = _image(figure)
+
+    assert len(reductions) == 1 and reductions[0].n_after < reductions[0].n_before * 0.9
+    assert reduced.shape == original.shape
+    difference = np.abs(reduced - original).max(axis=2)
+    assert difference.mean() < 0.005
+    assert (difference > 0.5).mean() < 0.005
+
+
+def test_small_plots_are_not_reduced():
+    figure = Figure()
+    figure.add_subplot().plot(np.arange(100), np.arange(100))
+
+    assert reduce_figure(figure, dpi=DPI) == []
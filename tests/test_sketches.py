@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from csv_explorer.sketches import FrequentItems, HyperLogLog, KLLSketch, Moments
+
+
+def _split(values, n_chunks, rng):
+    cuts = np.sort(rng.choice(np.arange(1, len(values)), size=n_chunks - 1, replace=False))
+    return np.split(values, cuts)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_moments_match_numpy_over_split_chunks(seed):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(loc=rng.uniform(-1e6, 1e6), scale=rng.uniform(1, 1e3), size=5000)
+
+    merged = Moments()
+    for chunk in _split(values, 7, rng):
+        merged.merge(Moments().update(chunk))
+
+    assert merged.count == len(values)
+    assert merged.mean == pytest.approx(values.mean(), rel=1e-9)
+    assert merged.std == pytest.approx(values.std(ddof=1), rel=1e-9)
+    assert merged.minimum == values.min()
+    assert merged.maximum == values.max()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_kll_quantiles_are_within_rank_error(seed):
+    rng = np.random.default_rng(seed)
+    values = rng.lognormal(size=20000)
+
+    parts = [KLLSketch(seed=seed + index).update(chunk) for index, chunk in enumerate(_split(values, 5, rng))]
+    sketch = parts[0]
+    for part in parts[1:]:
+        sketch.merge(part)
+
+    ordered = np.sort(values)
+    for q in (0.1, 0.25, 0.5, 0.75, 0.9):
+        rank = np.searchsorted(ordered, sketch.quantile(q)) / len(values)
+        assert abs(rank - q) < 0.03
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_hyperloglog_estimate_is_close_to_distinct_count(seed):
+    rng = np.random.default_rng(seed)
+    values = pd.Series(rng.integers(0, 50000, size=100000)).astype(str)
+
+    left, right = HyperLogLog(), HyperLogLog()
+    left.update(values[:30000])
+    right.update(values[30000:])
+
+    assert left.merge(right).estimate() == pytest.approx(values.nunique(), rel=0.05)
+
+
+def test_hyperloglog_is_exact_on_small_inputs():
+    values = pd.Series(["a", "b", "c", "a", "1", "1.0"])
+
+    assert HyperLogLog().update(values).estimate() == 5
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_frequent_items_are_exact_below_capacity(seed):
+    rng = np.random.default_rng(seed)
+    values = pd.Series(rng.zipf(1.5, size=3000) % 50).astype(str)
+
+    parts = [FrequentItems().update(pd.Series(chunk)) for chunk in _split(values.to_numpy(), 4, rng)]
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+
+    assert dict(merged.most_common()) == values.value_counts().to_dict()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_frequent_items_undercount_within_bound(seed):
+    rng = np.random.default_rng(seed)
+    values = pd.Series(rng.zipf(1.3, size=20000)).astype(str)
+    capacity = 20
+
+    sketch = FrequentItems(capacity=capacity)
+    for chunk in _split(values.to_numpy(), 10, rng):
+        sketch.update(pd.Series(chunk))
+
+    exact = values.value_counts()
+    bound = len(values) / (capacity + 1)
+    for value, count in sketch.most_common():
+        assert exact[value] - bound <= count <= exact[value]
+    assert sketch.most_common(1)[0][0] == exact.index[0]
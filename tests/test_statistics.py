@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from csv_explorer.statistics import ColumnSummary, describe_csv, merge_summaries, summarize_chunks
+
+
+def _mixed_column(rng, size):
+    values = rng.integers(0, 5, size=size).astype(object)
+    values[rng.random(size) < 0.1] = None
+    values[rng.integers(size // 2, size, size=3)] = "x"
+    return values
+
+
+def _write_csv(tmp_path, rng, size=2000):
+    frame = pd.DataFrame(
+        {
+            "number": rng.normal(size=size).round(3),
+            "integer": rng.integers(-100, 100, size=size),
+            "city": rng.choice(["Recife", "Natal", "Belém", "Maceió"], size=size, p=[0.4, 0.3, 0.2, 0.1]),
+            "mixed": _mixed_column(rng, size),
+        }
+    )
+    filepath = tmp_path / "data.csv"
+    frame.to_csv(filepath, index=False)
+    return str(filepath)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_summary_of_column_turned_non_numeric_matches_pandas(seed, tmp_path):
+    rng = np.random.default_rng(seed)
+    filepath = _write_csv(tmp_path, rng)
+    column = pd.read_csv(filepath)["mixed"]
+    expected = column.describe()
+
+    chunks = pd.read_csv(filepath, usecols=["mixed"], chunksize=250)
+    summary = summarize_chunks(chunks)["mixed"]
+    described = summary.describe()
+
+    assert not summary.is_numeric
+    assert described["count"] == expected["count"]
+    assert described["unique"] == expected["unique"]
+    assert described["freq"] == expected["freq"] == column.value_counts()[described["top"]]
+
+
+def test_flip_to_non_numeric_keeps_earlier_values():
+    summary = ColumnSummary("column")
+    summary.update(pd.Series([1, 1, 1]))
+    summary.update(pd.Series(["x"]))
+
+    described = summary.describe()
+
+    assert (described["unique"], described["top"], described["freq"]) == (2, "1", 3)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_merge_of_numeric_and_non_numeric_parts_matches_pandas(seed):
+    rng = np.random.default_rng(seed)
+    numeric = pd.Series(rng.integers(0, 5, size=300))
+    labels = pd.Series(rng.choice(["1", "2", "x"], size=100))
+    column = pd.concat([numeric.astype(str), labels])
+    expected = column.describe()
+
+    parts = [{"column": ColumnSummary("column").update(numeric)}, {"column": ColumnSummary("column").update(labels)}]
+    if seed % 2:
+        parts.reverse()
+    described = merge_summaries(parts)["column"].describe()
+
+    assert described["unique"] == expected["unique"]
+    assert described["freq"] == expected["freq"] == column.value_counts()[described["top"]]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_describe_csv_matches_pandas_over_split_chunks(seed, tmp_path):
+    rng = np.random.default_rng(seed)
+    filepath = _write_csv(tmp_path, rng)
+    frame = pd.read_csv(filepath)
+    expected = frame.describe(include="all")
+
+    described = describe_csv(filepath, chunksize=int(rng.integers(50, 500)), workers=1)
+
+    for column in ["number", "integer"]:
+        for row in ["count", "mean", "std", "min", "max"]:
+            assert described.loc[row, column] == pytest.approx(expected.loc[row, column], rel=1e-9)
+        for row in ["25%", "50%", "75%"]:
+            tolerance = 0.1 * expected.loc["std", column]
+            assert described.loc[row, column] == pytest.approx(expected.loc[row, column], abs=tolerance)
+    for column in ["city", "mixed"]:
+        for row in ["count", "unique", "freq"]:
+            assert described.loc[row, column] == expected.loc[row, column]
+        assert frame[column].value_counts()[described.loc["top", column]] == expected.loc["freq", column]